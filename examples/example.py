@@ -3,13 +3,10 @@ import pycello.ucf
 
 import json
 
-with open('Eco1C1G1T1-synbiohub.UCF.json') as ucf_file:
-    ucf_json = json.load(ucf_file)
-
 with open('and_outputNetlist.json') as netlist_file:
     netlist_json = json.load(netlist_file)
 
-ucf = pycello.ucf.UCF(ucf_json)
+ucf = pycello.ucf.UCF.from_path('Eco1C1G1T1-synbiohub.UCF.json', cache=True)
 netlist = pycello.netlist.Netlist(netlist_json, ucf)
 
 nodes = [node.name for node in netlist.nodes]
@@ -0,0 +1,115 @@
+"""
+Activity tables computed from a netlist and the UCF response functions.
+
+Each primary input is driven at the low or high signal of its input sensor
+in every row of the truth table, and the activity of the other nodes is
+propagated level by level through the netlist schedule, with each gate
+evaluated across all states at once.
+"""
+
+import numpy as np
+
+import pycello.table
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+# node types evaluated by the response function of their gate
+GATE_TYPES = ('NOT', 'NOR')
+
+# node types whose activity is the sum of their inputs
+SUM_TYPES = ('PRIMARY_OUTPUT', 'OUTPUT', 'OUTPUT_OR', 'OR', 'BUF')
+
+
+def truth_table(inputs):
+    """Get every combination of values of a number of inputs.
+
+    Parameters
+    ----------
+    inputs : int
+
+    Returns
+    -------
+    numpy.ndarray
+        The boolean value of each input in each state, of shape
+        (inputs, 2**inputs). The first input is the most significant bit of
+        the state number, as in Cello logic circuit files.
+
+    """
+    states = np.arange(2**inputs, dtype=np.int64)
+    shifts = np.arange(inputs - 1, -1, -1, dtype=np.int64)
+    return ((states[None, :] >> shifts[:, None]) & 1).astype(np.bool_)
+
+
+def activity_table(netlist, inputs=None, logic=None):
+    """Compute the activity of every node of a netlist in every state.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    inputs : list, optional
+        The names of the primary input nodes, in truth table order. Defaults
+        to their order in the netlist.
+    logic : numpy.ndarray, optional
+        The boolean value of each of `inputs` in each state, of shape
+        (inputs, states). Defaults to every combination, see `truth_table`.
+
+    Returns
+    -------
+    pycello.table.Table
+        The activity of each node of the netlist, in netlist order.
+
+    Raises
+    ------
+    pycello.netlist.FeedbackError
+        If the netlist has feedback loops.
+    ValueError
+        If a node has a type that cannot be evaluated.
+
+    Examples
+    --------
+    The activity table of the Cello AND example, with input ``b`` as the
+    most significant bit:
+
+    >>> table = activity_table(netlist, inputs=['b', 'a'])
+    >>> table['$50']
+    array([0.02000822, 0.02005206, 0.02055225, 6.75711212])
+
+    """
+    schedule = netlist.schedule(strict=True)
+    if inputs is None:
+        inputs = [node.name for node in netlist.nodes if node.type == 'PRIMARY_INPUT']
+    if logic is None:
+        logic = truth_table(len(inputs))
+    logic = np.asarray(logic, dtype=np.bool_)
+    if len(logic) != len(inputs):
+        raise ValueError("Logic given for {} of {} inputs.".format(len(logic), len(inputs)))
+
+    # the last row stays zero, for the padding of the input positions
+    values = np.zeros((len(schedule.nodes) + 1, logic.shape[1]))
+    driven = set()
+    for name, row in zip(inputs, logic):
+        node = netlist.node(name)
+        if node is None or node.type != 'PRIMARY_INPUT':
+            raise ValueError("{} is not a primary input.".format(name))
+        values[schedule.index[node]] = np.where(row, node.gate.hi, node.gate.lo)
+        driven.add(node)
+
+    for level, level_inputs in zip(schedule.levels, schedule.inputs):
+        x = values[level_inputs].sum(axis=1)
+        for i, position in enumerate(level.tolist()):
+            node = schedule.nodes[position]
+            if node.type == 'PRIMARY_INPUT':
+                if node not in driven:
+                    raise ValueError("No logic given for input {}.".format(node.name))
+            elif node.type in GATE_TYPES:
+                values[position] = node.gate.response(x[i])
+            elif node.type in SUM_TYPES:
+                gate = node.gate
+                values[position] = gate.response(x[i]) if gate is not None and gate.equation else x[i]
+            else:
+                raise ValueError("Cannot evaluate node {} of type {}.".format(node.name, node.type))
+
+    order = [schedule.index[node] for node in netlist.nodes]
+    return pycello.table.Table([node.name for node in netlist.nodes], values[order])
@@ -0,0 +1,435 @@
+"""
+Scoring and search of gate assignments.
+
+The NOT and NOR nodes of a netlist are bound to gates of a UCF, with at most
+one gate of each gate group in a circuit, as repressors of the same group
+would cross-talk. An assignment is a row of integers, the library index of
+the gate of each node, so a batch of assignments is one 2-D array. The
+circuit is evaluated over every state and every assignment of a batch at
+once, with the response functions of all gates that share an equation
+compiled into one function of the input and the gate parameters. The score
+of an assignment is the Cello circuit score: the ratio of the lowest ON to
+the highest OFF output, minimized over the outputs.
+
+Assignments are searched by simulated annealing of many independent chains
+in the same vectorized pass, which can be spread over worker processes.
+"""
+
+import os
+
+import numpy as np
+
+import pycello.equation
+import pycello.logic
+import pycello.ucf
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+# node types bound to a gate of the library
+GATE_TYPES = ('NOT', 'NOR')
+
+# node types whose activity is the sum of their inputs
+SUM_TYPES = ('PRIMARY_OUTPUT', 'OUTPUT', 'OUTPUT_OR', 'OR', 'BUF')
+
+# node types whose activity is scored
+OUTPUT_TYPES = ('PRIMARY_OUTPUT', 'OUTPUT', 'OUTPUT_OR')
+
+
+class Library:
+    """The gates available for assignment.
+
+    Gates with the same equation and variables share one compiled response
+    function, which takes the parameters of the gate as extra arguments.
+
+    Parameters
+    ----------
+    gates : list
+        The `pycello.ucf.Gate` objects, each with an equation of a single
+        variable.
+
+    Attributes
+    ----------
+    gates : list
+    index : dict
+        The library index of each gate name.
+    groups : list
+        The distinct gate groups.
+    group : numpy.ndarray
+        The index in `groups` of the group of each gate.
+    members : numpy.ndarray
+        The gates of each group, of shape (groups, size), padded with -1.
+    forms : list
+        The distinct ``(equation, variables, parameter names)`` of the gates.
+    form : numpy.ndarray
+        The index in `forms` of each gate.
+    parameters : list
+        For each form, the parameter values of each gate, of shape
+        (gates, parameters), nan for gates of other forms.
+
+    """
+
+    def __init__(self, gates):
+        self.gates = list(gates)
+        self.index = {gate.name: i for i, gate in enumerate(self.gates)}
+        self.groups = []
+        group_index = {}
+        forms = {}
+        self.group = np.empty(len(self.gates), dtype=np.intp)
+        self.form = np.empty(len(self.gates), dtype=np.intp)
+        for i, gate in enumerate(self.gates):
+            if not gate.equation or len(gate.variables) != 1:
+                raise ValueError("Gate {} has no response function of one variable.".format(gate.name))
+            # gates without a group only exclude themselves
+            group = gate.group if gate.group is not None else gate.name
+            self.group[i] = group_index.setdefault(group, len(group_index))
+            if self.group[i] == len(self.groups):
+                self.groups.append(group)
+            key = (gate.equation, tuple(gate.variables), tuple(sorted(_parameters(gate))))
+            self.form[i] = forms.setdefault(key, len(forms))
+        self.forms = list(forms)
+
+        self.parameters = []
+        for f, (_, _, names) in enumerate(self.forms):
+            values = np.full((len(self.gates), len(names)), np.nan)
+            for i in np.flatnonzero(self.form == f).tolist():
+                parameters = _parameters(self.gates[i])
+                values[i] = [parameters[name] for name in names]
+            self.parameters.append(values)
+
+        sizes = np.bincount(self.group, minlength=len(self.groups))
+        self.members = np.full((len(self.groups), max(sizes, default=0)), -1, dtype=np.intp)
+        for g in range(len(self.groups)):
+            members = np.flatnonzero(self.group == g)
+            self.members[g, :len(members)] = members
+        self.__functions = None
+
+    def __getstate__(self):
+        # the compiled response functions are rebuilt on first use
+        state = self.__dict__.copy()
+        state['_Library__functions'] = None
+        return state
+
+    @classmethod
+    def from_ucf(cls, ucf):
+        """Get the library of the repressor gates of a `pycello.ucf.UCF`.
+
+        Input sensors and output reporters are left out.
+
+        """
+        return cls([gate for gate in ucf.gates
+                    if type(gate) is pycello.ucf.Gate and gate.equation and len(gate.variables) == 1])
+
+    def __len__(self):
+        return len(self.gates)
+
+    def response(self, gates, x):
+        """Evaluate the response function of gates.
+
+        Parameters
+        ----------
+        gates : numpy.ndarray
+            The library index of the gate of each row of `x`, of shape (n,).
+        x : numpy.ndarray
+            The inputs, of shape (n, ...).
+
+        Returns
+        -------
+        numpy.ndarray
+            The outputs, of the shape of `x`.
+
+        """
+        if self.__functions is None:
+            self.__functions = [
+                pycello.equation.compile_equation(equation, {}, list(variables) + list(names))
+                for equation, variables, names in self.forms
+            ]
+        x = np.asarray(x, dtype=np.float64)
+        extra = (None,) * (x.ndim - 1)
+        if len(self.forms) == 1:
+            parameters = self.parameters[0][gates]
+            return np.broadcast_to(self.__functions[0](x, *(p[(slice(None),) + extra] for p in parameters.T)),
+                                   x.shape)
+        rtn = np.empty_like(x)
+        form = self.form[gates]
+        for f, fn in enumerate(self.__functions):
+            mask = form == f
+            if mask.any():
+                parameters = self.parameters[f][gates[mask]]
+                rtn[mask] = fn(x[mask], *(p[(slice(None),) + extra] for p in parameters.T))
+        return rtn
+
+
+def _parameters(gate):
+    parameters = gate.parameters
+    if isinstance(parameters, list):
+        return {p['name']: p['value'] for p in parameters}
+    return dict(parameters)
+
+
+class Assigner:
+    """Evaluate assignments of library gates to the gate nodes of a netlist.
+
+    The netlist is compiled once into index arrays, and is not used again,
+    so an assigner can be sent to worker processes.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    library : Library
+    inputs : list, optional
+        The names of the primary input nodes, most significant first.
+        Defaults to their order in the netlist.
+
+    Attributes
+    ----------
+    library : Library
+    nodes : list
+        The names of the nodes bound to gates, in the order of the columns of
+        an assignment.
+    outputs : list
+        The names of the scored output nodes.
+    on : numpy.ndarray
+        Whether each output is ON in each state, of shape (outputs, states).
+
+    Raises
+    ------
+    pycello.netlist.FeedbackError
+        If the netlist has feedback loops.
+    ValueError
+        If a node has a type that cannot be evaluated.
+
+    """
+
+    def __init__(self, netlist, library, inputs=None):
+        schedule = netlist.schedule(strict=True)
+        if inputs is None:
+            inputs = [node.name for node in netlist.nodes if node.type == 'PRIMARY_INPUT']
+        logic = pycello.logic.simulate(netlist, inputs)
+        self.library = library
+        self.states = logic.states
+
+        # the last row stays zero, for the padding of the input positions
+        self.__inputs = np.zeros((len(schedule.nodes) + 1, logic.states))
+        self.__plan = []
+        self.nodes = []
+        for position, node in enumerate(schedule.nodes):
+            fanin = np.array([schedule.index[u] for u in netlist.graph.fanin[node]], dtype=np.intp)
+            if node.type == 'PRIMARY_INPUT':
+                self.__inputs[position] = np.where(logic[node.name], node.gate.hi, node.gate.lo)
+            elif node.type in GATE_TYPES:
+                self.__plan.append((position, fanin, len(self.nodes), None))
+                self.nodes.append(node.name)
+            elif node.type in SUM_TYPES:
+                gate = node.gate if node.gate is not None and node.gate.equation else None
+                self.__plan.append((position, fanin, None, gate))
+            else:
+                raise ValueError("Cannot evaluate node {} of type {}.".format(node.name, node.type))
+        self.__bound = [getattr(netlist.node(name).gate, 'name', None) for name in self.nodes]
+
+        outputs = [node for node in netlist.nodes if node.type in OUTPUT_TYPES]
+        self.outputs = [node.name for node in outputs]
+        self.__output_positions = np.array([schedule.index[node] for node in outputs], dtype=np.intp)
+        self.on = np.array([logic[name] for name in self.outputs], dtype=np.bool_).reshape(len(outputs), -1)
+
+    def assignment(self):
+        """Get the assignment of the gates bound to the nodes of the netlist.
+
+        Raises
+        ------
+        KeyError
+            If a node is bound to a gate that is not in the library.
+
+        """
+        return np.array([self.library.index[name] for name in self.__bound], dtype=np.intp)
+
+    def gates(self, assignment):
+        """Get the name of the gate of each node of an assignment, by node name."""
+        return {name: self.library.gates[i].name for name, i in zip(self.nodes, np.asarray(assignment).tolist())}
+
+    def valid(self, assignments):
+        """Check that assignments use each gate group at most once.
+
+        Parameters
+        ----------
+        assignments : numpy.ndarray
+            Of shape (assignments, nodes).
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean for each assignment.
+
+        """
+        groups = np.sort(self.library.group[np.atleast_2d(assignments)], axis=1)
+        return ~np.any(groups[:, 1:] == groups[:, :-1], axis=1)
+
+    def random(self, count, rng=None):
+        """Draw valid assignments uniformly over groups, then over gates.
+
+        Parameters
+        ----------
+        count : int
+        rng : numpy.random.Generator or int, optional
+
+        Returns
+        -------
+        numpy.ndarray
+            Of shape (count, nodes).
+
+        """
+        rng = np.random.default_rng(rng)
+        library = self.library
+        if len(self.nodes) > len(library.groups):
+            raise ValueError("{} gate nodes but only {} gate groups.".format(len(self.nodes), len(library.groups)))
+        groups = np.argsort(rng.random((count, len(library.groups))), axis=1)[:, :len(self.nodes)]
+        sizes = (library.members >= 0).sum(axis=1)
+        choice = (rng.random(groups.shape) * sizes[groups]).astype(np.intp)
+        return library.members[groups, choice]
+
+    def evaluate(self, assignments):
+        """Get the activity of the outputs for a batch of assignments.
+
+        Parameters
+        ----------
+        assignments : numpy.ndarray
+            The library index of the gate of each of `nodes`, of shape
+            (assignments, nodes).
+
+        Returns
+        -------
+        numpy.ndarray
+            The activity of each output, of shape (assignments, outputs,
+            states).
+
+        """
+        assignments = np.atleast_2d(assignments)
+        values = np.empty((len(self.__inputs), len(assignments), self.states))
+        values[:] = self.__inputs[:, None, :]
+        for position, fanin, column, gate in self.__plan:
+            x = values[fanin].sum(axis=0) if len(fanin) else np.zeros(values.shape[1:])
+            if column is not None:
+                x = self.library.response(assignments[:, column], x)
+            elif gate is not None:
+                x = gate.response(x)
+            values[position] = x
+        return values[self.__output_positions].transpose(1, 0, 2)
+
+    def score(self, assignments):
+        """Get the circuit score of a batch of assignments.
+
+        The score of an output is its lowest ON activity over its highest
+        OFF activity, and the score of a circuit is that of its worst output.
+
+        Parameters
+        ----------
+        assignments : numpy.ndarray
+            Of shape (assignments, nodes), see `evaluate`.
+
+        Returns
+        -------
+        numpy.ndarray
+            The score of each assignment.
+
+        """
+        y = self.evaluate(assignments)
+        on = np.where(self.on, y, np.inf).min(axis=2)
+        off = np.where(self.on, -np.inf, y).max(axis=2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = on / off
+        ratio[np.isnan(ratio)] = 0.0
+        return ratio.min(axis=1) if ratio.shape[1] else np.ones(len(ratio))
+
+    def neighbors(self, assignments, rng):
+        """Propose a move for each of a batch of assignments.
+
+        A node and a library gate are drawn for each assignment. The node is
+        bound to the gate, and if another node holds a gate of the same
+        group, that node takes the previous gate of the first, so valid
+        assignments stay valid.
+
+        """
+        rows = np.arange(len(assignments))
+        rtn = assignments.copy()
+        node = rng.integers(len(self.nodes), size=len(assignments))
+        gate = rng.integers(len(self.library), size=len(assignments))
+        previous = rtn[rows, node]
+        group = self.library.group
+        clash = (group[rtn] == group[gate][:, None])
+        clash[rows, node] = False
+        swap, other = np.nonzero(clash)
+        rtn[swap, other] = previous[swap]
+        rtn[rows, node] = gate
+        return rtn
+
+
+def _anneal(assigner, chains, steps, temperature, seed):
+    rng = np.random.default_rng(seed)
+    current = assigner.random(chains, rng)
+    energy = -np.log(assigner.score(current))
+    best = current.copy()
+    best_energy = energy.copy()
+    for t in np.geomspace(temperature[0], temperature[1], steps).tolist():
+        proposal = assigner.neighbors(current, rng)
+        proposed = -np.log(assigner.score(proposal))
+        with np.errstate(invalid='ignore', over='ignore'):
+            accept = (proposed <= energy) | (rng.random(chains) < np.exp((energy - proposed) / t))
+        current[accept] = proposal[accept]
+        energy[accept] = proposed[accept]
+        better = energy < best_energy
+        best[better] = current[better]
+        best_energy[better] = energy[better]
+    return best, np.exp(-best_energy)
+
+
+def anneal(assigner, chains=256, steps=1000, temperature=(1.0, 0.01), seed=None, executor=None, tasks=None):
+    """Search for the assignment with the best circuit score.
+
+    Independent chains of simulated annealing are run side by side, each
+    proposing one move per step, see `Assigner.neighbors`. The energy of an
+    assignment is minus the log of its score, and the temperature falls
+    geometrically over the steps.
+
+    Parameters
+    ----------
+    assigner : Assigner
+    chains : int, optional
+        The number of chains.
+    steps : int, optional
+        The number of moves of each chain.
+    temperature : tuple, optional
+        The initial and final temperature.
+    seed : int, optional
+        Seed of the random moves.
+    executor : concurrent.futures.Executor, optional
+        Run the chains on this process or thread pool.
+    tasks : int, optional
+        The number of tasks the chains are split into when using `executor`.
+        Defaults to one per CPU.
+
+    Returns
+    -------
+    assignments : numpy.ndarray
+        The best assignment found by each chain, best first, of shape
+        (chains, nodes).
+    scores : numpy.ndarray
+        The score of each of `assignments`.
+
+    """
+    seeds = np.random.SeedSequence(seed)
+    if executor is None:
+        best, scores = _anneal(assigner, chains, steps, temperature, seeds)
+    else:
+        if tasks is None:
+            tasks = os.cpu_count() or 1
+        tasks = max(1, min(tasks, chains))
+        sizes = np.full(tasks, chains // tasks)
+        sizes[:chains % tasks] += 1
+        futures = [executor.submit(_anneal, assigner, int(size), steps, temperature, child)
+                   for size, child in zip(sizes.tolist(), seeds.spawn(tasks))]
+        results = [future.result() for future in futures]
+        best = np.concatenate([result[0] for result in results])
+        scores = np.concatenate([result[1] for result in results])
+    order = np.argsort(-scores, kind='stable')
+    return best[order], scores[order]
@@ -0,0 +1,412 @@
+"""
+Compiled UCF cache.
+
+A UCF is compiled to a single binary file named after the SHA-1 digest of
+the source JSON, so an edited UCF never hits a stale cache. The file holds
+a string table, the part and gate records as fixed-width NumPy records,
+the response function parameters as numeric arrays and the raw JSON of
+every collection entry. It is opened through `mmap`, so restoring a UCF
+costs little more than creating its `Part` and `Gate` objects, and the
+raw entries are only decoded when requested through `UCF.collection`.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+import pycello.ucf
+from pycello.ucf import Gate, InputSensor, OutputReporter, Part, Ribozyme, Terminator
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+MAGIC = b'PYCELLO\x00'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sI20sI')
+_SECTION = struct.Struct('<16sQQ')
+
+PART = np.dtype([
+    ('name', '<i4'),
+    ('type', '<i4'),
+    ('sequence', '<i4'),
+    ('kind', 'u1'),
+    ('value', '<f8'),
+])
+
+GATE = np.dtype([
+    ('name', '<i4'),
+    ('kind', 'u1'),
+    ('flags', 'u1'),
+    ('promoter', '<i4'),
+    ('group', '<i4'),
+    ('color', '<i4'),
+    ('equation', '<i4'),
+    ('parts', '<i4', (2,)),
+    ('parameters', '<i4', (2,)),
+    ('variables', '<i4', (2,)),
+    ('hi', '<f8'),
+    ('lo', '<f8'),
+])
+
+ENTRY = np.dtype([
+    ('collection', '<i4'),
+    ('start', '<i8'),
+    ('end', '<i8'),
+])
+
+_PART_KINDS = (Part, Terminator, Ribozyme)
+_GATE_KINDS = (Gate, InputSensor, OutputReporter)
+
+# gate record flags
+_LIST_PARAMETERS = 1
+
+# gate promoter sentinels
+_NO_PROMOTER = -1
+_MISSING_PROMOTER = -2
+
+_SECTIONS = {
+    'strings.offsets': np.dtype('<i8'),
+    'strings.data': np.dtype('u1'),
+    'parts': PART,
+    'gates': GATE,
+    'gates.parts': np.dtype('<i4'),
+    'params.names': np.dtype('<i4'),
+    'params.values': np.dtype('<f8'),
+    'variables': np.dtype('<i4'),
+    'entries': ENTRY,
+    'blob': np.dtype('u1'),
+}
+
+
+def default_directory():
+    """Get the cache directory, ``$PYCELLO_CACHE`` or ``~/.cache/pycello``."""
+    return os.environ.get(
+        'PYCELLO_CACHE',
+        os.path.join(os.path.expanduser('~'), '.cache', 'pycello')
+    )
+
+
+def cache_path(buf, directory=True):
+    """Get the cache file for the given UCF contents.
+
+    Parameters
+    ----------
+    buf : bytes
+        The UCF file contents.
+    directory : bool or str
+        The cache directory, or ``True`` for `default_directory`.
+
+    """
+    return _path(hashlib.sha1(buf).digest(), directory)
+
+
+def _path(digest, directory):
+    if directory is True:
+        directory = default_directory()
+    return os.path.join(directory, digest.hex() + '.ucfc')
+
+
+class _Strings:
+
+    def __init__(self):
+        self.index = {}
+
+    def add(self, s):
+        if s is None:
+            return -1
+        if s not in self.index:
+            self.index[s] = len(self.index)
+        return self.index[s]
+
+    def arrays(self):
+        data = [s.encode('utf-8') for s in self.index]
+        offsets = np.zeros(len(data) + 1, dtype='<i8')
+        np.cumsum([len(d) for d in data], out=offsets[1:])
+        return offsets, np.frombuffer(b''.join(data), dtype='u1')
+
+
+def _optional(obj, attr):
+    try:
+        return getattr(obj, attr)
+    except AttributeError:
+        return None
+
+
+def compile_ucf(ucf, buf, located, digest=None):
+    """Compile a UCF to the cache format.
+
+    Parameters
+    ----------
+    ucf : pycello.ucf.UCF
+        The UCF, loaded with the built-in handlers.
+    buf : bytes
+        The UCF file contents.
+    located : list
+        The ``(collection, start, end)`` entries of `buf`, from
+        `pycello.ucf.scan`.
+    digest : bytes, optional
+        The SHA-1 digest of `buf`, if already known.
+
+    Returns
+    -------
+    bytes
+
+    """
+    strings = _Strings()
+    part_index = {}
+    parts = np.zeros(len(ucf.parts), dtype=PART)
+    for i, part in enumerate(ucf.parts):
+        part_index[id(part)] = i
+        kind = [type(part) is k for k in _PART_KINDS].index(True)
+        if kind == 1:
+            value = _optional(part, 'strength')
+        elif kind == 2:
+            value = _optional(part, 'efficiency')
+        else:
+            value = None
+        parts[i] = (strings.add(part.name), strings.add(part.type),
+                    strings.add(part.sequence), kind,
+                    np.nan if value is None else value)
+
+    gates = np.zeros(len(ucf.gates), dtype=GATE)
+    gate_parts = []
+    param_names = []
+    param_values = []
+    variables = []
+    for i, gate in enumerate(ucf.gates):
+        record = gates[i]
+        record['name'] = strings.add(gate.name)
+        record['kind'] = [type(gate) is k for k in _GATE_KINDS].index(True)
+        if gate.promoter == "":
+            record['promoter'] = _NO_PROMOTER
+        elif gate.promoter is None:
+            record['promoter'] = _MISSING_PROMOTER
+        else:
+            record['promoter'] = part_index[id(gate.promoter)]
+        record['group'] = strings.add(gate.group)
+        record['color'] = strings.add(gate.color)
+        record['equation'] = strings.add(gate.equation)
+
+        record['parts'] = (len(gate_parts), len(gate_parts) + len(gate.parts))
+        gate_parts += [-1 if part is None else part_index[id(part)] for part in gate.parts]
+
+        parameters = gate.parameters
+        if isinstance(parameters, list):
+            record['flags'] |= _LIST_PARAMETERS
+            parameters = {param['name']: param['value'] for param in parameters}
+        record['parameters'] = (len(param_names), len(param_names) + len(parameters))
+        param_names += [strings.add(name) for name in parameters.keys()]
+        param_values += list(parameters.values())
+
+        record['variables'] = (len(variables), len(variables) + len(gate.variables))
+        variables += [strings.add(var) for var in gate.variables]
+
+        hi, lo = _optional(gate, 'hi'), _optional(gate, 'lo')
+        record['hi'] = np.nan if hi is None else hi
+        record['lo'] = np.nan if lo is None else lo
+
+    entries = np.zeros(len(located), dtype=ENTRY)
+    chunks = []
+    offset = 0
+    for i, (name, start, end) in enumerate(located):
+        entries[i] = (strings.add(name), offset, offset + end - start)
+        chunks.append(buf[start:end])
+        offset += end - start
+
+    string_offsets, string_data = strings.arrays()
+    arrays = {
+        'strings.offsets': string_offsets,
+        'strings.data': string_data,
+        'parts': parts,
+        'gates': gates,
+        'gates.parts': np.array(gate_parts, dtype='<i4'),
+        'params.names': np.array(param_names, dtype='<i4'),
+        'params.values': np.array(param_values, dtype='<f8'),
+        'variables': np.array(variables, dtype='<i4'),
+        'entries': entries,
+        'blob': np.frombuffer(b''.join(chunks), dtype='u1'),
+    }
+
+    table = []
+    body = []
+    offset = _HEADER.size + _SECTION.size * len(arrays)
+    for name, array in arrays.items():
+        data = np.ascontiguousarray(array, dtype=_SECTIONS[name]).tobytes()
+        padding = -offset % 8
+        body.append(b'\x00' * padding + data)
+        offset += padding
+        table.append(_SECTION.pack(name.encode(), offset, len(data)))
+        offset += len(data)
+
+    if digest is None:
+        digest = hashlib.sha1(buf).digest()
+    header = _HEADER.pack(MAGIC, VERSION, digest, len(arrays))
+    return header + b''.join(table) + b''.join(body)
+
+
+def write(ucf, buf, located, directory=True):
+    """Write the compiled cache for a UCF.
+
+    The cache file is replaced atomically. Failure to write it, e.g. to a
+    read-only directory, is not an error.
+
+    Parameters
+    ----------
+    ucf : pycello.ucf.UCF
+    buf : bytes
+        The UCF file contents.
+    located : list
+        The ``(collection, start, end)`` entries of `buf`.
+    directory : bool or str
+        The cache directory, or ``True`` for `default_directory`.
+
+    """
+    if not _builtin_handlers():
+        return
+    digest = hashlib.sha1(buf).digest()
+    path = _path(digest, directory)
+    data = compile_ucf(ucf, buf, located, digest)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _builtin_handlers():
+    return all(pycello.ucf.HANDLERS.get(name) is handler
+               for name, handler in pycello.ucf._BUILTIN_HANDLERS.items())
+
+
+def _sections(buf, digest):
+    if len(buf) < _HEADER.size:
+        return None
+    magic, version, stored, count = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION or stored != digest:
+        return None
+    sections = {}
+    for i in range(count):
+        name, offset, size = _SECTION.unpack_from(buf, _HEADER.size + i * _SECTION.size)
+        name = name.rstrip(b'\x00').decode()
+        dtype = _SECTIONS[name]
+        sections[name] = np.frombuffer(buf, dtype=dtype, count=size // dtype.itemsize, offset=offset)
+    return sections
+
+
+def read(buf, directory=True, collections=None):
+    """Open a UCF from its compiled cache.
+
+    Parameters
+    ----------
+    buf : bytes
+        The UCF file contents, used to find and validate the cache.
+    directory : bool or str
+        The cache directory, or ``True`` for `default_directory`.
+    collections : iterable of str, optional
+        As for `pycello.ucf.UCF.from_path`.
+
+    Returns
+    -------
+    pycello.ucf.UCF or None
+        ``None`` if there is no valid cache for `buf`.
+
+    """
+    digest = hashlib.sha1(buf).digest()
+    try:
+        with open(_path(digest, directory), 'rb') as fp:
+            cached = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    # a truncated or corrupt cache is treated as missing
+    try:
+        sections = _sections(cached, digest)
+        if sections is None:
+            return None
+
+        offsets = sections['strings.offsets'].tolist()
+        data = sections['strings.data']
+        strings = [bytes(data[offsets[i]:offsets[i + 1]]).decode('utf-8')
+                   for i in range(len(offsets) - 1)]
+        blob = sections['blob']
+        pending = {}
+        for name, start, end in sections['entries'].tolist():
+            pending.setdefault(strings[name], []).append((start, end))
+        restored = _restore(sections, strings) if collections is None and _builtin_handlers() else None
+    except (ValueError, KeyError, IndexError, struct.error):
+        return None
+
+    def read_blob(ranges):
+        for start, end in ranges:
+            yield bytes(blob[start:end])
+
+    ucf = pycello.ucf.UCF([])
+    decode = set(pycello.ucf.HANDLERS.keys() if collections is None else collections)
+    if restored is not None:
+        ucf.parts, ucf.gates = restored
+        decode -= set(pycello.ucf._BUILTIN_HANDLERS.keys())
+    entries = [json.loads(text) for name in decode if name in pending
+               for text in read_blob(pending.pop(name))]
+    ucf._defer(read_blob, pending)
+    ucf.load(entries)
+    return ucf
+
+
+def _restore(sections, strings):
+    def string(i):
+        return None if i < 0 else strings[i]
+
+    parts = []
+    for name, type, sequence, kind, value in sections['parts'].tolist():
+        part = _PART_KINDS[kind]()
+        part.name = strings[name]
+        part.type = strings[type]
+        part.sequence = strings[sequence]
+        if not np.isnan(value):
+            if kind == 1:
+                part.strength = value
+            elif kind == 2:
+                part.efficiency = value
+        parts.append(part)
+
+    gate_parts = sections['gates.parts'].tolist()
+    param_names = sections['params.names'].tolist()
+    param_values = sections['params.values'].tolist()
+    variables = sections['variables'].tolist()
+    gates = []
+    for record in sections['gates'].tolist():
+        name, kind, flags, promoter, group, color, equation, \
+            part_range, param_range, var_range, hi, lo = record
+        gate = _GATE_KINDS[kind]()
+        gate.name = strings[name]
+        if promoter == _MISSING_PROMOTER:
+            gate.promoter = None
+        elif promoter != _NO_PROMOTER:
+            gate.promoter = parts[promoter]
+        gate.group = string(group)
+        gate.color = string(color)
+        gate.equation = string(equation)
+        gate.parts = [None if i < 0 else parts[i] for i in gate_parts[slice(*part_range)]]
+        names = [strings[i] for i in param_names[slice(*param_range)]]
+        values = param_values[slice(*param_range)]
+        if flags & _LIST_PARAMETERS:
+            gate.parameters = [{'name': n, 'value': v} for n, v in zip(names, values)]
+        else:
+            gate.parameters = dict(zip(names, values))
+        gate.variables = [strings[i] for i in variables[slice(*var_range)]]
+        if not np.isnan(hi):
+            gate.hi = hi
+        if not np.isnan(lo):
+            gate.lo = lo
+        gates.append(gate)
+
+    return parts, gates
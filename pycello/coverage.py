@@ -0,0 +1,420 @@
+"""
+Predicted RNA-seq coverage along the sequence of each placement group.
+
+The coverage follows the same steps as the plotted profiles: the flux
+entering a promoter is carried to its end, a terminator drops the flux
+halfway through, and a ribozyme cuts at position 7. Every other part
+carries its own flux. The coverage is assembled from these steps with
+NumPy, at base resolution or in bins, and written as bedGraph or WIG tracks
+with a chromosome for each group. Measured coverage on the same coordinates
+can be scored against the prediction with `score`.
+"""
+
+import numpy as np
+
+import pycello.rnaseq
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+# position of the cut in a ribozyme
+RIBOZYME_CUT = 7
+
+
+class _Layout:
+    """The position of each part and component along a placement group."""
+
+    def __init__(self, group):
+        self.parts = []
+        self.types = []
+        self.components = []
+        lengths = []
+        cuts = []
+        for component in group.components:
+            self.components.append((component, len(self.parts)))
+            for part_instance in component.parts:
+                length = len(part_instance.part.sequence)
+                kind = part_instance.part.type
+                if kind == 'promoter':
+                    cut = length
+                elif kind == 'terminator':
+                    cut = int(0.5*length)
+                elif kind == 'ribozyme':
+                    cut = min(RIBOZYME_CUT, length)
+                else:
+                    cut = 0
+                self.parts.append(part_instance)
+                self.types.append(kind)
+                lengths.append(length)
+                cuts.append(cut)
+        self.lengths = np.array(lengths, dtype=np.int64)
+        self.cuts = np.array(cuts, dtype=np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(self.lengths)[:-1]]).astype(np.int64)
+        self.size = int(self.lengths.sum())
+
+
+def segments(group, flux, parts):
+    """Get the steps of the coverage of a placement group.
+
+    Parameters
+    ----------
+    group : pycello.netlist.PlacementGroup
+    flux : numpy.ndarray
+        The flux of each part in each state, of shape (states, parts), as
+        returned by `pycello.rnaseq.simulate`.
+    parts : list
+        The `pycello.netlist.PartInstance` of each column of `flux`.
+
+    Returns
+    -------
+    starts, ends : numpy.ndarray
+        The 0-based, half-open range of each step.
+    values : numpy.ndarray
+        The coverage of each step in each state, of shape (states, steps).
+
+    """
+    column = {part_instance: i for i, part_instance in enumerate(parts)}
+    layout = _Layout(group)
+    offsets, lengths, cuts = layout.offsets, layout.lengths, layout.cuts
+    outgoing = np.array([column[part_instance] for part_instance in layout.parts], dtype=np.intp)
+    # the last column of the padded flux is the basal transcription
+    incoming = np.concatenate([[-1], outgoing[:-1]]).astype(np.intp)
+    # two steps per part, before and after the cut
+    starts = np.column_stack([offsets, offsets + cuts]).ravel()
+    ends = np.column_stack([offsets + cuts, offsets + lengths]).ravel()
+    index = np.column_stack([incoming, outgoing]).ravel()
+
+    padded = np.column_stack([flux, np.full(len(flux), pycello.rnaseq.BASAL_TRANSCRIPTION)])
+    keep = ends > starts
+    return starts[keep], ends[keep], padded[:, index[keep]]
+
+
+def coverage(group, flux, parts, binsize=1):
+    """Get the coverage of a placement group at each base, or in bins.
+
+    Parameters
+    ----------
+    group : pycello.netlist.PlacementGroup
+    flux : numpy.ndarray
+        The flux of each part in each state, see `segments`.
+    parts : list
+        The `pycello.netlist.PartInstance` of each column of `flux`.
+    binsize : int, optional
+        The number of bases averaged in each bin. The last bin may be
+        shorter.
+
+    Returns
+    -------
+    numpy.ndarray
+        The coverage in each state, of shape (states, bins).
+
+    """
+    starts, ends, values = segments(group, flux, parts)
+    bases = np.repeat(values, ends - starts, axis=1)
+    if binsize == 1:
+        return bases
+    edges = np.arange(0, bases.shape[1], binsize)
+    widths = np.diff(np.append(edges, bases.shape[1]))
+    return np.add.reduceat(bases, edges, axis=1) / widths
+
+
+def write_bedgraph(file, placement, flux, parts, state, binsize=None, name=None):
+    """Write the coverage of a placement in one state as a bedGraph track.
+
+    Each group of the placement is written as a chromosome named after it.
+
+    Parameters
+    ----------
+    file : file-like object
+        Text file to write to.
+    placement : pycello.netlist.Placement
+    flux : numpy.ndarray
+        The flux of each part in each state, see `segments`.
+    parts : list
+        The `pycello.netlist.PartInstance` of each column of `flux`.
+    state : int
+        The row of `flux` to write.
+    binsize : int, optional
+        Write the mean coverage of fixed-size bins. By default, each step
+        of the coverage is written as a single record.
+    name : str, optional
+        The name of the track.
+
+    """
+    if name is not None:
+        file.write('track type=bedGraph name="{}"\n'.format(name))
+    for group in placement.groups:
+        if binsize is None:
+            starts, ends, values = segments(group, flux[state:state+1], parts)
+            values = values[0]
+            # merge steps of equal coverage
+            first = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+            starts = starts[first]
+            ends = np.append(starts[1:], ends[-1]) if len(ends) else ends
+            values = values[first]
+        else:
+            values = coverage(group, flux[state:state+1], parts, binsize)[0]
+            starts = np.arange(len(values), dtype=np.int64) * binsize
+            ends = np.minimum(starts + binsize, len(group.sequence))
+        records = np.rec.fromarrays([np.full(len(starts), group.name), starts, ends, values])
+        np.savetxt(file, records, fmt=['%s', '%d', '%d', '%.6g'], delimiter='\t')
+
+
+def write_wig(file, placement, flux, parts, state, binsize=1, name=None):
+    """Write the coverage of a placement in one state as a fixedStep WIG track.
+
+    Parameters
+    ----------
+    file : file-like object
+        Text file to write to.
+    placement : pycello.netlist.Placement
+    flux : numpy.ndarray
+        The flux of each part in each state, see `segments`.
+    parts : list
+        The `pycello.netlist.PartInstance` of each column of `flux`.
+    state : int
+        The row of `flux` to write.
+    binsize : int, optional
+        The step and span of the track.
+    name : str, optional
+        The name of the track.
+
+    """
+    if name is not None:
+        file.write('track type=wiggle_0 name="{}"\n'.format(name))
+    for group in placement.groups:
+        values = coverage(group, flux[state:state+1], parts, binsize)[0]
+        file.write('fixedStep chrom={} start=1 step={} span={}\n'.format(group.name, binsize, binsize))
+        np.savetxt(file, values, fmt='%.6g')
+
+
+def export(netlist, activity, prefix, format='bedgraph', binsize=None, method='auto'):
+    """Simulate a netlist and write the coverage of every placement and state.
+
+    A track is written to ``'{prefix}{placement:02d}_{state:02d}.bedGraph'``
+    (or ``.wig``) for each placement and state, with a chromosome for each
+    placement group.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    activity : numpy.ndarray or dict
+        The activity of each primary input node in each state, see
+        `pycello.rnaseq.Program.run`.
+    prefix : str
+        The path prefix of the files.
+    format : {'bedgraph', 'wig'}, optional
+    binsize : int, optional
+        See `write_bedgraph` and `write_wig`; WIG tracks default to base
+        resolution.
+    method : {'auto', 'forward', 'anderson'}, optional
+        See `pycello.rnaseq.simulate`.
+
+    Returns
+    -------
+    list
+        The paths written.
+
+    """
+    if format == 'bedgraph':
+        write, extension = write_bedgraph, 'bedGraph'
+    elif format == 'wig':
+        write, extension = write_wig, 'wig'
+        binsize = binsize or 1
+    else:
+        raise ValueError("Unknown format: {}".format(format))
+
+    paths = []
+    for i, placement in enumerate(netlist.placements):
+        flux, parts = pycello.rnaseq.simulate(netlist, placement, activity, method)
+        for state in range(len(flux)):
+            path = '{}{:02d}_{:02d}.{}'.format(prefix, i, state, extension)
+            with open(path, 'w') as file:
+                write(file, placement, flux, parts, state, binsize,
+                      name='{} placement {} state {}'.format(netlist.name, i, state))
+            paths.append(path)
+    return paths
+
+
+def read_bedgraph(file, placement):
+    """Read measured coverage of the groups of a placement from a bedGraph.
+
+    Parameters
+    ----------
+    file : file-like object
+        Text file of ``chrom start end value`` records, with a chromosome
+        named after each placement group. Bases without a record have no
+        coverage.
+    placement : pycello.netlist.Placement
+
+    Returns
+    -------
+    dict
+        The coverage at each base of each group, by group name.
+
+    """
+    records = {}
+    for line in file:
+        if not line.strip() or line.startswith(('track', 'browser', '#')):
+            continue
+        chrom, start, end, value = line.split()[:4]
+        records.setdefault(chrom, []).append((int(start), int(end), float(value)))
+
+    result = {}
+    for group in placement.groups:
+        size = len(group.sequence)
+        steps = np.zeros(size + 1)
+        if group.name in records:
+            starts, ends, values = (np.array(column) for column in zip(*records[group.name]))
+            starts = np.clip(starts, 0, size).astype(np.intp)
+            ends = np.clip(ends, 0, size).astype(np.intp)
+            np.add.at(steps, starts, values)
+            np.add.at(steps, ends, -values)
+        result[group.name] = np.cumsum(steps[:-1])
+    return result
+
+
+class Fit:
+    """Agreement of measured with predicted coverage of a placement.
+
+    Measured coverage may have any number of leading sample dimensions,
+    written ``...`` below, before the state dimension.
+
+    Attributes
+    ----------
+    parts : list
+        The `pycello.netlist.PartInstance` of each part, group by group.
+    part_error : numpy.ndarray
+        The mean log2 ratio of measured to predicted coverage over each
+        part, of shape (..., states, parts).
+    components : list
+        The `pycello.netlist.Component` of each transcriptional unit.
+    component_error : numpy.ndarray
+        The root mean square log2 ratio over each transcriptional unit, of
+        shape (..., states, components).
+    terminators : list
+        The `pycello.netlist.PartInstance` of each terminator.
+    terminator_strength : numpy.ndarray
+        The ratio of the coverage before each terminator to that after it,
+        of shape (..., states, terminators), or nan for a terminator at the
+        end of a group.
+    predicted_strength : numpy.ndarray
+        The same estimate from the predicted coverage, of shape
+        (states, terminators).
+    promoters : list
+        The `pycello.netlist.PartInstance` of each promoter.
+    promoter_activity : numpy.ndarray
+        The increase of the coverage across each promoter, of shape
+        (..., states, promoters).
+    predicted_activity : numpy.ndarray
+        The same estimate from the predicted coverage, of shape
+        (states, promoters).
+
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.components = []
+        self.terminators = []
+        self.promoters = []
+
+
+def _window_means(cumulative, starts, ends):
+    """Mean of coverage over ``[starts, ends)``, from its cumulative sum."""
+    width = ends - starts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (cumulative[..., ends] - cumulative[..., starts]) / width
+
+
+def score(placement, flux, parts, measured, window=20, pseudocount=1e-6):
+    """Score measured RNA-seq coverage against the predicted profile.
+
+    Every metric is computed at once for all samples and states. Terminator
+    strengths and promoter activities are estimated in the same way from
+    measured and predicted coverage, so the two can be compared directly.
+
+    Parameters
+    ----------
+    placement : pycello.netlist.Placement
+    flux : numpy.ndarray
+        The flux of each part in each state, see `segments`.
+    parts : list
+        The `pycello.netlist.PartInstance` of each column of `flux`.
+    measured : dict
+        The measured coverage of each group by group name, as arrays of
+        shape (..., states, bases) aligned to `PlacementGroup.sequence`, in
+        the units of the prediction.
+    window : int, optional
+        The number of bases either side of a terminator or promoter over
+        which coverage is averaged to estimate its strength or activity.
+    pseudocount : float, optional
+        Added to coverage before taking ratios.
+
+    Returns
+    -------
+    Fit
+
+    """
+    fit = Fit()
+    part_error = []
+    component_error = []
+    terminator_strength = []
+    predicted_strength = []
+    promoter_activity = []
+    predicted_activity = []
+
+    for group in placement.groups:
+        layout = _Layout(group)
+        observed = np.asarray(measured[group.name], dtype=np.float64)
+        if observed.shape[-1] != layout.size:
+            raise ValueError("Coverage of group {} has {} bases, expected {}.".format(
+                group.name, observed.shape[-1], layout.size))
+        predicted = coverage(group, flux, parts)
+        ratio = np.log2((observed + pseudocount) / (predicted + pseudocount))
+
+        ends = layout.offsets + layout.lengths
+        cumulative = np.concatenate([np.zeros(ratio.shape[:-1] + (1,)), np.cumsum(ratio, axis=-1)], axis=-1)
+        part_error.append(_window_means(cumulative, layout.offsets, ends))
+
+        first = np.array([index for _, index in layout.components], dtype=np.intp)
+        last = np.append(first[1:], len(layout.parts)) - 1
+        squares = np.concatenate([np.zeros(ratio.shape[:-1] + (1,)), np.cumsum(ratio**2, axis=-1)], axis=-1)
+        component_error.append(np.sqrt(_window_means(squares, layout.offsets[first], ends[last])))
+
+        before = lambda i: (np.maximum(layout.offsets[i] - window, 0), layout.offsets[i])
+        after = lambda i: (ends[i], np.minimum(ends[i] + window, layout.size))
+        sums = [np.concatenate([np.zeros(c.shape[:-1] + (1,)), np.cumsum(c, axis=-1)], axis=-1)
+                for c in (observed, predicted)]
+
+        terminators = np.array([i for i, kind in enumerate(layout.types) if kind == 'terminator'], dtype=np.intp)
+        strengths = []
+        for cumulative in sums:
+            upstream = _window_means(cumulative, *before(terminators))
+            downstream = _window_means(cumulative, *after(terminators))
+            strengths.append((upstream + pseudocount) / (downstream + pseudocount))
+        terminator_strength.append(strengths[0])
+        predicted_strength.append(strengths[1])
+
+        promoters = np.array([i for i, kind in enumerate(layout.types) if kind == 'promoter'], dtype=np.intp)
+        activities = []
+        for cumulative in sums:
+            start, end = before(promoters)
+            # nothing is transcribed ahead of the first part of a group
+            upstream = np.where(end > start, np.nan_to_num(_window_means(cumulative, start, end)), 0.0)
+            activities.append(_window_means(cumulative, *after(promoters)) - upstream)
+        promoter_activity.append(activities[0])
+        predicted_activity.append(activities[1])
+
+        fit.parts.extend(layout.parts)
+        fit.components.extend(component for component, _ in layout.components)
+        fit.terminators.extend(layout.parts[i] for i in terminators)
+        fit.promoters.extend(layout.parts[i] for i in promoters)
+
+    fit.part_error = np.concatenate(part_error, axis=-1)
+    fit.component_error = np.concatenate(component_error, axis=-1)
+    fit.terminator_strength = np.concatenate(terminator_strength, axis=-1)
+    fit.predicted_strength = np.concatenate(predicted_strength, axis=-1)
+    fit.promoter_activity = np.concatenate(promoter_activity, axis=-1)
+    fit.predicted_activity = np.concatenate(predicted_activity, axis=-1)
+    return fit
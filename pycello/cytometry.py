@@ -0,0 +1,338 @@
+"""
+Propagation of cytometry distributions through a netlist.
+
+The ``gate_cytometry`` collection of a UCF holds the measured distribution
+of the output of each gate, over a log-spaced grid of bins, at a number of
+input levels. The output distribution at any other input is interpolated
+between the two nearest levels. Distributions are carried on one grid for
+the whole netlist: a gate maps the distribution of its input to that of its
+output by a transfer matrix, and the inputs of a gate are added by
+resampling their joint distribution onto the grid, assuming they are
+independent. Every state of the truth table is propagated at once.
+"""
+
+import numpy as np
+
+import pycello.logic
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+# node types evaluated through the cytometry of their gate
+GATE_TYPES = ('NOT', 'NOR')
+
+# node types whose distribution is that of the sum of their inputs
+SUM_TYPES = ('PRIMARY_OUTPUT', 'OUTPUT', 'OUTPUT_OR', 'OR', 'BUF')
+
+
+class Cytometry:
+    """The measured output distributions of a gate.
+
+    Attributes
+    ----------
+    gate : str
+        The gate name.
+    inputs : numpy.ndarray
+        The input levels, in increasing order.
+    bins : numpy.ndarray
+        The output value of each bin, log-spaced.
+    counts : numpy.ndarray
+        The fraction of cells in each bin at each input level, of shape
+        (levels, bins), with rows summing to 1.
+
+    """
+
+    def __init__(self, gate, inputs, bins, counts):
+        order = np.argsort(inputs)
+        self.gate = gate
+        self.inputs = np.asarray(inputs, dtype=np.float64)[order]
+        self.bins = np.asarray(bins, dtype=np.float64)
+        counts = np.asarray(counts, dtype=np.float64)[order]
+        self.counts = counts / np.maximum(counts.sum(axis=1, keepdims=True), np.finfo(float).tiny)
+
+    def histogram(self, x):
+        """Interpolate the output distribution at given inputs.
+
+        The distributions at the two input levels around each input are
+        mixed in proportion to the distance in log input. Inputs outside the
+        measured range take the distribution of the nearest level.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Input values.
+
+        Returns
+        -------
+        numpy.ndarray
+            The distribution at each input, of shape ``x.shape + (bins,)``.
+
+        """
+        levels = np.log(self.inputs)
+        position = np.interp(np.log(np.maximum(x, np.finfo(float).tiny)), levels, np.arange(len(levels)))
+        lower = np.floor(position).astype(np.intp)
+        upper = np.minimum(lower + 1, len(levels) - 1)
+        weight = (position - lower)[..., None]
+        return (1.0 - weight) * self.counts[lower] + weight * self.counts[upper]
+
+    def calibrate(self, response):
+        """Shift the distributions to the scale of a response function.
+
+        Each distribution is moved along the log-spaced bins, keeping its
+        shape, so that its geometric mean is nearest to the response at its
+        input level. Cells shifted beyond the grid are kept in its end bins.
+
+        Parameters
+        ----------
+        response : callable
+            The response function of the gate, e.g. `pycello.ucf.Gate.response`.
+
+        Returns
+        -------
+        Cytometry
+
+        """
+        log = np.log(self.bins)
+        step = (log[-1] - log[0]) / (len(log) - 1)
+        target = np.log(np.asarray(response(self.inputs), dtype=np.float64))
+        shifts = np.rint((target - self.counts @ log) / step).astype(np.intp)
+        counts = np.zeros_like(self.counts)
+        n = len(self.bins)
+        for i, shift in enumerate(shifts.tolist()):
+            index = np.clip(np.arange(n) + shift, 0, n - 1)
+            np.add.at(counts[i], index, self.counts[i])
+        return Cytometry(self.gate, self.inputs, self.bins, counts)
+
+
+def load(ucf, gates=None):
+    """Load the cytometry of gates of a UCF.
+
+    The entries are read through `pycello.ucf.UCF.cytometry`, so only those
+    of the given gates are decoded, and their bins are shared.
+
+    Parameters
+    ----------
+    ucf : pycello.ucf.UCF
+    gates : iterable of str, optional
+        The gate names. Defaults to every gate with cytometry data.
+
+    Returns
+    -------
+    dict
+        The `Cytometry` of each gate, by gate name.
+
+    """
+    rtn = {}
+    for name in ucf.cytometry_gates() if gates is None else gates:
+        data = ucf.cytometry(name)
+        if data is not None:
+            rtn[name] = Cytometry(name, data.inputs, data.bins, data.counts)
+    return rtn
+
+
+class Grid:
+    """A log-spaced grid of bins shared by the distributions of a netlist.
+
+    Parameters
+    ----------
+    bins : numpy.ndarray
+        The value of each bin, log-spaced and increasing.
+
+    """
+
+    def __init__(self, bins):
+        self.bins = np.asarray(bins, dtype=np.float64)
+        log = np.log(self.bins)
+        # bin edges halfway between bin values, in log space
+        self.edges = np.concatenate([[-np.inf], 0.5 * (log[1:] + log[:-1]), [np.inf]])
+        self.__sums = None
+
+    def __len__(self):
+        return len(self.bins)
+
+    def index(self, x):
+        """Get the bin of each value."""
+        return np.searchsorted(self.edges, np.log(np.maximum(x, np.finfo(float).tiny))) - 1
+
+    def point(self, x):
+        """Get distributions with all their mass in the bin of each value."""
+        x = np.asarray(x, dtype=np.float64)
+        rtn = np.zeros(x.shape + (len(self),))
+        np.put_along_axis(rtn, self.index(x)[..., None], 1.0, axis=-1)
+        return rtn
+
+    def resample(self, bins, counts):
+        """Move distributions over other bins onto this grid.
+
+        Parameters
+        ----------
+        bins : numpy.ndarray
+        counts : numpy.ndarray
+            Distributions over `bins`, of shape (..., len(bins)).
+
+        """
+        if len(bins) == len(self) and np.allclose(bins, self.bins):
+            return counts
+        index = self.index(bins)
+        rtn = np.zeros(counts.shape[:-1] + (len(self),))
+        for j, i in enumerate(index.tolist()):
+            rtn[..., i] += counts[..., j]
+        return rtn
+
+    def add(self, p, q):
+        """Get the distribution of the sum of independent variables.
+
+        Parameters
+        ----------
+        p, q : numpy.ndarray
+            Distributions, of shape (states, bins).
+
+        """
+        if self.__sums is None:
+            # the bin of the sum of the values of each pair of bins
+            self.__sums = self.index(self.bins[:, None] + self.bins[None, :]).ravel()
+        n = len(self)
+        states = len(p)
+        joint = (p[:, :, None] * q[:, None, :]).reshape(states, -1)
+        index = (np.arange(states)[:, None] * n + self.__sums[None, :]).ravel()
+        return np.bincount(index, weights=joint.ravel(), minlength=states * n).reshape(states, n)
+
+    def transfer(self, cytometry):
+        """Get the matrix mapping input to output distributions of a gate.
+
+        Row ``i`` is the output distribution at the value of bin ``i``.
+
+        """
+        return self.resample(cytometry.bins, cytometry.histogram(self.bins))
+
+
+class CytometryResult:
+    """The distribution of the activity of every node in every state.
+
+    Attributes
+    ----------
+    grid : Grid
+        The bins of the distributions.
+    names : list
+        The name of each node, in netlist order.
+    index : dict
+        The row of each node name.
+    distributions : numpy.ndarray
+        The fraction of cells in each bin, of shape (nodes, states, bins).
+    logic : pycello.logic.LogicResult
+        The boolean value of each node in each state.
+
+    """
+
+    def __init__(self, grid, names, distributions, logic):
+        self.grid = grid
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.distributions = distributions
+        self.logic = logic
+
+    def __getitem__(self, name):
+        """Get the distribution of a node in each state, of shape (states, bins)."""
+        return self.distributions[self.index[name]]
+
+    def overlap(self, name):
+        """Get the overlap of the ON and OFF distributions of a node.
+
+        The overlap of two distributions is the fraction of cells they have
+        in common, from 0 for distributions that are fully separated to 1 for
+        identical ones.
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        numpy.ndarray
+            The overlap of each ON state with each OFF state, of shape
+            (ON states, OFF states). Its maximum is the worst case.
+
+        """
+        on = self.logic[name]
+        p = self[name]
+        return np.minimum(p[on][:, None, :], p[~on][None, :, :]).sum(axis=-1)
+
+
+def simulate(netlist, cytometry, inputs=None, calibrate=True):
+    """Propagate cytometry distributions through a netlist.
+
+    The primary inputs are taken to be at the low or high signal of their
+    input sensors in every cell. The states are the rows of the truth table,
+    as for `pycello.logic.simulate`.
+
+    Gates are characterized by cytometry in the units of their reporter,
+    which need not be those of the inputs of downstream gates. By default,
+    the distributions are calibrated to the response function of each gate,
+    see `Cytometry.calibrate`, so that activity is in the units of the
+    response functions throughout.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    cytometry : dict
+        The `Cytometry` of the gate of each NOT and NOR node, as returned by
+        `load`.
+    inputs : list, optional
+        The names of the primary input nodes, most significant first.
+        Defaults to their order in the netlist.
+    calibrate : bool, optional
+        Calibrate the distributions to the response functions of the gates.
+
+    Returns
+    -------
+    CytometryResult
+
+    Raises
+    ------
+    pycello.netlist.FeedbackError
+        If the netlist has feedback loops.
+    ValueError
+        If a gate has no cytometry, or a node has a type that cannot be
+        evaluated.
+
+    """
+    schedule = netlist.schedule(strict=True)
+    if inputs is None:
+        inputs = [node.name for node in netlist.nodes if node.type == 'PRIMARY_INPUT']
+    logic = pycello.logic.simulate(netlist, inputs)
+    states = logic.states
+
+    gates = [node.gate.name for node in schedule.nodes if node.type in GATE_TYPES]
+    missing = [name for name in gates if name not in cytometry]
+    if missing:
+        raise ValueError("No cytometry for gates {}.".format(", ".join(missing)))
+    grid = Grid(cytometry[gates[0]].bins if gates else next(iter(cytometry.values())).bins)
+
+    transfer = {}
+    for node in schedule.nodes:
+        if node.type in GATE_TYPES and node.gate.name not in transfer:
+            gate = cytometry[node.gate.name]
+            if calibrate and node.gate.equation:
+                gate = gate.calibrate(node.gate.response)
+            transfer[node.gate.name] = grid.transfer(gate)
+
+    distributions = np.zeros((len(schedule.nodes), states, len(grid)))
+    for position, node in enumerate(schedule.nodes):
+        fanin = [schedule.index[u] for u in netlist.graph.fanin[node]]
+        if node.type == 'PRIMARY_INPUT':
+            distributions[position] = grid.point(
+                np.where(logic[node.name], node.gate.hi, node.gate.lo)
+            )
+            continue
+        if node.type not in GATE_TYPES + SUM_TYPES:
+            raise ValueError("Cannot evaluate node {} of type {}.".format(node.name, node.type))
+        x = distributions[fanin[0]] if fanin else grid.point(np.zeros(states))
+        for u in fanin[1:]:
+            x = grid.add(x, distributions[u])
+        if node.type in GATE_TYPES:
+            x = x @ transfer[node.gate.name]
+        distributions[position] = x
+
+    order = [schedule.index[node] for node in netlist.nodes]
+    return CytometryResult(grid, [node.name for node in netlist.nodes], distributions[order], logic)
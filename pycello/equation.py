@@ -0,0 +1,342 @@
+import keyword
+import re
+
+import numpy as np
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+FUNCTIONS = {
+    'exp': 'np.exp',
+    'log': 'np.log',
+    'ln': 'np.log',
+    'log10': 'np.log10',
+    'sqrt': 'np.sqrt',
+    'abs': 'np.abs',
+    'pow': 'np.power',
+    'min': 'np.minimum',
+    'max': 'np.maximum',
+}
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<name>[A-Za-z_]\w*)
+      | (?P<op>\*\*|[-+*/^(),])
+    )""", re.VERBOSE)
+
+
+# a float literal emitted by `_literal`, not part of a name
+_LITERAL = re.compile(r"(?<![\w.])\d+(?:\.\d*)?(?:e[-+]?\d+)?")
+
+
+class UnsupportedExpression(ValueError):
+    """Raised when an equation falls outside the built-in grammar."""
+    pass
+
+
+def tokenize(equation: str):
+    """Split an equation into ``(kind, text)`` tokens.
+
+    Parameters
+    ----------
+    equation : str
+
+    """
+    tokens = []
+    pos = 0
+    equation = equation.rstrip()
+    while pos < len(equation):
+        m = _TOKEN.match(equation, pos)
+        if not (m):
+            raise UnsupportedExpression("Unexpected input at %r" % equation[pos:])
+        tokens.append((m.lastgroup, m.group(m.lastgroup)))
+        pos = m.end()
+    return tokens
+
+
+def _literal(value):
+    """Source for a constant, parenthesized when negative."""
+    value = float(value)
+    if np.isnan(value):
+        return "np.nan"
+    if np.isinf(value):
+        return "np.inf" if value > 0 else "(-np.inf)"
+    return "(%r)" % value if np.signbit(value) else repr(value)
+
+
+def _sum(a, b, op='+'):
+    """Source for ``a op b`` where None stands for zero."""
+    if b is None:
+        return a
+    if a is None:
+        return b if op == '+' else "(-%s)" % b
+    return "(%s %s %s)" % (a, op, b)
+
+
+def _product(a, b):
+    """Source for ``a * b`` where None stands for zero."""
+    if a is None or b is None:
+        return None
+    return "(%s * %s)" % (a, b)
+
+
+class _Parser:
+    """Recursive descent parser for UCF response equations.
+
+    The grammar is::
+
+        expr  := term (('+' | '-') term)*
+        term  := unary (('*' | '/') unary)*
+        unary := ('+' | '-') unary | power
+        power := atom (('^' | '**') unary)?
+        atom  := number | name | name '(' expr (',' expr)* ')' | '(' expr ')'
+
+    Each rule returns Python source for the expression, whether it is
+    constant, in which case it is folded to a number, and source for its
+    derivative with respect to the variable `wrt`, or None where the
+    derivative is zero.
+
+    """
+
+    def __init__(self, tokens, parameters, variables, wrt=None):
+        self.tokens = tokens
+        self.pos = 0
+        self.parameters = parameters
+        self.variables = variables
+        self.wrt = wrt
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos][1]
+
+    def take(self, expected=None):
+        if self.pos >= len(self.tokens):
+            raise UnsupportedExpression("Unexpected end of equation")
+        kind, text = self.tokens[self.pos]
+        if expected is not None and text != expected:
+            raise UnsupportedExpression("Expected %r, found %r" % (expected, text))
+        self.pos += 1
+        return kind, text
+
+    def parse(self):
+        code, _, derivative = self.expr()
+        if self.pos != len(self.tokens):
+            raise UnsupportedExpression("Unexpected %r" % self.peek())
+        return code, derivative
+
+    def fold(self, code, const):
+        if const:
+            # evaluate with NumPy semantics, so that division by zero and
+            # overflow give inf or nan rather than raising
+            with np.errstate(all='ignore'):
+                value = eval(_LITERAL.sub(r"np.float64(\g<0>)", code), {'np': np})
+            return _literal(value), True
+        return code, False
+
+    def chain(self, op, a, da, b, db):
+        """Derivative of ``a op b``."""
+        if op in ('+', '-'):
+            return _sum(da, db, op)
+        if op == '*':
+            return _sum(_product(da, b), _product(a, db))
+        if op == '/':
+            return _sum(_product(da, "(1.0 / %s)" % b), _product(db, "(%s / %s ** 2)" % (a, b)), '-')
+        derivative = _product(da, "(%s * %s ** (%s - 1.0))" % (b, a, b))
+        return _sum(derivative, _product(db, "(%s ** %s * np.log(%s))" % (a, b, a)))
+
+    def binary(self, operand, ops):
+        code, const, derivative = operand()
+        while self.peek() in ops:
+            _, op = self.take()
+            rhs, rhs_const, rhs_derivative = operand()
+            derivative = self.chain(op, code, derivative, rhs, rhs_derivative)
+            code, const = self.fold("(%s %s %s)" % (code, op, rhs), const and rhs_const)
+        return code, const, derivative
+
+    def expr(self):
+        return self.binary(self.term, ('+', '-'))
+
+    def term(self):
+        return self.binary(self.unary, ('*', '/'))
+
+    def unary(self):
+        if self.peek() in ('+', '-'):
+            _, op = self.take()
+            code, const, derivative = self.unary()
+            return self.fold("(%s%s)" % (op, code), const) + (_sum(None, derivative, op),)
+        return self.power()
+
+    def power(self):
+        code, const, derivative = self.atom()
+        if self.peek() in ('^', '**'):
+            self.take()
+            rhs, rhs_const, rhs_derivative = self.unary()
+            derivative = self.chain('**', code, derivative, rhs, rhs_derivative)
+            code, const = self.fold("(%s ** %s)" % (code, rhs), const and rhs_const)
+        return code, const, derivative
+
+    def function(self, name, args):
+        """Derivative of the function `name` of `args`."""
+        (a, da), (b, db) = (args + [(None, None)])[:2]
+        if name == 'exp':
+            return _product(da, "np.exp(%s)" % a)
+        if name in ('log', 'ln'):
+            return _product(da, "(1.0 / %s)" % a)
+        if name == 'log10':
+            return _product(da, "(1.0 / (%s * np.log(10.0)))" % a)
+        if name == 'sqrt':
+            return _product(da, "(0.5 / np.sqrt(%s))" % a)
+        if name == 'abs':
+            return _product(da, "np.sign(%s)" % a)
+        if name == 'pow':
+            return self.chain('**', a, da, b, db)
+        if da is None and db is None:
+            return None
+        compare = '<=' if name == 'min' else '>='
+        return "np.where(%s %s %s, %s, %s)" % (a, compare, b, da or '0.0', db or '0.0')
+
+    def atom(self):
+        kind, text = self.take()
+        if kind == 'number':
+            return _literal(text), True, None
+        if text == '(':
+            code = self.expr()
+            self.take(')')
+            return code
+        if kind != 'name':
+            raise UnsupportedExpression("Unexpected %r" % text)
+        if self.peek() == '(':
+            if text not in FUNCTIONS:
+                raise UnsupportedExpression("Unknown function %r" % text)
+            self.take('(')
+            args = [self.expr()]
+            while self.peek() == ',':
+                self.take(',')
+                args.append(self.expr())
+            self.take(')')
+            code = "%s(%s)" % (FUNCTIONS[text], ", ".join(arg for arg, _, _ in args))
+            derivative = self.function(text, [(arg, d) for arg, _, d in args])
+            return self.fold(code, all(const for _, const, _ in args)) + (derivative,)
+        if text in self.variables:
+            return text, False, ('1.0' if text == self.wrt else None)
+        if text in self.parameters:
+            return _literal(self.parameters[text]), True, None
+        raise UnsupportedExpression("Unknown name %r" % text)
+
+
+def _compile_sympy(equation, parameters, variables, wrt=None):
+    import sympy
+
+    # substitute only the parameters that are not variables
+    expr = sympy.sympify(equation).subs({k: v for k, v in parameters.items() if k not in variables})
+    if wrt is not None:
+        expr = sympy.diff(expr, sympy.Symbol(wrt))
+    symbols = [sympy.Symbol(var) for var in variables]
+    return sympy.lambdify(symbols, expr, 'numpy')
+
+
+def _check_variables(variables):
+    # the names become arguments of generated code, next to the numpy module
+    for var in variables:
+        if not isinstance(var, str) or not var.isidentifier() or keyword.iskeyword(var) or var == 'np':
+            raise UnsupportedExpression("Invalid variable name %r" % (var,))
+
+
+def _compile(equation, parameters, variables, wrt=None):
+    _check_variables(variables)
+    try:
+        code, derivative = _Parser(tokenize(equation), parameters, variables, wrt).parse()
+        if wrt is not None:
+            code = derivative or '0.0'
+        fn = eval("lambda %s: %s" % (", ".join(variables), code), {'np': np})
+    except UnsupportedExpression:
+        fn = _compile_sympy(equation, parameters, variables, wrt)
+
+    def response(*args, **kwargs):
+        # Python scalars follow NumPy semantics too, as arrays do
+        args = [np.float64(arg) if isinstance(arg, (int, float)) else arg for arg in args]
+        kwargs = {k: np.float64(v) if isinstance(v, (int, float)) else v for k, v in kwargs.items()}
+        y = fn(*args, **kwargs)
+        return float(y) if np.ndim(y) == 0 else y
+
+    return response
+
+
+def compile_equation(equation: str, parameters: dict, variables: list):
+    """Compile a response function with its parameters bound.
+
+    The equation is translated into a NumPy expression by a built-in parser
+    for the arithmetic used in UCF response functions. Equations outside of
+    that grammar are compiled with sympy, which must then be installed.
+
+    Parameters
+    ----------
+    equation : str
+        The equation, as given in the UCF, e.g.
+        ``'ymin+(ymax-ymin)/(1.0+(x/K)^n)'``.
+    parameters : dict
+        Values of the parameters appearing in `equation`.
+    variables : list
+        Names of the variables, in the order of the positional arguments of
+        the returned function.
+
+    Returns
+    -------
+    callable
+        A function of the variables, given positionally or by name, that
+        accepts floats or NumPy arrays and returns a float or an array.
+
+    Raises
+    ------
+    UnsupportedExpression
+        If a variable name is not a Python identifier, is a keyword, or is
+        ``np``.
+
+    Examples
+    --------
+    >>> f = compile_equation('ymin+(ymax-ymin)/(1.0+(x/K)^n)',
+    ...                      {'ymin': 0.06, 'ymax': 3.8, 'K': 0.07, 'n': 1.6},
+    ...                      ['x'])
+    >>> round(f(0.07), 2)
+    1.93
+
+    """
+    return _compile(equation, parameters, variables)
+
+
+def compile_derivative(equation: str, parameters: dict, variables: list, wrt: str):
+    """Compile the partial derivative of a response function.
+
+    The derivative is taken analytically. To differentiate with respect to a
+    parameter, list it among the `variables` as well, and pass its value
+    along with the other variables.
+
+    Parameters
+    ----------
+    equation : str
+        The equation, as given in the UCF.
+    parameters : dict
+        Values of the parameters appearing in `equation`.
+    variables : list
+        Names of the variables, in the order of the positional arguments of
+        the returned function.
+    wrt : str
+        The variable to differentiate with respect to.
+
+    Returns
+    -------
+    callable
+        A function of the variables, as for `compile_equation`.
+
+    Examples
+    --------
+    >>> df = compile_derivative('ymin+(ymax-ymin)/(1.0+(x/K)^n)',
+    ...                         {'ymin': 0.06, 'K': 0.07, 'n': 1.6},
+    ...                         ['x', 'ymax'], 'ymax')
+    >>> round(df(0.07, 3.8), 2)
+    0.5
+
+    """
+    return _compile(equation, parameters, variables, wrt)
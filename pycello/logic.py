@@ -0,0 +1,233 @@
+"""
+Bit-parallel boolean simulation of netlists.
+
+Every combination of the primary inputs is simulated at once: the value of
+a node in all 2**n states is packed into an array of 64-bit words, with
+state ``k`` at bit ``k % 64`` of word ``k // 64``, and each gate is a single
+bitwise operation over the words. As in Cello logic circuit files, the
+first input is the most significant bit of the state number.
+"""
+
+import re
+
+import numpy as np
+
+import pycello.table
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+WORD = 64
+
+# node types whose output is the complement of the OR of their inputs
+INVERTING_TYPES = ('NOT', 'NOR')
+
+# node types whose output is the OR of their inputs
+OR_TYPES = ('PRIMARY_OUTPUT', 'OUTPUT', 'OUTPUT_OR', 'OR', 'BUF')
+
+_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+_CIRCUIT_LINE = re.compile(r"^(OUTPUT_OR|OUTPUT|NOT|NOR|INPUT)\s+([01]+)\s+(\w+)\s+(\d+)")
+
+
+class LogicResult:
+    """The packed boolean value of every node in every state.
+
+    Attributes
+    ----------
+    names : list
+        The name of each node, in netlist order.
+    index : dict
+        The row of each node name.
+    words : numpy.ndarray
+        The packed values, of shape (nodes, words), of dtype uint64.
+    states : int
+        The number of states.
+
+    """
+
+    def __init__(self, names, words, states):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.words = words
+        self.states = states
+
+    def __getitem__(self, name):
+        """Get the value of a node in each state, as a boolean array."""
+        return _unpack(self.words[self.index[name]], self.states)
+
+    def table(self):
+        """Get the values of every node as a `pycello.table.Table` of booleans."""
+        return pycello.table.Table(self.names, _unpack(self.words, self.states))
+
+
+def _unpack(words, states):
+    bits = np.unpackbits(np.ascontiguousarray(words).view(np.uint8), axis=-1, bitorder='little')
+    return bits[..., :states].astype(np.bool_)
+
+
+def input_words(inputs):
+    """Get the packed values of each input over every combination of inputs.
+
+    Parameters
+    ----------
+    inputs : int
+
+    Returns
+    -------
+    numpy.ndarray
+        Of shape (inputs, words), of dtype uint64.
+
+    """
+    words = max(1, -(-2**inputs // WORD))
+    index = np.arange(words, dtype=np.uint64)
+    bits = np.arange(WORD, dtype=np.uint64)
+    rtn = np.empty((inputs, words), dtype=np.uint64)
+    for i in range(inputs):
+        shift = inputs - 1 - i
+        if shift >= 6:
+            # whole words alternate between all zeros and all ones
+            rtn[i] = ((index >> np.uint64(shift - 6)) & np.uint64(1)) * _ONES
+        else:
+            pattern = ((bits >> np.uint64(shift)) & np.uint64(1)) << bits
+            rtn[i] = np.bitwise_or.reduce(pattern)
+    return rtn
+
+
+def simulate(netlist, inputs=None):
+    """Simulate the boolean function of a netlist over every input combination.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    inputs : list, optional
+        The names of the primary input nodes, most significant first.
+        Defaults to their order in the netlist.
+
+    Returns
+    -------
+    LogicResult
+
+    Raises
+    ------
+    pycello.netlist.FeedbackError
+        If the netlist has feedback loops.
+    ValueError
+        If a node has a type that cannot be evaluated.
+
+    """
+    schedule = netlist.schedule(strict=True)
+    if inputs is None:
+        inputs = [node.name for node in netlist.nodes if node.type == 'PRIMARY_INPUT']
+    states = 2**len(inputs)
+    # the last row stays zero, for the padding of the input positions
+    words = np.zeros((len(schedule.nodes) + 1, max(1, -(-states // WORD))), dtype=np.uint64)
+    driven = set()
+    for name, row in zip(inputs, input_words(len(inputs))):
+        node = netlist.node(name)
+        if node is None or node.type != 'PRIMARY_INPUT':
+            raise ValueError("{} is not a primary input.".format(name))
+        words[schedule.index[node]] = row
+        driven.add(node)
+
+    for level, level_inputs in zip(schedule.levels, schedule.inputs):
+        # a level whose nodes have no fan-in has an input of zero
+        if level_inputs.shape[1]:
+            x = np.bitwise_or.reduce(words[level_inputs], axis=1)
+        else:
+            x = np.zeros((len(level), words.shape[1]), dtype=np.uint64)
+        for i, position in enumerate(level.tolist()):
+            node = schedule.nodes[position]
+            if node.type == 'PRIMARY_INPUT':
+                if node not in driven:
+                    raise ValueError("No value given for input {}.".format(node.name))
+            elif node.type in INVERTING_TYPES:
+                words[position] = ~x[i]
+            elif node.type in OR_TYPES:
+                words[position] = x[i]
+            else:
+                raise ValueError("Cannot evaluate node {} of type {}.".format(node.name, node.type))
+
+    if states < WORD:
+        words &= np.uint64((1 << states) - 1)
+    order = [schedule.index[node] for node in netlist.nodes]
+    return LogicResult([node.name for node in netlist.nodes], words[order], states)
+
+
+def read_logic_circuit(lines):
+    """Read the truth table columns of a Cello logic circuit file.
+
+    Parameters
+    ----------
+    lines : iterable
+        The lines of the file.
+
+    Returns
+    -------
+    inputs : list
+        The names of the input nodes, in the order they are listed, which is
+        most significant first.
+    truth : dict
+        The boolean value of each node in each state, by node name.
+
+    """
+    inputs = []
+    truth = {}
+    for line in lines:
+        m = _CIRCUIT_LINE.match(line)
+        if m:
+            truth[m.group(3)] = np.frombuffer(m.group(2).encode(), dtype=np.uint8) == ord('1')
+            if m.group(1) == 'INPUT':
+                inputs.append(m.group(3))
+    return inputs, truth
+
+
+def verify(netlist, expected, inputs=None):
+    """Check the boolean function of a netlist against a truth table.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    expected : pycello.table.Table or dict
+        The boolean value of nodes in each state. A `pycello.table.Table`,
+        such as a logic table read by `pycello.table.read_csv`, must include
+        the primary inputs, whose values give the state of each column, in
+        any order. A dict, such as the truth table returned by
+        `read_logic_circuit`, holds the value in every state, in order.
+    inputs : list, optional
+        The names of the primary input nodes, most significant first, see
+        `simulate`.
+
+    Returns
+    -------
+    dict
+        For each node that differs from `expected`, the indices of the
+        columns where it does. Empty if the netlist matches.
+
+    """
+    if inputs is None:
+        inputs = [node.name for node in netlist.nodes if node.type == 'PRIMARY_INPUT']
+    result = simulate(netlist, inputs)
+
+    if isinstance(expected, pycello.table.Table):
+        states = np.zeros(expected.states, dtype=np.int64)
+        for name in inputs:
+            states = (states << 1) | np.asarray(expected[name], dtype=np.int64)
+        names = expected.names
+    else:
+        states = np.arange(result.states)
+        names = list(expected)
+
+    rtn = {}
+    for name in names:
+        if name not in result.index:
+            continue
+        values = np.asarray(expected[name], dtype=np.bool_)
+        if len(values) != len(states):
+            raise ValueError("Truth table of {} has {} states, expected {}.".format(
+                name, len(values), len(states)))
+        mismatch = np.flatnonzero(result[name][states] != values)
+        if len(mismatch):
+            rtn[name] = mismatch
+    return rtn
@@ -0,0 +1,391 @@
+"""
+Motif library indexed by truth table.
+
+The ``motif_library`` collection of a UCF lists small NOR/NOT circuits of a
+few inputs, each written as a list of gates such as
+``NOR(n4,0Wire44,0Wire45)``. Each motif is parsed into gates in evaluation
+order and evaluated over every input combination at once, as in
+`pycello.logic`, to a truth table packed into an integer: bit ``k`` is the
+output in state ``k``, with the first input as the most significant bit of
+``k``. Motifs are indexed under every ordering of their inputs, so the
+implementation of a boolean function with the fewest gates is found by a
+single dictionary lookup.
+"""
+
+import itertools
+import numbers
+import operator
+import re
+
+import numpy as np
+
+import pycello.activity
+import pycello.logic
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+# gate types counted as gates of a motif
+GATE_TYPES = ('NOT', 'NOR')
+
+_GATE = re.compile(r"^\s*(\w+)\s*\((.*)\)\s*$")
+
+
+def pack(bits):
+    """Pack the boolean value of a function in each state into an integer."""
+    bits = np.asarray(bits, dtype=np.bool_)
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+
+def unpack(truth, inputs):
+    """Get the boolean value in each state of a truth table packed by `pack`."""
+    return np.array([(truth >> k) & 1 for k in range(2**inputs)], dtype=np.bool_)
+
+
+def _truth(truth, inputs):
+    # a packed truth table, as any integer type, or the value in each state
+    if isinstance(truth, numbers.Integral) and not isinstance(truth, bool):
+        truth = operator.index(truth)
+    else:
+        bits = np.asarray(truth)
+        if bits.dtype != np.bool_ or bits.shape != (2**inputs,):
+            raise ValueError("Truth table must be an integer or {} booleans.".format(2**inputs))
+        truth = pack(bits)
+    if truth < 0 or truth >> 2**inputs:
+        raise ValueError("Truth table {:#x} has more than {} states.".format(truth, 2**inputs))
+    return truth
+
+
+def cut_function(netlist, node, inputs=None):
+    """Get the function of a netlist node over a cut of its fan-in cone.
+
+    The nodes between the cut and `node` are evaluated over every
+    combination of the values of the cut nodes, whatever drives those.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    node : str
+        The node name.
+    inputs : list, optional
+        The names of the nodes of the cut, most significant first. Every path
+        from a primary input to `node` must pass through one of them.
+        Defaults to the primary inputs in the fan-in cone of `node`, in
+        netlist order.
+
+    Returns
+    -------
+    truth : int
+        The packed truth table, see `pack`.
+    inputs : list
+        The names of the nodes of the cut.
+
+    Raises
+    ------
+    ValueError
+        If `inputs` is not a cut of the fan-in cone of `node`, or the cone
+        has a feedback loop or a node that cannot be evaluated.
+
+    """
+    fanin = netlist.graph.fanin
+    target = netlist.node(node)
+    if target is None:
+        raise ValueError("No node {}.".format(node))
+    if inputs is None:
+        cone = set()
+        stack = [target]
+        while stack:
+            u = stack.pop()
+            if u not in cone:
+                cone.add(u)
+                stack.extend(fanin[u])
+        inputs = [u.name for u in netlist.nodes if u in cone and u.type == 'PRIMARY_INPUT']
+
+    n = len(inputs)
+    ones = (1 << 2**n) - 1
+    values = {}
+    for name, row in zip(inputs, pycello.logic.input_words(n)):
+        values[name] = sum(int(word) << (pycello.logic.WORD * j) for j, word in enumerate(row)) & ones
+
+    visiting = set()
+
+    def evaluate(u):
+        if u.name in values:
+            return values[u.name]
+        if u.type == 'PRIMARY_INPUT':
+            raise ValueError("Input {} of node {} is not in the cut.".format(u.name, node))
+        if u.name in visiting:
+            raise ValueError("Node {} is in a feedback loop.".format(u.name))
+        visiting.add(u.name)
+        x = 0
+        for v in fanin[u]:
+            x |= evaluate(v)
+        if u.type in pycello.logic.INVERTING_TYPES:
+            x = ~x & ones
+        elif u.type not in pycello.logic.OR_TYPES:
+            raise ValueError("Cannot evaluate node {} of type {}.".format(u.name, u.type))
+        values[u.name] = x
+        return x
+
+    return evaluate(target), list(inputs)
+
+
+class Motif:
+    """A small circuit of NOR and NOT gates.
+
+    Parameters
+    ----------
+    inputs : list
+        The names of the inputs, most significant first.
+    outputs : list
+        The names of the outputs.
+    gates : list
+        ``(type, output, inputs)`` for each gate, e.g.
+        ``('NOR', 'n4', ['0Wire44', '0Wire45'])``.
+
+    Attributes
+    ----------
+    inputs, outputs : list
+    gates : list
+        The gates, in evaluation order.
+    truth : int
+        The packed truth table of the first output, see `pack`.
+    size : int
+        The number of NOR and NOT gates. Wired ``OUTPUT_OR`` gates are free.
+
+    Raises
+    ------
+    ValueError
+        If a gate has an unknown type, or the gates form a loop or use an
+        undefined wire.
+
+    """
+
+    def __init__(self, inputs, outputs, gates):
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.gates = _order(self.inputs, gates)
+        self.size = sum(1 for gate in self.gates if gate[0] in GATE_TYPES)
+        self.truth = self.evaluate()[self.outputs[0]]
+
+    @classmethod
+    def from_entry(cls, entry):
+        """Build from a ``motif_library`` entry."""
+        gates = []
+        for text in entry['netlist']:
+            m = _GATE.match(text)
+            if not m:
+                raise ValueError("Cannot parse motif gate {}.".format(text))
+            wires = [wire.strip() for wire in m.group(2).split(',')]
+            gates.append((m.group(1), wires[0], wires[1:]))
+        return cls(entry['inputs'], entry['outputs'], gates)
+
+    def evaluate(self):
+        """Get the packed truth table of every wire.
+
+        Returns
+        -------
+        dict
+            The truth table of each wire, by name, see `pack`.
+
+        """
+        n = len(self.inputs)
+        ones = (1 << 2**n) - 1
+        words = pycello.logic.input_words(n)
+        values = {}
+        for name, row in zip(self.inputs, words):
+            values[name] = sum(int(word) << (pycello.logic.WORD * j) for j, word in enumerate(row)) & ones
+        for type, output, inputs in self.gates:
+            x = 0
+            for wire in inputs:
+                x |= values[wire]
+            values[output] = (~x & ones) if type in GATE_TYPES else x
+        return values
+
+
+def _order(inputs, gates):
+    # sort the gates so that every wire is driven before it is used
+    driven = set(inputs)
+    pending = list(gates)
+    rtn = []
+    while pending:
+        ready = [gate for gate in pending if all(wire in driven for wire in gate[2])]
+        if not ready:
+            raise ValueError("Motif gates {} use undefined wires or form a loop.".format(
+                ", ".join(gate[1] for gate in pending)))
+        for gate in ready:
+            if gate[0] not in GATE_TYPES + ('OUTPUT_OR', 'OR', 'OUTPUT', 'BUF'):
+                raise ValueError("Unknown motif gate type {}.".format(gate[0]))
+            rtn.append(gate)
+            driven.add(gate[1])
+        pending = [gate for gate in pending if gate[1] not in driven]
+    return rtn
+
+
+class Match:
+    """An implementation of a boolean function by a motif.
+
+    Attributes
+    ----------
+    motif : Motif
+    wiring : list
+        For each input of the motif, the index of the input of the function
+        it is connected to, or ``None`` if the function does not depend on
+        it.
+    inputs : list or None
+        The names of the inputs of the function, where known.
+
+    """
+
+    def __init__(self, motif, wiring, inputs=None):
+        self.motif = motif
+        self.wiring = wiring
+        self.inputs = inputs
+
+    @property
+    def size(self):
+        """The number of gates of the motif."""
+        return self.motif.size
+
+    def connections(self, inputs=None):
+        """Get the input of the function wired to each motif input, by name.
+
+        Parameters
+        ----------
+        inputs : list, optional
+            The names of the inputs of the function. Defaults to `inputs`.
+
+        """
+        if inputs is None:
+            inputs = self.inputs
+        return {name: None if i is None else inputs[i] for name, i in zip(self.motif.inputs, self.wiring)}
+
+
+class MotifLibrary:
+    """The motifs of a UCF, indexed by truth table.
+
+    Every motif is indexed under each ordering of its inputs by
+    ``(inputs, truth, size)``, and the smallest motif of each
+    ``(inputs, truth)`` is kept for `lookup`.
+
+    Parameters
+    ----------
+    motifs : list
+        The `Motif` objects.
+
+    """
+
+    def __init__(self, motifs):
+        self.motifs = list(motifs)
+        self.__index = {}
+        self.__best = {}
+        self.__inputs = sorted({len(motif.inputs) for motif in self.motifs})
+        for motif in self.motifs:
+            n = len(motif.inputs)
+            bits = unpack(motif.truth, n)
+            rows = pycello.activity.truth_table(n)
+            weights = 1 << np.arange(n - 1, -1, -1)
+            for order in itertools.permutations(range(n)):
+                # motif input i is wired to function input order[i]
+                states = weights @ rows[list(order)]
+                match = Match(motif, list(order))
+                key = (n, pack(bits[states]))
+                self.__index.setdefault(key + (motif.size,), []).append(match)
+                if key not in self.__best or motif.size < self.__best[key].size:
+                    self.__best[key] = match
+
+    @classmethod
+    def from_ucf(cls, ucf):
+        """Load the ``motif_library`` collection of a `pycello.ucf.UCF`."""
+        return cls([Motif.from_entry(entry) for entry in ucf.collection('motif_library')])
+
+    def __len__(self):
+        return len(self.motifs)
+
+    def _keys(self, truth, inputs):
+        # the function of fewer inputs than a motif is looked up with the
+        # extra motif inputs as don't cares, appended least significant
+        for n in self.__inputs:
+            if n < inputs:
+                continue
+            bits = unpack(truth, inputs)[np.arange(2**n) >> (n - inputs)]
+            yield n, pack(bits)
+
+    def lookup(self, truth, inputs):
+        """Find the motif with the fewest gates implementing a function.
+
+        Parameters
+        ----------
+        truth : int or numpy.ndarray
+            The truth table, packed as by `pack` into an integer of any
+            type, or a boolean array of its value in each state.
+        inputs : int
+            The number of inputs of the function.
+
+        Returns
+        -------
+        Match or None
+            ``None`` if no motif implements the function.
+
+        """
+        truth = _truth(truth, inputs)
+        rtn = None
+        for key in self._keys(truth, inputs):
+            match = self.__best.get(key)
+            if match is not None and (rtn is None or match.size < rtn.size):
+                rtn = self._wire(match, inputs)
+        return rtn
+
+    def implementations(self, truth, inputs, size):
+        """Get every motif of a given number of gates implementing a function.
+
+        Parameters
+        ----------
+        truth : int or numpy.ndarray
+            See `lookup`.
+        inputs : int
+        size : int
+            The number of gates.
+
+        Returns
+        -------
+        list
+            `Match` objects.
+
+        """
+        truth = _truth(truth, inputs)
+        return [self._wire(match, inputs) for key in self._keys(truth, inputs)
+                for match in self.__index.get(key + (size,), [])]
+
+    def _wire(self, match, inputs):
+        return Match(match.motif, [i if i < inputs else None for i in match.wiring])
+
+    def match(self, netlist, node, inputs=None):
+        """Find the smallest motif implementing a node of a netlist.
+
+        The function of the node is computed over a cut of its fan-in cone,
+        see `cut_function`, so a node deep in a large circuit is matched
+        over its own inputs.
+
+        Parameters
+        ----------
+        netlist : pycello.netlist.Netlist
+        node : str
+            The node name.
+        inputs : list, optional
+            The names of the nodes of the cut, most significant first.
+            Defaults to the primary inputs in the fan-in cone of the node.
+
+        Returns
+        -------
+        Match or None
+            See `lookup`. The wiring refers to the nodes of the cut, which
+            are given by `Match.inputs`.
+
+        """
+        truth, inputs = cut_function(netlist, node, inputs)
+        rtn = self.lookup(truth, len(inputs))
+        if rtn is not None:
+            rtn.inputs = inputs
+        return rtn
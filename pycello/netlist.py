@@ -1,5 +1,7 @@
 import re
 
+import numpy as np
+
 __author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
 __license__ = 'GPL3'
 
@@ -98,6 +100,8 @@ class Edge:
 
 class Placement:
 
+    __index = None
+
     def __init__(self):
         self.groups = []
 
@@ -108,6 +112,29 @@ class Placement:
     @groups.setter
     def groups(self, groups):
         self.__groups = groups
+        self.__index = None
+
+    def node_components(self, node):
+        """Get the components in the placement corresponding to a netlist node.
+
+        The node to component index is built on first use; call `reindex`
+        after changing the groups or components in place.
+
+        Parameters
+        ----------
+        node : pycello.netlist.Node
+
+        """
+        if self.__index is None:
+            self.__index = {}
+            for group in self.groups:
+                for component in group.components:
+                    self.__index.setdefault(component.node, []).append(component)
+        return self.__index.get(node, [])
+
+    def reindex(self):
+        """Discard the node to component index."""
+        self.__index = None
 
 
 class PlacementGroup:
@@ -200,8 +227,199 @@ class PartInstance:
         self.__flux = flux
 
 
+class Graph:
+    """An indexed view of the connectivity of a netlist.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+
+    Attributes
+    ----------
+    nodes : dict
+        Nodes by name.
+    fanin : dict
+        The nodes connected as inputs to each node. Edges with an end that
+        is not a node of the netlist are left out.
+    fanout : dict
+        The nodes each node is connected to as an input.
+    promoters : dict
+        For each node, its input nodes by the name of their output promoter.
+
+    """
+
+    def __init__(self, netlist):
+        self.nodes = {node.name: node for node in netlist.nodes}
+        self.fanin = {node: [] for node in netlist.nodes}
+        self.fanout = {node: [] for node in netlist.nodes}
+        self.promoters = {node: {} for node in netlist.nodes}
+        for edge in netlist.edges:
+            # edges to or from nodes missing from the netlist are ignored
+            if edge.src not in self.fanin or edge.dst not in self.fanin:
+                continue
+            self.fanin[edge.dst].append(edge.src)
+            self.fanout[edge.src].append(edge.dst)
+            promoter = edge.src.gate.promoter if edge.src.gate else None
+            if promoter:
+                self.promoters[edge.dst].setdefault(promoter.name, edge.src)
+
+    def upstream_node(self, promoter, node):
+        """Get the input node of `node` whose output is the given promoter."""
+        if not promoter:
+            return None
+        return self.promoters[node].get(promoter.name)
+
+
+class FeedbackError(ValueError):
+    """Raised when a netlist that must be acyclic contains feedback loops."""
+
+    def __init__(self, loops):
+        self.loops = loops
+        names = ["(" + ", ".join(obj.name for obj in loop) + ")" for loop in loops]
+        super().__init__("Feedback loops in netlist: " + ", ".join(names))
+
+
+def levelize(fanin):
+    """Levelize a directed graph.
+
+    Strongly connected components are found with Tarjan's algorithm, and
+    each is assigned the level one above the highest of its inputs, so the
+    vertices of a level only depend on earlier levels, or on each other
+    when they form a feedback loop.
+
+    Parameters
+    ----------
+    fanin : list
+        For each vertex, the list of the vertices connected to its inputs.
+
+    Returns
+    -------
+    levels : list
+        The vertices in each level, in ascending order.
+    feedback : list
+        The vertices in each feedback loop, in ascending order.
+
+    """
+    n = len(fanin)
+    fanout = [[] for _ in range(n)]
+    for v, inputs in enumerate(fanin):
+        for u in inputs:
+            fanout[u].append(v)
+
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    component = [-1] * n
+    stack = []
+    components = []
+    counter = 0
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, 0)]
+        while work:
+            v, i = work[-1]
+            if i < len(fanout[v]):
+                work[-1] = (v, i + 1)
+                w = fanout[v][i]
+                if index[w] < 0:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, 0))
+                elif on_stack[w]:
+                    low[v] = min(low[v], index[w])
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                low[u] = min(low[u], low[v])
+            if low[v] == index[v]:
+                members = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component[w] = len(components)
+                    members.append(w)
+                    if w == v:
+                        break
+                components.append(sorted(members))
+
+    # Tarjan's algorithm finds components in reverse topological order
+    level = [0] * len(components)
+    feedback = []
+    for c in reversed(range(len(components))):
+        members = components[c]
+        inputs = [component[u] for v in members for u in fanin[v]]
+        level[c] = max([level[i] + 1 for i in inputs if i != c], default=0)
+        if len(members) > 1 or c in inputs:
+            feedback.append(members)
+
+    levels = [[] for _ in range(max(level, default=-1) + 1)]
+    for v in range(n):
+        levels[level[component[v]]].append(v)
+    feedback.sort()
+    return levels, feedback
+
+
+class Schedule:
+    """A levelized evaluation plan for a netlist.
+
+    Nodes are numbered in evaluation order. The nodes of each level only
+    take inputs from earlier levels, except for the nodes of a feedback
+    loop, which share a level.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+
+    Attributes
+    ----------
+    nodes : list
+        The nodes, in evaluation order.
+    index : dict
+        The position of each node in `nodes`.
+    levels : list
+        For each level, an integer array of the positions of its nodes.
+    inputs : list
+        For each level, an integer array with a row per node holding the
+        positions of its input nodes, padded with -1.
+    feedback : list
+        The nodes in each feedback loop.
+
+    """
+
+    def __init__(self, netlist):
+        graph = netlist.graph
+        order = {node: i for i, node in enumerate(netlist.nodes)}
+        fanin = [[order[u] for u in graph.fanin[node]] for node in netlist.nodes]
+        levels, feedback = levelize(fanin)
+
+        self.nodes = [netlist.nodes[v] for level in levels for v in level]
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.levels = []
+        self.inputs = []
+        for level in levels:
+            nodes = [netlist.nodes[v] for v in level]
+            width = max([len(graph.fanin[node]) for node in nodes], default=0)
+            inputs = np.full((len(nodes), width), -1, dtype=np.intp)
+            for i, node in enumerate(nodes):
+                row = [self.index[u] for u in graph.fanin[node]]
+                inputs[i, :len(row)] = row
+            self.levels.append(np.array([self.index[node] for node in nodes], dtype=np.intp))
+            self.inputs.append(inputs)
+        self.feedback = [[netlist.nodes[v] for v in loop] for loop in feedback]
+
+
 class Netlist:
 
+    __graph = None
+
     def __init__(self, netlist, ucf):
         self.name = netlist['name'] if 'name' in netlist else ""
         self.input_filename = netlist['inputFilename'] if 'inputFilename' in netlist else ""
@@ -211,10 +429,11 @@ class Netlist:
 
         for node in netlist['nodes']:
             self.nodes.append(Node(node, ucf))
+        nodes = {node.name: node for node in self.nodes}
         for edge in netlist['edges']:
             e = Edge(edge)
-            e.src = self.node(edge['src'])
-            e.dst = self.node(edge['dst'])
+            e.src = nodes.get(edge['src'])
+            e.dst = nodes.get(edge['dst'])
             self.edges.append(e)
         for placement in netlist['placements']:
             p = Placement()
@@ -227,7 +446,7 @@ class Netlist:
                     c = Component()
                     g.components.append(c)
                     c.name = component['name']
-                    c.node = self.node(component['node'])
+                    c.node = nodes.get(component['node'])
                     for obj in component['parts']:
                         part = ucf.part(obj)
                         gate = ucf.gate(obj)
@@ -321,11 +540,10 @@ class Netlist:
     @nodes.setter
     def nodes(self, nodes):
         self.__nodes = nodes
+        self.__graph = None
 
     def node(self, name):
-        for node in self.nodes:
-            if node.name == name:
-                return node
+        return self.graph.nodes.get(name)
 
     @property
     def edges(self):
@@ -334,6 +552,39 @@ class Netlist:
     @edges.setter
     def edges(self, edges):
         self.__edges = edges
+        self.__graph = None
+
+    @property
+    def graph(self):
+        """The indexed connectivity of the netlist, see `Graph`.
+
+        The graph is built on first use; call `reindex` after changing the
+        nodes, edges or placements in place.
+
+        """
+        if self.__graph is None:
+            self.__graph = Graph(self)
+        return self.__graph
+
+    def schedule(self, strict=False):
+        """Get a levelized evaluation plan for the netlist, see `Schedule`.
+
+        Parameters
+        ----------
+        strict : bool, optional
+            Raise `FeedbackError` if the netlist has feedback loops.
+
+        """
+        schedule = Schedule(self)
+        if strict and schedule.feedback:
+            raise FeedbackError(schedule.feedback)
+        return schedule
+
+    def reindex(self):
+        """Discard the graph and placement indexes."""
+        self.__graph = None
+        for placement in self.placements:
+            placement.reindex()
 
     @property
     def placements(self):
@@ -0,0 +1,165 @@
+"""
+Columnar container for simulated RNA-seq profiles.
+
+The flux of every part of every placement in every state is held in one
+float64 array of shape (placements, states, parts), with the part names and
+types stored once and referenced by index. Profiles are saved to ``.npz``,
+or to a directory of ``.npy`` files that can be memory-mapped, and JSON is
+produced as a stream.
+"""
+
+import json
+import os
+
+import numpy as np
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class Result:
+    """Simulated flux of every placement of a netlist.
+
+    Placements with fewer parts than the largest are padded with nan flux
+    and a part index of -1.
+
+    Parameters
+    ----------
+    flux : numpy.ndarray
+        The flux, of shape (placements, states, parts).
+    names : numpy.ndarray
+        The distinct part names.
+    types : numpy.ndarray
+        The type of each of `names`.
+    index : numpy.ndarray
+        The index in `names` of each part of each placement, of shape
+        (placements, parts).
+
+    """
+
+    def __init__(self, flux, names, types, index):
+        self.flux = flux
+        self.names = names
+        self.types = types
+        self.index = index
+
+    @classmethod
+    def from_simulation(cls, netlist, results):
+        """Collect the flux of each placement of a netlist.
+
+        Parameters
+        ----------
+        netlist : pycello.netlist.Netlist
+        results : dict
+            ``(flux, parts)`` for each placement, as returned by
+            `pycello.rnaseq.simulate_netlist`.
+
+        """
+        names = {}
+        types = []
+        rows = []
+        for placement in netlist.placements:
+            _, parts = results[placement]
+            row = []
+            for part_instance in parts:
+                part = part_instance.part
+                if part.name not in names:
+                    names[part.name] = len(names)
+                    types.append(part.type)
+                row.append(names[part.name])
+            rows.append(row)
+
+        width = max((len(row) for row in rows), default=0)
+        states = max((len(results[placement][0]) for placement in netlist.placements), default=0)
+        flux = np.full((len(rows), states, width), np.nan)
+        index = np.full((len(rows), width), -1, dtype=np.int32)
+        for i, placement in enumerate(netlist.placements):
+            placement_flux = results[placement][0]
+            flux[i, :, :placement_flux.shape[1]] = placement_flux
+            index[i, :len(rows[i])] = rows[i]
+        return cls(flux, np.array(list(names), dtype=np.str_), np.array(types, dtype=np.str_), index)
+
+    @property
+    def shape(self):
+        """The number of placements, states and parts."""
+        return self.flux.shape
+
+    def placement(self, placement):
+        """Get a view of the flux of a placement, of shape (states, parts)."""
+        return self.flux[placement]
+
+    def state(self, placement, state):
+        """Get a view of the flux of a placement in a state."""
+        return self.flux[placement, state]
+
+    def part_names(self, placement):
+        """Get the name of each part of a placement."""
+        index = self.index[placement]
+        return self.names[index[index >= 0]]
+
+    def part_types(self, placement):
+        """Get the type of each part of a placement."""
+        index = self.index[placement]
+        return self.types[index[index >= 0]]
+
+    def save(self, path):
+        """Save the result.
+
+        Parameters
+        ----------
+        path : str
+            A ``.npz`` file, or else a directory of ``.npy`` files, one per
+            array, which `load` can memory-map.
+
+        """
+        arrays = {'flux': self.flux, 'names': self.names, 'types': self.types, 'index': self.index}
+        if path.endswith('.npz'):
+            np.savez(path, **arrays)
+        else:
+            os.makedirs(path, exist_ok=True)
+            for name, array in arrays.items():
+                np.save(os.path.join(path, name + '.npy'), array)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """Load a result saved by `save`.
+
+        Parameters
+        ----------
+        path : str
+        mmap_mode : {None, 'r', 'r+', 'c'}, optional
+            Memory-map the arrays of a directory of ``.npy`` files, see
+            `numpy.load`. Ignored for ``.npz`` files.
+
+        """
+        if path.endswith('.npz'):
+            with np.load(path) as data:
+                return cls(data['flux'], data['names'], data['types'], data['index'])
+        return cls(*(np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+                     for name in ('flux', 'names', 'types', 'index')))
+
+    def iter_json(self):
+        """Generate the JSON text of the result, a chunk per state.
+
+        The JSON has the layout of `pycello.rnaseq.get_json`: a list of
+        placements, each a list of states, each a list of
+        ``{"name": ..., "value": ...}`` objects.
+
+        """
+        yield '['
+        for i in range(self.flux.shape[0]):
+            names = [json.dumps(str(name)) for name in self.part_names(i)]
+            yield '[' if i == 0 else ', ['
+            for state in range(self.flux.shape[1]):
+                values = self.flux[i, state, :len(names)].tolist()
+                yield (', ' if state else '') + '[' + ', '.join(
+                    '{"name": %s, "value": %s}' % (name, json.dumps(value))
+                    for name, value in zip(names, values)
+                ) + ']'
+            yield ']'
+        yield ']'
+
+    def write_json(self, file):
+        """Write the JSON text of the result to a text file, see `iter_json`."""
+        for chunk in self.iter_json():
+            file.write(chunk)
@@ -1,11 +1,14 @@
 import numpy as np
 import argparse
 import json
-import csv
 import logging
+import os
 
+import pycello.equation
 import pycello.netlist
 import pycello.dnaplotlib
+import pycello.result
+import pycello.table
 import pycello.ucf
 import pycello.utils
 
@@ -15,6 +18,7 @@ __license__ = 'GPL3'
 
 BASAL_TRANSCRIPTION = 1e-6
 TOLERANCE = 1e-5
+MAX_ITERATIONS = 1000
 
 
 def strtobool(s):
@@ -25,65 +29,578 @@ def strtobool(s):
         return False
 
 
-def placement_rnaseq(netlist, placement, activity):
-    """Get the RNAseq profile for a given placement in a netlist."""
-    profile = {p: 100.0 for g in placement.groups for c in g.components for p in c.parts}
-    temp = {p: 1.0 for g in placement.groups for c in g.components for p in c.parts}
-
-    while (np.max(np.abs(np.array(list(profile.values())) - np.array(list(temp.values())))) > TOLERANCE):
-        temp = profile.copy()
-        profile = {}
-        for i, group in enumerate(placement.groups):
-            for j, component in enumerate(group.components):
-                for k, part_instance in enumerate(component.parts):
-                    # offset to which we add the flux
-                    # (readthrough, upstream promoter flux)
-                    if k == 0 and j > 0:
-                        offset = profile[group.components[j-1].parts[-1]]
-                    elif k > 0:
-                        offset = profile[component.parts[k-1]]
-                    else:
-                        offset = 0.0
-
-                    if part_instance.part.type == 'promoter':
-                        upstream_node = pycello.utils.get_upstream_node(part_instance.part, component.node, netlist)
-                        if upstream_node.type == 'PRIMARY_INPUT':
-                            delta_flux = activity[upstream_node.name][0]
-                        else:
-                            upstream_components = pycello.utils.get_components(upstream_node, placement)
-                            input_flux = 0.0
-                            for upstream_component in upstream_components:
-                                input_flux += profile[pycello.utils.get_cds(upstream_component)]
-                            delta_flux = pycello.utils.evaluate_equation(upstream_node.gate, {'x': input_flux})
-                        profile[part_instance] = pycello.utils.get_ribozyme(component).efficiency * delta_flux + offset
-                    if part_instance.part.type == 'ribozyme':
-                        profile[part_instance] = offset / pycello.utils.get_ribozyme(component).efficiency
-                    if part_instance.part.type in ('cds', 'rbs'):
-                        profile[part_instance] = offset
-                    if part_instance.part.type == 'terminator':
-                        profile[part_instance] = offset / part_instance.part.strength
+class SolverInfo:
+    """Convergence details of a steady-state solve.
 
+    Attributes
+    ----------
+    method : str
+        The method used, ``'forward'`` or ``'anderson'``.
+    iterations : int
+        The number of sweeps over the placement.
+    residual : float
+        The largest change in flux over the last sweep.
+
+    """
+
+    def __init__(self, method, iterations, residual):
+        self.method = method
+        self.iterations = iterations
+        self.residual = residual
+
+    def __repr__(self):
+        return "SolverInfo(method={!r}, iterations={}, residual={:g})".format(
+            self.method, self.iterations, self.residual
+        )
+
+
+# part type codes of a compiled Program
+PROMOTER = 0
+RIBOZYME = 1
+TERMINATOR = 2
+PASSTHROUGH = 3
+
+_CODES = {'promoter': PROMOTER, 'ribozyme': RIBOZYME, 'terminator': TERMINATOR}
+
+
+class Program:
+    """A placement compiled to flat arrays for flux propagation.
+
+    Parts are numbered in placement order. Each part adds to the flux of
+    the part before it in its group, and a promoter also depends on the
+    coding sequences of the gate driving it, or on a primary input. The
+    program only refers to the netlist through `gates` and `inputs`, so it
+    can be run against any activity table, or with substitute response
+    functions, without compiling it again.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    placement : pycello.netlist.Placement
+
+    Attributes
+    ----------
+    parts : list
+        The `pycello.netlist.PartInstance` of each part.
+    components : list
+        The `pycello.netlist.Component` of each part.
+    pred : numpy.ndarray
+        The part before each part in its group, or -1.
+    code : numpy.ndarray
+        The type code of each part, one of `PROMOTER`, `RIBOZYME`,
+        `TERMINATOR` and `PASSTHROUGH`.
+    efficiency : numpy.ndarray
+        The efficiency of the ribozyme in the component of each part.
+    strength : numpy.ndarray
+        The strength of each terminator, 1.0 for other parts.
+    gate : numpy.ndarray
+        For promoters driven by a gate, its index in `gates`, else -1.
+    input : numpy.ndarray
+        For promoters driven by a primary input, its index in `inputs`,
+        else -1.
+    ribozyme : numpy.ndarray
+        The index in `ribozymes` of the ribozyme in the component of each
+        part, or -1.
+    terminator : numpy.ndarray
+        For terminators, their index in `terminators`, else -1.
+    cds_ptr, cds : numpy.ndarray
+        The parts whose flux is the input of the gate driving promoter
+        ``i`` are ``cds[cds_ptr[i]:cds_ptr[i+1]]``.
+    gates : list
+        The `pycello.ucf.Gate` of each gate driving a promoter.
+    inputs : list
+        The name of each primary input node driving a promoter.
+    ribozymes : list
+        The distinct `pycello.ucf.Ribozyme` parts of the placement.
+    terminators : list
+        The distinct terminator `pycello.ucf.Part` of the placement.
+    order : numpy.ndarray
+        The parts in evaluation order.
+    feedback : list
+        The parts in each loop of flux dependencies.
+
+    """
+
+    def __init__(self, netlist, placement):
+        self.parts = []
+        self.components = []
+        pred = []
+        efficiency = []
+        ribozymes = {}
+        ribozyme = []
+        for group in placement.groups:
+            first = len(self.parts)
+            for component in group.components:
+                part = pycello.utils.get_ribozyme(component)
+                for part_instance in component.parts:
+                    pred.append(len(self.parts) - 1 if len(self.parts) > first else -1)
+                    efficiency.append(part.efficiency if part else 1.0)
+                    ribozyme.append(ribozymes.setdefault(part, len(ribozymes)) if part else -1)
+                    self.parts.append(part_instance)
+                    self.components.append(component)
+
+        n = len(self.parts)
+        index = {p: i for i, p in enumerate(self.parts)}
+        self.pred = np.array(pred, dtype=np.intp)
+        self.code = np.full(n, PASSTHROUGH, dtype=np.uint8)
+        self.efficiency = np.array(efficiency, dtype=np.float64)
+        self.strength = np.ones(n)
+        self.ribozyme = np.array(ribozyme, dtype=np.intp)
+        self.terminator = np.full(n, -1, dtype=np.intp)
+        self.ribozymes = list(ribozymes)
+        self.gate = np.full(n, -1, dtype=np.intp)
+        self.input = np.full(n, -1, dtype=np.intp)
+        self.gates = []
+        self.inputs = []
+        cds = []
+        cds_ptr = [0]
+        gates = {}
+        inputs = {}
+        terminators = {}
+        for i, part_instance in enumerate(self.parts):
+            part = part_instance.part
+            self.code[i] = _CODES.get(part.type, PASSTHROUGH)
+            if part.type == 'terminator':
+                self.strength[i] = part.strength
+                self.terminator[i] = terminators.setdefault(part, len(terminators))
+            if part.type == 'promoter':
+                component = self.components[i]
+                node = pycello.utils.get_upstream_node(part, component.node, netlist)
+                if node is None:
+                    raise ValueError("No input drives promoter {} of component {}.".format(
+                        part.name, component.name))
+                if node.type == 'PRIMARY_INPUT':
+                    self.input[i] = inputs.setdefault(node.name, len(inputs))
+                else:
+                    self.gate[i] = gates.setdefault(node.gate, len(gates))
+                    for upstream_component in pycello.utils.get_components(node, placement):
+                        cds.append(index[pycello.utils.get_cds(upstream_component)])
+            cds_ptr.append(len(cds))
+        self.gates = list(gates)
+        self.inputs = list(inputs)
+        self.terminators = list(terminators)
+        self.cds = np.array(cds, dtype=np.intp)
+        self.cds_ptr = np.array(cds_ptr, dtype=np.intp)
+
+        fanin = [([p] if p >= 0 else []) + cds[cds_ptr[i]:cds_ptr[i + 1]] for i, p in enumerate(pred)]
+        levels, self.feedback = pycello.netlist.levelize(fanin)
+        self.order = np.array([i for level in levels for i in level], dtype=np.intp)
+        self.__steps = list(zip(
+            self.order.tolist(), self.pred[self.order].tolist(), self.code[self.order].tolist(),
+            self.efficiency[self.order].tolist(), self.strength[self.order].tolist(),
+            self.gate[self.order].tolist(), self.input[self.order].tolist(),
+            [cds[cds_ptr[i]:cds_ptr[i + 1]] for i in self.order.tolist()]
+        ))
+
+    def sweep(self, flux, inputs, responses):
+        """Update the flux of every part in evaluation order, in place.
+
+        Parameters
+        ----------
+        flux : numpy.ndarray
+            The flux of each part in each state, of shape (states, parts).
+        inputs : numpy.ndarray
+            The activity of each of `inputs` in each state, of shape
+            (states, inputs).
+        responses : list
+            The response function of each of `gates`.
+
+        """
+        for i, pred, code, efficiency, strength, gate, input, cds in self.__steps:
+            # offset to which we add the flux
+            # (readthrough, upstream promoter flux)
+            offset = flux[:, pred] if pred >= 0 else 0.0
+            if code == PROMOTER:
+                if input >= 0:
+                    delta_flux = inputs[:, input]
+                else:
+                    delta_flux = responses[gate](flux[:, cds].sum(axis=1))
+                flux[:, i] = efficiency * delta_flux + offset
+            elif code == RIBOZYME:
+                flux[:, i] = offset / efficiency
+            elif code == TERMINATOR:
+                flux[:, i] = offset / strength
+            else:
+                flux[:, i] = offset
+        return flux
+
+    def run(self, activity, method='auto', responses=None, full_output=False):
+        """Solve the steady-state flux of every part in every state.
+
+        Parameters
+        ----------
+        activity : numpy.ndarray or dict
+            The activity of each primary input node in each state, as a
+            structured array with a row per state, or as a dict of arrays.
+        method : {'auto', 'forward', 'anderson'}, optional
+            See `simulate`.
+        responses : list, optional
+            Response functions to use in place of those of `gates`.
+        full_output : bool, optional
+            Also return a `SolverInfo`.
+
+        Returns
+        -------
+        numpy.ndarray
+            The flux of each part in each state, of shape (states, parts).
+
+        """
+        inputs = _columns(activity, self.inputs)
+        if responses is None:
+            responses = [gate.response for gate in self.gates]
+        shape = (inputs.shape[0], len(self.parts))
+
+        if method == 'auto':
+            method = 'anderson' if self.feedback else 'forward'
+        if method == 'forward':
+            if self.feedback:
+                raise pycello.netlist.FeedbackError(
+                    [list(dict.fromkeys(self.components[i] for i in loop)) for loop in self.feedback]
+                )
+            flux = self.sweep(np.zeros(shape), inputs, responses)
+            info = SolverInfo(method, 1, 0.0)
+        elif method == 'anderson':
+            flux, iterations, residual = _anderson(
+                lambda x: self.sweep(x, inputs, responses),
+                np.full(shape, 100.0), TOLERANCE, MAX_ITERATIONS
+            )
+            info = SolverInfo(method, iterations, residual)
+        else:
+            raise ValueError("Unknown method: {}".format(method))
+
+        if full_output:
+            return flux, info
+        return flux
+
+    def jacobian(self, activity, method='auto'):
+        """Solve the steady state and its sensitivity to every parameter.
+
+        The derivatives are propagated in forward mode through the parts in
+        evaluation order, at the steady state found by `run`. Where flux
+        depends on itself, the linearized steady state is solved directly.
+
+        The parameters are those of the response function of each of `gates`,
+        the efficiency of each of `ribozymes`, and the strength of each of
+        `terminators`, identified by ``(name, parameter)`` tuples, such as
+        ``('A1_AmtR', 'ymax')``, ``('RiboJ10', 'efficiency')`` and
+        ``('L3S2P55', 'strength')``.
+
+        Parameters
+        ----------
+        activity : numpy.ndarray or dict
+            See `run`.
+        method : {'auto', 'forward', 'anderson'}, optional
+            See `simulate`.
+
+        Returns
+        -------
+        flux : numpy.ndarray
+            The flux of each part in each state, of shape (states, parts).
+        jacobian : numpy.ndarray
+            The derivative of the flux of each part in each state with
+            respect to each parameter, of shape (states, parts, parameters).
+        parameters : list
+            The ``(name, parameter)`` of each parameter.
+
+        """
+        flux = self.run(activity, method)
+        inputs = _columns(activity, self.inputs)
+        if self.feedback:
+            # make the flux of each part consistent with those before it
+            flux = self.sweep(flux, inputs, [gate.response for gate in self.gates])
+        states, n = flux.shape
+
+        parameters = []
+        gradients = []
+        for gate in self.gates:
+            names = [name for name in gate.parameters if name not in gate.variables]
+            variables = list(gate.variables) + names
+            derivatives = [
+                pycello.equation.compile_derivative(gate.equation, gate.parameters, variables, wrt)
+                for wrt in variables[:1] + names
+            ]
+            gradients.append((len(parameters), derivatives, [gate.parameters[name] for name in names]))
+            parameters.extend((gate.name, name) for name in names)
+        ribozymes = len(parameters)
+        parameters.extend((ribozyme.name, 'efficiency') for ribozyme in self.ribozymes)
+        terminators = len(parameters)
+        parameters.extend((terminator.name, 'strength') for terminator in self.terminators)
+
+        # the steady state is flux = F(flux, parameters); linearized,
+        # dflux = scale * dflux[pred] + coupling * sum(dflux[cds]) + local
+        scale = np.ones(n)
+        coupling = np.zeros((states, n))
+        local = np.zeros((states, n, len(parameters)))
+        offset = np.where(self.pred >= 0, flux[:, self.pred], 0.0)
+        for i in range(n):
+            code = self.code[i]
+            efficiency = self.efficiency[i]
+            if code == PROMOTER:
+                if self.input[i] >= 0:
+                    delta_flux = inputs[:, self.input[i]]
+                else:
+                    first, derivatives, values = gradients[self.gate[i]]
+                    x = flux[:, self.cds[self.cds_ptr[i]:self.cds_ptr[i+1]]].sum(axis=1)
+                    delta_flux = self.gates[self.gate[i]].response(x)
+                    coupling[:, i] = efficiency * derivatives[0](x, *values)
+                    for j, derivative in enumerate(derivatives[1:]):
+                        local[:, i, first + j] = efficiency * derivative(x, *values)
+                if self.ribozyme[i] >= 0:
+                    local[:, i, ribozymes + self.ribozyme[i]] = delta_flux
+            elif code == RIBOZYME:
+                scale[i] = 1.0 / efficiency
+                if self.ribozyme[i] >= 0:
+                    local[:, i, ribozymes + self.ribozyme[i]] = -offset[:, i] / efficiency**2
+            elif code == TERMINATOR:
+                scale[i] = 1.0 / self.strength[i]
+                local[:, i, terminators + self.terminator[i]] = -offset[:, i] / self.strength[i]**2
+
+        if self.feedback:
+            system = np.broadcast_to(np.eye(n), (states, n, n)).copy()
+            rows = np.flatnonzero(self.pred >= 0)
+            system[:, rows, self.pred[rows]] -= scale[rows]
+            for i in range(n):
+                for c in self.cds[self.cds_ptr[i]:self.cds_ptr[i+1]]:
+                    system[:, i, c] -= coupling[:, i]
+            jacobian = np.linalg.solve(system, local)
+        else:
+            jacobian = local
+            for i in self.order:
+                if self.pred[i] >= 0:
+                    jacobian[:, i] += scale[i] * jacobian[:, self.pred[i]]
+                if self.cds_ptr[i+1] > self.cds_ptr[i]:
+                    cds = self.cds[self.cds_ptr[i]:self.cds_ptr[i+1]]
+                    jacobian[:, i] += coupling[:, i, None] * jacobian[:, cds].sum(axis=1)
+
+        return flux, jacobian, parameters
+
+
+def _columns(activity, names):
+    """Stack the named columns of an activity table into a (states, names) array."""
+    columns = [np.asarray(activity[name], dtype=np.float64) for name in names]
+    if columns:
+        return np.column_stack(columns)
+    if isinstance(activity, dict):
+        return np.zeros((len(next(iter(activity.values()))), 0))
+    return np.zeros((len(activity), 0))
+
+
+def _anderson(g, x, tolerance, max_iterations, depth=5):
+    """Solve ``x = g(x)`` by Anderson-accelerated fixed-point iteration."""
+    values = []
+    residuals = []
+    residual = np.inf
+    for iteration in range(1, max_iterations + 1):
+        gx = g(x.copy())
+        f = gx - x
+        residual = np.max(np.abs(f), initial=0.0)
+        if residual <= tolerance:
+            return gx, iteration, residual
+        values = (values + [gx.ravel()])[-(depth + 1):]
+        residuals = (residuals + [f.ravel()])[-(depth + 1):]
+        if len(residuals) > 1:
+            df = np.diff(residuals, axis=0)
+            dg = np.diff(values, axis=0)
+            gamma = np.linalg.lstsq(df.T, f.ravel(), rcond=None)[0]
+            # fluxes are non-negative; keep extrapolation in range
+            x = np.maximum(gx.ravel() - gamma @ dg, 0.0).reshape(x.shape)
+        else:
+            x = gx
+    logging.warning("Steady state not reached after %d iterations (residual %g).",
+                    max_iterations, residual)
+    return x, max_iterations, residual
+
+
+def simulate(netlist, placement, activity, method='auto', full_output=False):
+    """Get the steady-state flux of every part of a placement in every state.
+
+    All states are solved together, with the response functions evaluated
+    on arrays across states.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    placement : pycello.netlist.Placement
+    activity : numpy.ndarray
+        Structured array of the activity of each node, a row per state.
+    method : {'auto', 'forward', 'anderson'}, optional
+        ``'forward'`` propagates flux through the parts in dependency order
+        in a single pass, and raises `pycello.netlist.FeedbackError` if the
+        flux of a part depends on itself. ``'anderson'`` iterates sweeps over
+        the placement to a fixed point, using Anderson acceleration.
+        ``'auto'``, the default, uses ``'forward'`` unless there is feedback.
+    full_output : bool, optional
+        Also return a `SolverInfo`.
+
+    Returns
+    -------
+    flux : numpy.ndarray
+        The flux of each part in each state, of shape (states, parts).
+    parts : list
+        The `pycello.netlist.PartInstance` of each column of `flux`.
+
+    """
+    program = Program(netlist, placement)
+    flux, info = program.run(activity, method, full_output=True)
+    if full_output:
+        return flux, program.parts, info
+    return flux, program.parts
+
+
+def sensitivities(netlist, placement, activity, method='auto'):
+    """Get the sensitivity of the flux of every part to every parameter.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    placement : pycello.netlist.Placement
+    activity : numpy.ndarray or dict
+        The activity of each primary input node in each state, see
+        `Program.run`.
+    method : {'auto', 'forward', 'anderson'}, optional
+        See `simulate`.
+
+    Returns
+    -------
+    jacobian : numpy.ndarray
+        The derivative of the flux of each part in each state with respect
+        to each parameter, of shape (states, parts, parameters).
+    parts : list
+        The `pycello.netlist.PartInstance` of each part.
+    parameters : list
+        The ``(name, parameter)`` of each parameter, see `Program.jacobian`.
+
+    """
+    program = Program(netlist, placement)
+    _, jacobian, parameters = program.jacobian(activity, method)
+    return jacobian, program.parts, parameters
+
+
+def simulate_netlist(netlist, activity, method='auto', executor=None, chunksize=None):
+    """Get the steady-state flux of every placement of a netlist.
+
+    The simulation keeps its state in arrays owned by each call, and never
+    on the netlist, so several simulations of the same netlist may run at
+    once.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    activity : numpy.ndarray or dict
+        The activity of each primary input node in each state, see
+        `Program.run`.
+    method : {'auto', 'forward', 'anderson'}, optional
+        See `simulate`.
+    executor : concurrent.futures.Executor, optional
+        Run placements, and chunks of states within them, on this thread or
+        process pool.
+    chunksize : int, optional
+        The number of states per task when using `executor`. Defaults to
+        spreading each placement over the available CPUs.
+
+    Returns
+    -------
+    dict
+        ``(flux, parts)`` for each placement, as returned by `simulate`.
+
+    """
+    programs = [Program(netlist, placement) for placement in netlist.placements]
+    if executor is None:
+        return {
+            placement: (program.run(activity, method), program.parts)
+            for placement, program in zip(netlist.placements, programs)
+        }
+
+    if isinstance(activity, dict):
+        activity = {name: np.asarray(activity[name]) for name in activity}
+        states = len(next(iter(activity.values())))
+    else:
+        states = len(activity)
+    if chunksize is None:
+        chunksize = max(1, -(-states // (os.cpu_count() or 1)))
+
+    futures = []
+    for program in programs:
+        chunks = []
+        for start in range(0, states, chunksize):
+            if isinstance(activity, dict):
+                chunk = {name: column[start:start+chunksize] for name, column in activity.items()}
+            else:
+                chunk = activity[start:start+chunksize]
+            chunks.append(executor.submit(program.run, chunk, method))
+        futures.append(chunks)
+
+    return {
+        placement: (np.concatenate([chunk.result() for chunk in chunks]), program.parts)
+        for placement, program, chunks in zip(netlist.placements, programs, futures)
+    }
+
+
+def placement_rnaseq(netlist, placement, activity, method='auto', full_output=False):
+    """Get the RNAseq profile for a given placement in a netlist.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    placement : pycello.netlist.Placement
+    activity : numpy.ndarray
+        One-row structured array of the activity of each node.
+    method : {'auto', 'forward', 'anderson'}, optional
+        See `simulate`.
+    full_output : bool, optional
+        Also return a `SolverInfo`.
+
+    Returns
+    -------
+    dict
+        The flux of each `pycello.netlist.PartInstance`.
+
+    """
+    flux, parts, info = simulate(netlist, placement, activity[0:1], method, full_output=True)
+    profile = dict(zip(parts, flux[0].tolist()))
+    if full_output:
+        return profile, info
     return profile
 
 
-def rnaseq(ucf, netlist, activity, logic):
-    """Get the RNAseq profile from a given netlist."""
-    rtn = {}
+def rnaseq(ucf, netlist, activity, logic, executor=None, columnar=False):
+    """Get the RNAseq profile from a given netlist.
 
-    dt = np.dtype([(row[0], np.bool) for row in logic])
-    logic = np.array([[strtobool(k) for k in row[1:]] for row in logic]).T
-    logic = np.array([tuple(row) for row in logic], dtype=dt)
+    Parameters
+    ----------
+    ucf : pycello.ucf.UCF
+    netlist : pycello.netlist.Netlist
+    activity : pycello.table.Table or list
+        The activity table, or its rows as read by `csv.reader`.
+    logic : pycello.table.Table or list
+        The logic table, or its rows as read by `csv.reader`.
+    executor : concurrent.futures.Executor, optional
+        Simulate placements and chunks of states on this thread or process
+        pool, see `simulate_netlist`.
+    columnar : bool, optional
+        Return a `pycello.result.Result` holding the flux in a single array,
+        instead of a dict for each state of each placement.
+
+    Returns
+    -------
+    dict or pycello.result.Result
+        For each placement, a list with the flux of each
+        `pycello.netlist.PartInstance` in each state.
+
+    """
+    rtn = {}
 
-    dt = np.dtype([(row[0], np.float) for row in activity])
-    activity = np.array([[float(k) for k in row[1:]] for row in activity]).T
-    activity = np.array([tuple(row) for row in activity], dtype=dt)
+    if not isinstance(activity, pycello.table.Table):
+        activity = pycello.table.Table.from_rows(activity, np.float64)
+    if not isinstance(logic, pycello.table.Table):
+        logic = pycello.table.Table.from_rows(logic, np.bool_)
+    activity.check(logic)
 
-    if (activity.shape != logic.shape):
-        raise ValueError("Activity and Logic arrays must have the same size.")
-    for placement in netlist.placements:
-        rtn[placement] = []
-        for i in range(activity.shape[0]):
-            rtn[placement].append(placement_rnaseq(netlist, placement, activity[i:i+1]))
+    results = simulate_netlist(netlist, activity.as_dict(), executor=executor)
+    if columnar:
+        return pycello.result.Result.from_simulation(netlist, results)
+    for placement, (flux, parts) in results.items():
+        rtn[placement] = [dict(zip(parts, state)) for state in flux.tolist()]
 
     return rtn
 
@@ -105,7 +622,17 @@ def plot_rnaseq(rnaseq, designs):
 
 
 def get_json(rnaseq):
-    """Get a json representation of the RNAseq profile."""
+    """Get a json representation of the RNAseq profile.
+
+    Parameters
+    ----------
+    rnaseq : dict or pycello.result.Result
+        As returned by `rnaseq`. Use `pycello.result.Result.write_json` to
+        stream large results instead.
+
+    """
+    if isinstance(rnaseq, pycello.result.Result):
+        return json.loads("".join(rnaseq.iter_json()))
     rtn = []
     for placement in rnaseq.keys():
         x = []
@@ -136,20 +663,14 @@ if __name__ == "__main__":
                         required=False, help="Debug.", action='store_true')
     args = parser.parse_args()
 
-    activity = []
-    logic = []
-    with open(args.ucf, 'r') as ucf_fp:
-        ucf = pycello.ucf.UCF(json.load(ucf_fp))
-    with open(args.activity, 'r') as activity_fp:
-        activity_reader = csv.reader(activity_fp)
-        for row in activity_reader:
-            activity.append(row)
-    with open(args.logic, 'r') as logic_fp:
-        logic_reader = csv.reader(logic_fp)
-        for row in logic_reader:
-            logic.append(row)
+    ucf = pycello.ucf.UCF.from_path(args.ucf, cache=True)
+    activity, logic = pycello.table.read_tables(args.activity, args.logic)
     with open(args.netlist, 'r') as netlist_fp:
         netlist = pycello.netlist.Netlist(json.load(netlist_fp), ucf)
 
-    seq = rnaseq(ucf, netlist, activity, logic)
-    data = get_json(seq)
+    seq = rnaseq(ucf, netlist, activity, logic, columnar=True)
+    if args.output and args.output.endswith('.json'):
+        with open(args.output, 'w') as output_fp:
+            seq.write_json(output_fp)
+    elif args.output:
+        seq.save(args.output)
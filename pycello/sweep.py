@@ -0,0 +1,221 @@
+"""
+Parameter sweeps and Monte Carlo analysis of RNA-seq predictions.
+
+Response function parameters are varied per gate, and every sample is
+simulated in the same vectorized pass over a compiled
+`pycello.rnaseq.Program`, a chunk of samples at a time. The spread of the
+predicted flux of each part in each state is accumulated in log-spaced
+histograms, so memory does not grow with the number of samples.
+"""
+
+import numpy as np
+
+import pycello.equation
+import pycello.rnaseq
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+# histogram range of log10 flux
+LOG_FLUX_RANGE = (-10.0, 6.0)
+
+# memory budget for the flux of one chunk of samples, in bytes
+CHUNK_BYTES = 64 * 2**20
+
+
+class SweepResult:
+    """Summary statistics of the flux across the samples of a sweep.
+
+    Attributes
+    ----------
+    parts : list
+        The `pycello.netlist.PartInstance` of each column.
+    percentiles : numpy.ndarray
+        The percentiles of the bands.
+    bands : numpy.ndarray
+        The flux at each percentile, of shape (percentiles, states, parts).
+    mean : numpy.ndarray
+        The mean flux, of shape (states, parts).
+    std : numpy.ndarray
+        The standard deviation of the flux, of shape (states, parts).
+    samples : int
+        The number of samples.
+
+    """
+
+    def __init__(self, parts, percentiles, bands, mean, std, samples):
+        self.parts = parts
+        self.percentiles = percentiles
+        self.bands = bands
+        self.mean = mean
+        self.std = std
+        self.samples = samples
+
+
+class _Parameter:
+
+    def __init__(self, gate, name, spec):
+        self.gate = gate
+        self.name = name
+        self.spec = spec
+        if hasattr(spec, 'rvs'):
+            self.kind = 'random'
+        elif callable(spec):
+            self.kind = 'random'
+        elif np.ndim(spec) == 0:
+            self.kind = 'fixed'
+        else:
+            self.kind = 'grid'
+            self.spec = np.asarray(spec, dtype=np.float64)
+
+    def draw(self, size, rng):
+        if hasattr(self.spec, 'rvs'):
+            return np.asarray(self.spec.rvs(size=size, random_state=rng), dtype=np.float64)
+        return np.asarray(self.spec(rng, size), dtype=np.float64)
+
+
+def parameter_sweep(program, activity, parameters, samples=None, percentiles=(5, 50, 95),
+                    method='auto', chunksize=None, seed=None, resolution=100):
+    """Sweep response function parameters over a compiled placement.
+
+    Each parameter may be fixed, swept over a grid, or drawn at random.
+    Grids are combined into a full factorial design, and each point of the
+    design is paired with `samples` random draws when any parameter is
+    random.
+
+    Parameters
+    ----------
+    program : pycello.rnaseq.Program
+    activity : numpy.ndarray or dict
+        The activity of each primary input node in each state, see
+        `pycello.rnaseq.Program.run`.
+    parameters : dict
+        For each gate name, a dict mapping parameter names to a value, a
+        1-D array of grid values, a frozen distribution with an ``rvs``
+        method such as those of `scipy.stats`, or a function
+        ``f(rng, size)`` returning random values. Gates that do not drive
+        a promoter of the placement are ignored.
+    samples : int, optional
+        The number of random draws, required if any parameter is random.
+    percentiles : sequence of float, optional
+        The percentiles of the bands to return.
+    method : {'auto', 'forward', 'anderson'}, optional
+        See `pycello.rnaseq.simulate`.
+    chunksize : int, optional
+        The number of samples simulated at once. Defaults to keeping the
+        flux of a chunk within `CHUNK_BYTES`.
+    seed : int or numpy.random.Generator, optional
+        Seed for the random draws.
+    resolution : int, optional
+        Histogram bins per decade of flux. Percentiles are interpolated
+        within the bins. The histograms hold a 4-byte count per state, part
+        and bin, e.g. 160 MB for 256 states, 100 parts and the default
+        resolution, so lower it for large placements.
+
+    Returns
+    -------
+    SweepResult
+
+    Raises
+    ------
+    ValueError
+        If a parameter is not a parameter of the response function of its
+        gate, or random parameters are given without `samples`.
+
+    Examples
+    --------
+    >>> result = parameter_sweep(program, activity, {
+    ...     'A1_AmtR': {'ymax': scipy.stats.lognorm(0.2, scale=3.8),
+    ...                 'n': [1.4, 1.6, 1.8]},
+    ... }, samples=10000)
+    >>> low, median, high = result.bands
+
+    """
+    rng = np.random.default_rng(seed)
+    gates = {gate.name: i for i, gate in enumerate(program.gates)}
+    for name in parameters:
+        if name in gates:
+            unknown = [p for p in parameters[name] if p not in program.gates[gates[name]].parameters]
+            if unknown:
+                raise ValueError("Gate {} has no parameters {}.".format(name, ", ".join(unknown)))
+    swept = [_Parameter(gates[gate], name, spec)
+             for gate in parameters if gate in gates
+             for name, spec in parameters[gate].items()]
+    grid = [p for p in swept if p.kind == 'grid']
+    random = [p for p in swept if p.kind == 'random']
+    if random and samples is None:
+        raise ValueError("The number of samples is required for random parameters.")
+    grid_shape = tuple(len(p.spec) for p in grid)
+    draws = samples if random else 1
+    total = int(np.prod(grid_shape, dtype=np.int64)) * draws
+
+    inputs = pycello.rnaseq._columns(activity, program.inputs)
+    states = inputs.shape[0]
+    parts = len(program.parts)
+    if chunksize is None:
+        chunksize = max(1, CHUNK_BYTES // (8 * max(1, states * parts)))
+
+    compiled = {}
+    for i, gate in enumerate(program.gates):
+        names = [p.name for p in swept if p.gate == i and p.kind != 'fixed']
+        fixed = {p.name: p.spec for p in swept if p.gate == i and p.kind == 'fixed'}
+        if names or fixed:
+            compiled[i] = (pycello.equation.compile_equation(
+                gate.equation, {**gate.parameters, **fixed}, list(gate.variables) + names
+            ), names)
+
+    low, high = LOG_FLUX_RANGE
+    bins = int(round((high - low) * resolution))
+    counts = np.zeros((states, parts, bins), dtype=np.uint32 if total < 2**32 else np.uint64)
+    cells = np.arange(parts) * bins
+    # running mean and sum of squared deviations, merged chunk by chunk
+    mean = np.zeros((states, parts))
+    m2 = np.zeros((states, parts))
+
+    for start in range(0, total, chunksize):
+        k = np.arange(start, min(start + chunksize, total))
+        values = {}
+        if grid:
+            for p, index in zip(grid, np.unravel_index(k // draws, grid_shape)):
+                values[(p.gate, p.name)] = p.spec[index]
+        for p in random:
+            values[(p.gate, p.name)] = p.draw(len(k), rng)
+
+        responses = [gate.response for gate in program.gates]
+        for i, (fn, names) in compiled.items():
+            args = [np.repeat(values[(i, name)], states) for name in names]
+            responses[i] = (lambda fn, args: lambda x: fn(x, *args))(fn, args)
+
+        tiled = np.tile(inputs, (len(k), 1))
+        flux = program.run({name: tiled[:, j] for j, name in enumerate(program.inputs)} or tiled,
+                           method, responses)
+        flux = flux.reshape(len(k), states, parts)
+
+        chunk_mean = flux.mean(axis=0)
+        delta = chunk_mean - mean
+        mean += delta * len(k) / (start + len(k))
+        m2 += np.square(flux - chunk_mean).sum(axis=0) + np.square(delta) * start * len(k) / (start + len(k))
+        with np.errstate(divide='ignore'):
+            index = np.floor((np.log10(flux) - low) * resolution)
+        index = np.clip(np.nan_to_num(index, nan=0.0, neginf=0.0), 0, bins - 1).astype(np.int64)
+        # one state at a time, so the temporary counts stay small
+        for state in range(states):
+            counts[state] += np.bincount((cells + index[:, state]).ravel(),
+                                         minlength=parts * bins).reshape(parts, bins).astype(counts.dtype)
+
+    std = np.sqrt(m2 / total)
+    percentiles = np.asarray(percentiles, dtype=np.float64)
+    bands = np.empty((len(percentiles), states, parts))
+    for state in range(states):
+        state_counts = counts[state].astype(np.int64)
+        cumulative = np.cumsum(state_counts, axis=1)
+        for i, q in enumerate(percentiles):
+            target = q / 100.0 * total
+            b = np.minimum(np.sum(cumulative < target, axis=1), bins - 1)
+            within = np.take_along_axis(state_counts, b[:, None], axis=1)[:, 0]
+            below = np.take_along_axis(cumulative, b[:, None], axis=1)[:, 0] - within
+            fraction = np.where(within > 0, (target - below) / np.maximum(within, 1), 0.5)
+            bands[i, state] = 10.0**(low + (b + np.clip(fraction, 0.0, 1.0)) / resolution)
+
+    return SweepResult(program.parts, percentiles, bands, mean, std, total)
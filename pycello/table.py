@@ -0,0 +1,188 @@
+"""
+Activity and logic tables.
+
+A table holds a value for each netlist node in each state, as a contiguous
+2-D array with a row per node, and an index of the node names. Tables are
+read from the CSV files of the Cello toolchain, with a row per node, or from
+a binary directory of ``.npy`` files that can be memory-mapped.
+"""
+
+import os
+
+import numpy as np
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class Table:
+    """A value for each node in each state.
+
+    Indexing a table by node name gives a view of the row of that node, so a
+    table can be passed wherever an activity table is expected, e.g. to
+    `pycello.rnaseq.Program.run`. As for a structured array with a row per
+    state, the length of a table is the number of states.
+
+    Parameters
+    ----------
+    names : list
+        The name of each node.
+    values : numpy.ndarray
+        The value of each node in each state, of shape (nodes, states).
+
+    """
+
+    def __init__(self, names, values):
+        if len(names) != len(values):
+            raise ValueError("Table has {} names for {} rows.".format(len(names), len(values)))
+        self.names = list(names)
+        self.values = values
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+    @property
+    def states(self):
+        """The number of states."""
+        return self.values.shape[1]
+
+    def __len__(self):
+        return self.states
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __getitem__(self, name):
+        return self.values[self.index[name]]
+
+    def as_dict(self):
+        """Get a view of the row of each node, by node name."""
+        return {name: self.values[i] for i, name in enumerate(self.names)}
+
+    def check(self, other):
+        """Raise `ValueError` unless another table has the same nodes and states."""
+        if self.values.shape != other.values.shape or set(self.names) != set(other.names):
+            raise ValueError("Activity and Logic arrays must have the same size.")
+
+    @classmethod
+    def from_rows(cls, rows, dtype=np.float64):
+        """Build a table from rows of strings, as read by `csv.reader`.
+
+        Parameters
+        ----------
+        rows : list
+            Rows of a node name followed by its value in each state.
+        dtype : numpy.dtype, optional
+            The type of the values. Boolean values are read from ``true``
+            and ``false``, in any case.
+
+        """
+        names = [row[0] for row in rows]
+        text = np.array([row[1:] for row in rows], dtype=np.str_).reshape(len(rows), -1)
+        return cls(names, _convert(text, dtype))
+
+    def save(self, path):
+        """Save the table to a directory of ``.npy`` files."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'names.npy'), np.array(self.names, dtype=np.str_))
+        np.save(os.path.join(path, 'values.npy'), np.ascontiguousarray(self.values))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Load a table saved by `save`, memory-mapping its values.
+
+        Parameters
+        ----------
+        path : str
+        mmap_mode : {None, 'r', 'r+', 'c'}, optional
+            See `numpy.load`.
+
+        """
+        names = np.load(os.path.join(path, 'names.npy'))
+        values = np.load(os.path.join(path, 'values.npy'), mmap_mode=mmap_mode)
+        return cls(names.tolist(), values)
+
+
+def _convert(text, dtype):
+    if np.dtype(dtype) == np.bool_:
+        return np.char.lower(np.char.strip(text)) == 'true'
+    return text.astype(dtype)
+
+
+def read_csv(file, dtype=np.float64):
+    """Read a table from a CSV file with a row per node.
+
+    The values are parsed in one vectorized conversion, straight into the
+    array of the table.
+
+    Parameters
+    ----------
+    file : str or file-like object
+        The path of the file, or a text file.
+    dtype : numpy.dtype, optional
+        The type of the values, ``numpy.bool_`` for a logic table.
+
+    Returns
+    -------
+    Table
+
+    """
+    if isinstance(file, str):
+        with open(file, 'r') as fp:
+            text = fp.read()
+    else:
+        text = file.read()
+    lines = [line for line in text.splitlines() if line.strip()]
+    names = []
+    fields = []
+    for line in lines:
+        name, _, rest = line.partition(',')
+        names.append(name.strip())
+        fields.append(rest)
+    width = fields[0].count(',') + 1 if fields else 0
+    for name, rest in zip(names, fields):
+        if rest.count(',') + 1 != width:
+            raise ValueError("Row {} has {} states, expected {}.".format(name, rest.count(',') + 1, width))
+    text = np.array(",".join(fields).split(",") if fields else [], dtype=np.str_)
+    return Table(names, _convert(text, dtype).reshape(len(names), width))
+
+
+def read(path, dtype=np.float64):
+    """Read a table from a CSV file, or from a directory saved by `Table.save`.
+
+    Parameters
+    ----------
+    path : str
+    dtype : numpy.dtype, optional
+        The type of the values of a CSV table, see `read_csv`.
+
+    Returns
+    -------
+    Table
+
+    """
+    if os.path.isdir(path):
+        return Table.load(path)
+    return read_csv(path, dtype)
+
+
+def read_tables(activity, logic):
+    """Read an activity table and the matching logic table.
+
+    Parameters
+    ----------
+    activity, logic : str
+        Paths of the tables, see `read`.
+
+    Returns
+    -------
+    activity, logic : Table
+
+    Raises
+    ------
+    ValueError
+        If the tables differ in nodes or number of states.
+
+    """
+    activity = read(activity, np.float64)
+    logic = read(logic, np.bool_)
+    activity.check(logic)
+    return activity, logic
@@ -0,0 +1,225 @@
+"""
+Prediction of cell growth from the gate toxicity tables of a UCF.
+
+The ``gate_toxicity`` collection gives the growth of cells relative to a
+control as a function of the input of each gate. The tables of all gates are
+held as one padded array sorted by input, and growth is interpolated in log
+input for every gate and state at once. As in the Cello logic circuit
+reports, the growth of a circuit in a state is the product of the growth of
+its gates, and the growth of a gate or circuit overall is the minimum over
+the states.
+"""
+
+import numpy as np
+
+import pycello.activity
+import pycello.table
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+# node types whose growth is read from the toxicity of their gate
+GATE_TYPES = ('NOT', 'NOR')
+
+# relative growth is capped at that of the control
+MAX_GROWTH = 1.0
+
+
+class Toxicity:
+    """The toxicity tables of a set of gates.
+
+    Parameters
+    ----------
+    names : list
+        The gate names.
+    inputs : list
+        The input values of the table of each gate.
+    growth : list
+        The relative growth at each of `inputs`.
+
+    Attributes
+    ----------
+    names : list
+    index : dict
+        The row of each gate name.
+    inputs : numpy.ndarray
+        The log input values of each gate, sorted, of shape (gates, points).
+        Shorter tables are padded with their last point.
+    growth : numpy.ndarray
+        The relative growth at each of `inputs`.
+
+    """
+
+    def __init__(self, names, inputs, growth):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        points = max((len(x) for x in inputs), default=0)
+        self.inputs = np.empty((len(self.names), points))
+        self.growth = np.empty((len(self.names), points))
+        for i, (x, y) in enumerate(zip(inputs, growth)):
+            if len(x) != len(y) or not len(x):
+                raise ValueError("Invalid toxicity table for gate {}.".format(self.names[i]))
+            order = np.argsort(x, kind='stable')
+            x = np.log(np.maximum(np.asarray(x, dtype=np.float64)[order], np.finfo(float).tiny))
+            y = np.asarray(y, dtype=np.float64)[order]
+            self.inputs[i] = np.pad(x, (0, points - len(x)), mode='edge')
+            self.growth[i] = np.pad(y, (0, points - len(y)), mode='edge')
+
+    @classmethod
+    def from_ucf(cls, ucf):
+        """Load the ``gate_toxicity`` collection of a `pycello.ucf.UCF`."""
+        entries = ucf.collection('gate_toxicity')
+        return cls([entry['gate_name'] for entry in entries],
+                   [entry['input'] for entry in entries],
+                   [entry['growth'] for entry in entries])
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def rows(self, gates):
+        """Get the row of each of a list of gate names.
+
+        Raises
+        ------
+        ValueError
+            If a gate has no toxicity table.
+
+        """
+        missing = [name for name in gates if name not in self.index]
+        if missing:
+            raise ValueError("No toxicity for gates {}.".format(", ".join(missing)))
+        return np.array([self.index[name] for name in gates], dtype=np.intp)
+
+    def interpolate(self, rows, x):
+        """Interpolate the growth of gates at given inputs.
+
+        The growth is linear in log input between the points of a table, and
+        constant beyond its ends.
+
+        Parameters
+        ----------
+        rows : numpy.ndarray
+            The row of the gate of each input, see `rows`, broadcast against
+            `x`.
+        x : numpy.ndarray
+            The input values.
+
+        Returns
+        -------
+        numpy.ndarray
+            The relative growth at each of `x`, at most `MAX_GROWTH`.
+
+        """
+        x = np.asarray(x, dtype=np.float64)
+        rows, x = np.broadcast_arrays(np.asarray(rows, dtype=np.intp), x)
+        points = self.inputs.shape[1]
+        lo = self.inputs[:, 0]
+        hi = self.inputs[:, -1]
+        log = np.clip(np.log(np.maximum(x, np.finfo(float).tiny)), lo[rows], hi[rows])
+
+        # one sorted array of the tables of all gates, each shifted past the
+        # previous, so a single search finds the interval of every input
+        span = float((hi - lo).max()) + 1.0 if len(lo) else 1.0
+        shift = (np.arange(len(self.names)) * span - lo)
+        flat = (self.inputs + shift[:, None]).ravel()
+        j = np.searchsorted(flat, log + shift[rows], side='right') - 1 - rows * points
+        j = np.clip(j, 0, max(points - 2, 0))
+        k = np.minimum(j + 1, points - 1)
+
+        x0 = self.inputs[rows, j]
+        x1 = self.inputs[rows, k]
+        y0 = self.growth[rows, j]
+        y1 = self.growth[rows, k]
+        width = x1 - x0
+        weight = np.divide(log - x0, width, out=np.zeros_like(log), where=width > 0)
+        return np.minimum(y0 + weight * (y1 - y0), MAX_GROWTH)
+
+
+class Growth:
+    """The predicted growth of a circuit in every state.
+
+    Attributes
+    ----------
+    gates : pycello.table.Table
+        The relative growth of the cells with each gate node, in each state.
+
+    """
+
+    def __init__(self, gates):
+        self.gates = gates
+
+    def states(self):
+        """Get the growth of the circuit in each state, the product over gates."""
+        return np.prod(self.gates.values, axis=0)
+
+    def gate_growth(self):
+        """Get the growth of each gate node, the minimum over states, by name."""
+        return dict(zip(self.gates.names, np.min(self.gates.values, axis=1).tolist()))
+
+    def circuit_growth(self):
+        """Get the growth of the circuit, the minimum over states."""
+        return float(np.min(self.states())) if self.gates.states else 1.0
+
+
+def gate_inputs(netlist, activity):
+    """Get the input of every gate node of a netlist in every state.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    activity : pycello.table.Table or dict
+        The activity of each node in each state.
+
+    Returns
+    -------
+    nodes : list
+        The gate nodes, in netlist order.
+    x : numpy.ndarray
+        The sum of the activity of the inputs of each node, of shape
+        (nodes, states).
+
+    """
+    nodes = [node for node in netlist.nodes if node.type in GATE_TYPES]
+    states = len(np.atleast_1d(activity[nodes[0].name])) if nodes else 0
+    x = np.zeros((len(nodes), states))
+    for i, node in enumerate(nodes):
+        for u in netlist.graph.fanin[node]:
+            x[i] += activity[u.name]
+    return nodes, x
+
+
+def predict(netlist, toxicity, activity=None, inputs=None):
+    """Predict the growth of cells carrying a circuit in every state.
+
+    Parameters
+    ----------
+    netlist : pycello.netlist.Netlist
+    toxicity : Toxicity
+        The toxicity tables, e.g. from `Toxicity.from_ucf`.
+    activity : pycello.table.Table or dict, optional
+        The activity of each node in each state. Defaults to the activity
+        simulated by `pycello.activity.activity_table`.
+    inputs : list, optional
+        The names of the primary input nodes, in truth table order, for the
+        simulated activity.
+
+    Returns
+    -------
+    Growth
+
+    Raises
+    ------
+    ValueError
+        If a gate node has no gate bound, or a gate has no toxicity table.
+
+    """
+    if activity is None:
+        activity = pycello.activity.activity_table(netlist, inputs)
+    nodes, x = gate_inputs(netlist, activity)
+    unbound = [node.name for node in nodes if node.gate is None]
+    if unbound:
+        raise ValueError("No gate bound to nodes {}.".format(", ".join(unbound)))
+    rows = toxicity.rows([node.gate.name for node in nodes])
+    growth = toxicity.interpolate(rows[:, None], x)
+    return Growth(pycello.table.Table([node.name for node in nodes], growth))
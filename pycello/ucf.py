@@ -1,12 +1,34 @@
+import json
+import re
+
+import numpy as np
+
+import pycello.equation
+
 __author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
 __license__ = 'GPL3'
 
 
 class Gate:
 
+    __response = None
+
     def __init__(self):
         self.name = ""
         self.promoter = ""
+        self.group = None
+        self.parts = []
+        self.equation = None
+        self.parameters = {}
+        self.variables = []
+        self.color = None
+
+    def __getstate__(self):
+        # the compiled response function is rebuilt on first use
+        state = self.__dict__.copy()
+        state.pop('_Gate__response', None)
+        state.pop('_Gate__response_parameters', None)
+        return state
 
     def __lt__(self, other):
         return self.name < other.name
@@ -53,6 +75,7 @@ class Gate:
     @equation.setter
     def equation(self, equation):
         self.__equation = equation
+        self.__response = None
 
     @property
     def parameters(self):
@@ -69,6 +92,23 @@ class Gate:
     @variables.setter
     def variables(self, variables):
         self.__variables = variables
+        self.__response = None
+
+    @property
+    def response(self):
+        """The response function, compiled with the current parameters.
+
+        See `pycello.equation.compile_equation`. The function is compiled on
+        first use and again whenever the equation, variables or parameters
+        change.
+
+        """
+        if self.__response is None or self.__response_parameters != self.parameters:
+            self.__response = pycello.equation.compile_equation(
+                self.equation, self.parameters, self.variables
+            )
+            self.__response_parameters = dict(self.parameters)
+        return self.__response
 
     @property
     def color(self):
@@ -156,71 +196,418 @@ class Ribozyme(Part):
         self.__efficiency = efficiency
 
 
+class GateCytometry:
+    """The measured output distributions of a gate, in compact form.
+
+    The counts are held as one contiguous float32 array, and the output
+    bins are shared with every other gate measured on the same bins, see
+    `UCF.cytometry`.
+
+    Parameters
+    ----------
+    gate_name : str
+    inputs : numpy.ndarray
+        The input level of each distribution.
+    bins : numpy.ndarray
+        The output value of each bin, read-only.
+    counts : numpy.ndarray
+        The counts in each bin at each input level, of shape (levels, bins).
+
+    """
+
+    def __init__(self, gate_name, inputs, bins, counts):
+        self.__gate_name = gate_name
+        self.__inputs = inputs
+        self.__bins = bins
+        self.__counts = counts
+
+    @property
+    def gate_name(self):
+        return self.__gate_name
+
+    @property
+    def inputs(self):
+        return self.__inputs
+
+    @property
+    def bins(self):
+        return self.__bins
+
+    @property
+    def counts(self):
+        return self.__counts
+
+
+HANDLERS = {}
+
+_COLLECTION = re.compile(rb'"collection"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+_GATE_NAME = re.compile(rb'"gate_name"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def register_handler(collection):
+    """Register a loader for a UCF collection.
+
+    The decorated function is called as ``handler(ucf, coll)`` once for each
+    entry of the collection, in a single pass over the UCF. Objects without
+    references to other collections should be created and added right away.
+    A handler that needs to resolve such references may return a callable,
+    which is called without arguments once every entry has been dispatched.
+
+    Parameters
+    ----------
+    collection : str
+        The value of the ``collection`` key handled by the function.
+
+    Examples
+    --------
+    >>> @register_handler('measurement_std')
+    ... def load_std(ucf, coll):
+    ...     ucf.units = coll['signal_carrier_units']
+
+    """
+    def decorator(handler):
+        HANDLERS[collection] = handler
+        return handler
+    return decorator
+
+
+@register_handler('parts')
+def _load_part(ucf, coll):
+    if coll['type'] == 'terminator':
+        part = Terminator()
+    elif coll['type'] == 'ribozyme':
+        part = Ribozyme()
+    else:
+        part = Part()
+    part.name = coll['name']
+    part.type = coll['type']
+    part.sequence = coll['dnasequence']
+    ucf.add_part(part)
+
+
+@register_handler('terminators')
+def _load_terminator(ucf, coll):
+    def resolve():
+        terminator = ucf.part(coll['name'])
+        if (terminator):
+            terminator.strength = coll['strength']
+    return resolve
+
+
+@register_handler('ribozymes')
+def _load_ribozyme(ucf, coll):
+    def resolve():
+        ribozyme = ucf.part(coll['name'])
+        if (ribozyme):
+            ribozyme.efficiency = coll['efficiency']
+    return resolve
+
+
+@register_handler('gate_structure')
+def _load_gate_structure(ucf, coll):
+    gate = Gate()
+    gate.name = coll['gate_name']
+    ucf.add_gate(gate)
+
+    def resolve():
+        gate.promoter = ucf.part(coll['output'])
+        # parts = []
+        # for part in coll['expression_cassettes'][0]['cassette_parts']:
+        #     parts.append(ucf.part(part))
+        # gate.parts = parts
+    return resolve
+
+
+@register_handler('gate_parts')
+def _load_gate_parts(ucf, coll):
+    gate = ucf.gate(coll['gate_name'])
+    if not (gate):
+        gate = Gate()
+        gate.name = coll['gate_name']
+        ucf.add_gate(gate)
+
+    def resolve():
+        gate.promoter = ucf.part(coll['promoter'])
+        gate.parts = [ucf.part(part) for part in coll['expression_cassettes'][0]['cassette_parts']]
+    return resolve
+
+
+@register_handler('input_sensors')
+def _load_input_sensor(ucf, coll):
+    sensor = InputSensor()
+    sensor.name = coll['name']
+    ucf.add_gate(sensor)
+    if 'parameters' in coll:
+        sensor.parameters = coll['parameters']
+        values = {param['name']: param['value'] for param in coll['parameters']}
+        sensor.hi = values.get('ymax')
+        sensor.lo = values.get('ymin')
+    if 'signal_high' in coll:
+        sensor.hi = coll['signal_high']
+        sensor.lo = coll['signal_low']
+
+    def resolve():
+        sensor.promoter = ucf.part(coll['promoter'])
+        sensor.parts = [ucf.part(part) for part in coll.get('parts', [])]
+    return resolve
+
+
+@register_handler('output_reporters')
+def _load_output_reporter(ucf, coll):
+    reporter = OutputReporter()
+    reporter.name = coll['name']
+    ucf.add_gate(reporter)
+
+    def resolve():
+        reporter.parts = [ucf.part(part) for part in coll['parts']]
+    return resolve
+
+
+@register_handler('response_functions')
+def _load_response_function(ucf, coll):
+    def resolve():
+        gate = ucf.gate(coll['gate_name'])
+        if not (gate):
+            return
+        gate.equation = coll['equation']
+        parameters = {}
+        for param in coll['parameters']:
+            parameters[param['name']] = param['value']
+        gate.parameters = parameters
+        variables = []
+        for var in coll['variables']:
+            variables.append(var['name'])
+        gate.variables = variables
+    return resolve
+
+
+@register_handler('gates')
+def _load_gate(ucf, coll):
+    def resolve():
+        gate = ucf.gate(coll['gate_name'])
+        if not (gate):
+            return
+        gate.group = coll['group_name']
+        gate.color = coll['color_hexcode']
+    return resolve
+
+
+def scan(buf):
+    """Locate the entries of a UCF JSON array without decoding them.
+
+    Parameters
+    ----------
+    buf : bytes
+        The UCF file contents.
+
+    Yields
+    ------
+    tuple
+        ``(collection, start, end)`` for each entry, where ``buf[start:end]``
+        is the JSON text of the entry.
+
+    """
+    data = np.frombuffer(buf, dtype=np.uint8)
+    quotes = np.flatnonzero(data == ord('"'))
+    # drop quotes escaped by an odd number of backslashes
+    escaped = []
+    for i in (np.flatnonzero(data[quotes[1:] - 1] == ord('\\')) + 1).tolist():
+        j = quotes[i] - 1
+        while buf[j] == ord('\\'):
+            j -= 1
+        if (quotes[i] - 1 - j) % 2:
+            escaped.append(i)
+    quotes = np.delete(quotes, escaped)
+    opens = (data == ord('{')) | (data == ord('['))
+    brackets = np.flatnonzero(opens | (data == ord('}')) | (data == ord(']')))
+    # keep the brackets outside of strings
+    brackets = brackets[np.searchsorted(quotes, brackets) % 2 == 0]
+    delta = np.where(opens[brackets], 1, -1)
+    depth = np.cumsum(delta)
+    starts = brackets[(depth == 2) & (delta == 1)]
+    ends = brackets[(depth == 1) & (delta == -1)] + 1
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        m = _COLLECTION.search(buf, start, end)
+        yield (json.loads(b'"' + m.group(1) + b'"') if m else None), start, end
+
+
+_BUILTIN_HANDLERS = dict(HANDLERS)
+
+
+def _file_reader(path):
+    def read(ranges):
+        with open(path, 'rb') as fp:
+            for start, end in ranges:
+                fp.seek(start)
+                yield fp.read(end - start)
+    return read
+
+
 class UCF:
 
     def __init__(self, ucf):
         self.parts = []
         self.gates = []
+        self.__collections = {}
+        self.__read = None
+        self.__offsets = {}
+        self.__cytometry = None
+        self.__bins = {}
+        self.load(ucf)
+
+    @classmethod
+    def from_path(cls, path, collections=None, cache=None):
+        """Read a UCF file, decoding only the given collections.
+
+        The remaining entries are located but left undecoded until they are
+        requested through `collection`.
+
+        Parameters
+        ----------
+        path : str
+            Path to a UCF JSON file.
+        collections : iterable of str, optional
+            Names of the collections to decode up front. Defaults to the
+            collections with a registered handler.
+        cache : bool or str, optional
+            Open the UCF from a compiled cache keyed by the file contents,
+            creating it if needed, see `pycello.cache`. Either ``True`` for
+            the default cache directory or the path of a directory.
+
+        """
+        with open(path, 'rb') as fp:
+            buf = fp.read()
+        if cache:
+            ucf = pycello.cache.read(buf, cache, collections)
+            if ucf is not None:
+                return ucf
+        located = list(scan(buf))
+        wanted = set(HANDLERS.keys() if collections is None else collections)
+        entries = []
+        offsets = {}
+        for name, start, end in located:
+            if name in wanted:
+                entries.append(json.loads(buf[start:end]))
+            else:
+                offsets.setdefault(name, []).append((start, end))
+        ucf = cls(entries)
+        ucf._defer(_file_reader(path), offsets)
+        if cache and collections is None:
+            pycello.cache.write(ucf, buf, located, cache)
+        return ucf
+
+    def load(self, ucf):
+        """Add the entries of a UCF, or a fragment of one, to this UCF.
+
+        Parameters
+        ----------
+        ucf : list
+            The decoded UCF JSON, e.g. from `json.load`.
+
+        """
+        fixups = []
         for coll in ucf:
-            if coll['collection'] == 'parts':
-                if coll['type'] == 'terminator':
-                    part = Terminator()
-                elif coll['type'] == 'ribozyme':
-                    part = Ribozyme()
-                else:
-                    part = Part()
-                part.name = coll['name']
-                part.type = coll['type']
-                part.sequence = coll['dnasequence']
-                self.parts.append(part)
-        for coll in ucf:
-            if coll['collection'] == 'terminators':
-                terminator = self.part(coll['name'])
-                if (terminator):
-                    terminator.strength = coll['strength']
-            if coll['collection'] == 'ribozymes':
-                ribozyme = self.part(coll['name'])
-                if (ribozyme):
-                    ribozyme.efficiency = coll['efficiency']
-            if coll['collection'] == 'gate_structure':
-                gate = Gate()
-                gate.name = coll['gate_name']
-                gate.promoter = self.part(coll['output'])
-                # parts = []
-                # for part in coll['expression_cassettes'][0]['cassette_parts']:
-                #     parts.append(self.part(part))
-                # gate.parts = parts
-                self.gates.append(gate)
-            if coll['collection'] == 'input_sensors':
-                sensor = InputSensor()
-                sensor.name = coll['name']
-                sensor.promoter = self.part(coll['promoter'])
-                sensor.parameters = coll['parameters']
-                self.gates.append(sensor)
-            if coll['collection'] == 'output_reporters':
-                reporter = OutputReporter()
-                reporter.name = coll['name']
-                parts = []
-                for part in coll['parts']:
-                    parts.append(self.part(part))
-                reporter.parts = parts
-                self.gates.append(reporter)
-        for coll in ucf:
-            if coll['collection'] == 'response_functions':
-                gate = self.gate(coll['gate_name'])
-                gate.equation = coll['equation']
-                parameters = {}
-                for param in coll['parameters']:
-                    parameters[param['name']] = param['value']
-                gate.parameters = parameters
-                variables = []
-                for var in coll['variables']:
-                    variables.append(var['name'])
-                gate.variables = variables
-            if coll['collection'] == 'gates':
-                gate = self.gate(coll['gate_name'])
-                gate.group = coll['group_name']
-                gate.color = coll['color_hexcode']
+            self.__collections.setdefault(coll['collection'], []).append(coll)
+            if coll['collection'] == 'gate_cytometry' and self.__cytometry is not None:
+                self.__cytometry[coll['gate_name']] = coll
+            handler = HANDLERS.get(coll['collection'])
+            if handler is None:
+                continue
+            fixup = handler(self, coll)
+            if fixup is not None:
+                fixups.append(fixup)
+        for fixup in fixups:
+            fixup()
+        # rebuild the promoter and group indexes from the resolved gates
+        self.gates = list(self.gates)
+
+    def _defer(self, read, offsets):
+        """Register undecoded entries, as ``{collection: [(start, end)]}``
+        byte ranges to be fetched with ``read(ranges)`` on first access."""
+        self.__read = read
+        self.__offsets = offsets
+
+    def collection(self, name):
+        """Get the raw entries of a collection, decoding them on first access.
+
+        Parameters
+        ----------
+        name : str
+            The collection name, e.g. ``'gate_cytometry'``.
+
+        """
+        offsets = self.__offsets.pop(name, None)
+        if offsets:
+            entries = self.__collections.setdefault(name, [])
+            for text in self.__read(offsets):
+                entries.append(json.loads(text))
+        return self.__collections.get(name, [])
+
+    def __index_cytometry(self):
+        # map each gate to its decoded entry, or to the byte range of its
+        # entry while it is still undecoded
+        self.__cytometry = {}
+        for entry in self.__collections.get('gate_cytometry', []):
+            self.__cytometry[entry['gate_name']] = entry
+        ranges = self.__offsets.get('gate_cytometry', [])
+        for text, (start, end) in zip(self.__read(ranges) if ranges else [], ranges):
+            m = _GATE_NAME.search(text)
+            if m:
+                self.__cytometry[json.loads(b'"' + m.group(1) + b'"')] = (start, end)
+
+    def cytometry_gates(self):
+        """Get the names of the gates with cytometry data."""
+        if self.__cytometry is None:
+            self.__index_cytometry()
+        return list(self.__cytometry)
+
+    def cytometry(self, name):
+        """Get the cytometry of a gate.
+
+        Only the entry of the gate is decoded, on first access. Its counts
+        are stored as float32, and its bins are shared by every gate with
+        equal bins, so the memory held scales with the number of distinct
+        bin grids rather than gates and input levels.
+
+        Parameters
+        ----------
+        name : str
+            The gate name.
+
+        Returns
+        -------
+        GateCytometry or None
+            ``None`` if the gate has no ``gate_cytometry`` entry.
+
+        Raises
+        ------
+        ValueError
+            If the input levels of the gate are measured on different bins.
+
+        """
+        if self.__cytometry is None:
+            self.__index_cytometry()
+        entry = self.__cytometry.get(name)
+        if entry is None or isinstance(entry, GateCytometry):
+            return entry
+        if isinstance(entry, tuple):
+            entry = json.loads(next(iter(self.__read([entry]))))
+        data = entry['cytometry_data']
+        if any(level['output_bins'] != data[0]['output_bins'] for level in data[1:]):
+            raise ValueError("Cytometry of gate {} has different bins per input level.".format(name))
+        bins = np.array(data[0]['output_bins'] if data else [], dtype=np.float64)
+        key = bins.tobytes()
+        if key not in self.__bins:
+            bins.flags.writeable = False
+            self.__bins[key] = bins
+        counts = np.array([level['output_counts'] for level in data], dtype=np.float32)
+        rtn = GateCytometry(name,
+                            np.array([level['input'] for level in data], dtype=np.float64),
+                            self.__bins[key],
+                            counts.reshape(len(data), len(bins)))
+        self.__cytometry[name] = rtn
+        return rtn
 
     @property
     def parts(self):
@@ -228,12 +615,24 @@ class UCF:
 
     @parts.setter
     def parts(self, parts):
-        self.__parts = parts
+        self.__parts = []
+        self.__part_index = {}
+        self.__type_index = {}
+        for part in parts:
+            self.add_part(part)
+
+    def add_part(self, part):
+        """Add a part, updating the name and type indexes."""
+        self.__parts.append(part)
+        self.__part_index[part.name] = part
+        self.__type_index.setdefault(part.type, []).append(part)
 
     def part(self, name):
-        for part in self.parts:
-            if part.name == name:
-                return part
+        return self.__part_index.get(name)
+
+    def parts_of_type(self, type):
+        """Get all parts of a given type, e.g. ``'promoter'``."""
+        return self.__type_index.get(type, [])
 
     @property
     def gates(self):
@@ -241,9 +640,34 @@ class UCF:
 
     @gates.setter
     def gates(self, gates):
-        self.__gates = gates
+        self.__gates = []
+        self.__gate_index = {}
+        self.__promoter_index = {}
+        self.__group_index = {}
+        for gate in gates:
+            self.add_gate(gate)
+
+    def add_gate(self, gate):
+        """Add a gate, updating the name, promoter and group indexes."""
+        self.__gates.append(gate)
+        self.__gate_index[gate.name] = gate
+        if gate.promoter:
+            self.__promoter_index.setdefault(gate.promoter.name, []).append(gate)
+        group = getattr(gate, 'group', None)
+        if group is not None:
+            self.__group_index.setdefault(group, []).append(gate)
 
     def gate(self, name):
-        for gate in self.gates:
-            if gate.name == name:
-                return gate
+        return self.__gate_index.get(name)
+
+    def promoter_gates(self, name):
+        """Get the gates whose output promoter has the given name."""
+        return self.__promoter_index.get(name, [])
+
+    def group(self, name):
+        """Get the gates belonging to a given gate group."""
+        return self.__group_index.get(name, [])
+
+
+# imported last, as the cache module builds on the classes above
+import pycello.cache  # noqa: E402
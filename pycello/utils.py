@@ -1,6 +1,5 @@
 from pycello.netlist import Component, Node, Netlist, Placement
 from pycello.ucf import Gate, Part
-import sympy
 
 __author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
 __license__ = 'GPL3'
@@ -15,11 +14,7 @@ def get_upstream_nodes(node: Node, netlist: Netlist):
     netlist : pycello.netlist.Netlist
 
     """
-    upstream = []
-    for edge in netlist.edges:
-        if edge.dst == node:
-            upstream.append(edge.src)
-    return upstream
+    return list(netlist.graph.fanin[node])
 
 
 def get_upstream_node(promoter: Part, node: Node, netlist: Netlist):
@@ -32,10 +27,7 @@ def get_upstream_node(promoter: Part, node: Node, netlist: Netlist):
     netlist : pycello.netlist.Netlist
 
     """
-    for upstream in get_upstream_nodes(node, netlist):
-        gate = upstream.gate
-        if gate.promoter == promoter:
-            return upstream
+    return netlist.graph.upstream_node(promoter, node)
 
 
 def get_cds(component: Component):
@@ -83,12 +75,7 @@ def get_components(node: Node, placement: Placement):
     placement : pycello.netlist.Placement
 
     """
-    components = []
-    for group in placement.groups:
-        for component in group.components:
-            if component.node == node:
-                components.append(component)
-    return components
+    return list(placement.node_components(node))
 
 
 def evaluate_equation(gate: Gate, variables: dict):
@@ -98,26 +85,11 @@ def evaluate_equation(gate: Gate, variables: dict):
     ----------
     gate : pycello.ucf.Gate
     variables: dict
+        Values of the variables, as floats or NumPy arrays.
+
+    Returns
+    -------
+    float or numpy.ndarray
 
     """
-    param_str = ""
-    for param in gate.parameters.keys():
-        param_str += param + " "
-    param_syms = sympy.symbols(param_str)
-    if type(param_syms) is not tuple:
-        param_syms = (param_syms,)
-    var_str = ""
-    for var in variables.keys():
-        var_str += var
-    var_syms = sympy.symbols(var_str)
-    if type(var_syms) is not tuple:
-        var_syms = (var_syms,)
-    expr = sympy.simplify(gate.equation)
-
-    subs = []
-    for param in param_syms:
-        subs += ((param, gate.parameters[param.name]),)
-    for var in var_syms:
-        subs += ((var, variables[var.name]),)
-
-    return expr.subs(subs)
+    return gate.response(**variables)
@@ -22,8 +22,7 @@ def main():
                         required=False, help="Output file.", metavar="FILE")
     args = parser.parse_args()
 
-    with open(args.ucf, 'r') as ucf_file:
-        ucf = pycello.ucf.UCF(json.load(ucf_file))
+    ucf = pycello.ucf.UCF.from_path(args.ucf, cache=True)
     with open(args.netlist, 'r') as netlist_file:
         netlist = pycello.netlist.Netlist(json.load(netlist_file), ucf)
 
@@ -3,36 +3,21 @@ import matplotlib.pyplot as plt
 from matplotlib.ticker import FixedLocator, NullLocator
 import argparse
 import json
-import csv
 import dnaplotlib as dpl
 import logging
 import re
 
+import pycello.coverage
 import pycello.netlist
 import pycello.dnaplotlib
+import pycello.rnaseq
+import pycello.table
 import pycello.ucf
-import pycello.utils
 
 __author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
 __license__ = 'GPL3'
 
 
-BASAL_TRANSCRIPTION = 1e-6
-TOLERANCE = 1e-5
-
-
-def get_node_logic(node, logic):
-    for row in logic:
-        if row[0] == node.name:
-            return row[1:]
-
-
-def get_node_activity(node, activity):
-    for row in activity:
-        if row[0] == node.name:
-            return row[1:]
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="Plot RNAseq profile from predicted RPU."
@@ -58,27 +43,12 @@ def main():
     level = logging.DEBUG if args.debug else logging.INFO
     logging.basicConfig(format='%(levelname)s:%(message)s', level=level)
 
-    activity = []
-    logic = []
-    with open(args.ucf, 'r') as ucf_file:
-        ucf = json.load(ucf_file)
+    ucf = pycello.ucf.UCF.from_path(args.ucf, cache=True)
     with open(args.sensors, 'r') as sensors_file:
-        sensors = json.load(sensors_file)
+        ucf.load(json.load(sensors_file))
     with open(args.outputs, 'r') as outputs_file:
-        outputs = json.load(outputs_file)
-    for item in sensors:
-        ucf.append(item)
-    for item in outputs:
-        ucf.append(item)
-    ucf = pycello.ucf.UCF(ucf)
-    with open(args.activity, 'r') as activity_file:
-        activity_reader = csv.reader(activity_file)
-        for row in activity_reader:
-            activity.append(row)
-    with open(args.logic, 'r') as logic_file:
-        logic_reader = csv.reader(logic_file)
-        for row in logic_reader:
-            logic.append(row)
+        ucf.load(json.load(outputs_file))
+    activity, logic = pycello.table.read_tables(args.activity, args.logic)
     with open(args.netlist, 'r') as netlist_file:
         text = netlist_file.read();
         text = re.sub(r"(\")\s*,\s*(})", r"\1\2", text)
@@ -97,6 +67,9 @@ def main():
     # placement = netlist.placements[0]
     for placement_num, placement in enumerate(netlist.placements):
 
+        program = pycello.rnaseq.Program(netlist, placement)
+        flux = program.run(activity)
+
         skip = []
         for i, group in enumerate(placement.groups):
             f = True
@@ -106,7 +79,7 @@ def main():
                     skip.append(i)
                     break
 
-        num_plots = len(logic[0])
+        num_plots = logic.states + 1
 
         widths = [len(group.sequence) for i, group in enumerate(placement.groups) if i not in skip]
 
@@ -131,52 +104,6 @@ def main():
                 ax = fig.add_subplot(gs[row, col], sharex=sharex, sharey=sharey)
                 axes_row.append(ax)
 
-                profile = []
-                temp = []
-                for component in group.components:
-                    for part in component.parts:
-                        temp.append(1.0)
-                        profile.append(100.0)
-
-                iteration = 0
-                while (np.max(np.abs(np.array(profile) - np.array(temp))) > TOLERANCE):
-                    format_str = "state: {:>4d}  group: {:>4d}  iteration: {:>4d}"
-                    logging.debug(format_str.format(row, col, iteration))
-                    temp = profile.copy()
-                    profile = []
-                    for i, component in enumerate(group.components):
-                        for j, part_instance in enumerate(component.parts):
-                            # offset to which we add the flux
-                            # (readthrough, upstream promoter flux)
-                            if j == 0 and i > 0:
-                                offset = group.components[i-1].parts[-1].flux
-                            elif j > 0:
-                                offset = component.parts[j-1].flux
-                            else:
-                                offset = 0.0
-
-                            if part_instance.part.type == 'promoter':
-                                upstream_node = pycello.utils.get_upstream_node(part_instance.part, component.node, netlist)
-                                if upstream_node.type == 'PRIMARY_INPUT':
-                                    delta_flux = float(get_node_activity(upstream_node, activity)[row])
-                                else:
-                                    upstream_components = pycello.utils.get_components(upstream_node, placement)
-                                    input_flux = 0.0
-                                    for upstream_component in upstream_components:
-                                        input_flux += upstream_component.parts[-2].flux
-                                    delta_flux = pycello.utils.evaluate_equation(upstream_node.gate, {'x': input_flux})
-                                part_instance.flux = pycello.utils.get_ribozyme(component).efficiency * delta_flux + offset
-                            if part_instance.part.type == 'ribozyme':
-                                part_instance.flux = offset / pycello.utils.get_ribozyme(component).efficiency
-                            if part_instance.part.type in ('cds', 'rbs'):
-                                part_instance.flux = offset
-                            if part_instance.part.type == 'terminator':
-                                part_instance.flux = offset / part_instance.part.strength
-
-                            profile.append(part_instance.flux)
-
-                    iteration += 1
-
                 col += 1
 
                 ax.set_yscale('log')
@@ -185,74 +112,13 @@ def main():
                 if col > 0:
                     plt.setp(ax.get_yticklabels(), visible=False)
 
-                x = []
-                y = []
-                last_x = 0
-                last_y = BASAL_TRANSCRIPTION
-
-                for i, component in enumerate(group.components):
-                    x.append([])
-                    y.append([])
-
-                    for j, part_instance in enumerate(component.parts):
-                        if j == 0:
-                            initial_x = last_x
-                            initial_y = last_y
-                        else:
-                            initial_x = x[-1][-1]
-                            initial_y = y[-1][-1]
-
-                        if part_instance.part.type == 'terminator':
-                            x[-1].append(initial_x)
-                            x[-1].append(initial_x + int(0.5*len(part_instance.part.sequence)))
-                            x[-1].append(initial_x + int(0.5*len(part_instance.part.sequence)))
-                            x[-1].append(initial_x + len(part_instance.part.sequence))
-                            y[-1].append(initial_y)
-                            y[-1].append(initial_y)
-                            y[-1].append(part_instance.flux)
-                            y[-1].append(part_instance.flux)
-                        elif part_instance.part.type == 'promoter':
-                            x[-1].append(initial_x)
-                            x[-1].append(initial_x + len(part_instance.part.sequence))
-                            x[-1].append(initial_x + len(part_instance.part.sequence))
-                            y[-1].append(initial_y)
-                            y[-1].append(initial_y)
-                            y[-1].append(part_instance.flux)
-                        elif part_instance.part.type == 'ribozyme':
-                            x[-1].append(initial_x)
-                            x[-1].append(initial_x + 7)
-                            x[-1].append(initial_x + 7)
-                            x[-1].append(initial_x + len(part_instance.part.sequence))
-                            y[-1].append(initial_y)
-                            y[-1].append(initial_y)
-                            y[-1].append(part_instance.flux)
-                            y[-1].append(part_instance.flux)
-                        else:
-                            x[-1].append(initial_x)
-                            x[-1].append(initial_x + len(part_instance.part.sequence))
-                            y[-1].append(part_instance.flux)
-                            y[-1].append(part_instance.flux)
-
-                    if i == 0:
-                        pre_x = []
-                        pre_y = []
-                    else:
-                        pre_x = [last_x, ]
-                        pre_y = [last_y, ]
-
-                    x[-1] = pre_x + x[-1]
-                    y[-1] = pre_y + y[-1]
-
-                    last_x = x[-1][-1]
-                    last_y = y[-1][-1]
-
-                for i, component in enumerate(group.components):
-                    this_x = np.array(x[i], dtype=np.float64)
-                    this_y = np.array(y[i], dtype=np.float64)
-                    ax.plot(this_x, this_y, '-', color='black', lw=1)
-                    ax.fill_between(this_x, this_y, 1e-10, fc='black', alpha=0.1)
+                starts, ends, values = pycello.coverage.segments(group, flux[row:row+1], program.parts)
+                this_x = np.column_stack([starts, ends]).ravel()
+                this_y = np.repeat(values[0], 2)
+                ax.plot(this_x, this_y, '-', color='black', lw=1)
+                ax.fill_between(this_x, this_y, 1e-10, fc='black', alpha=0.1)
 
-                ax.set_xlim(x[0][0], x[-1][-1])
+                ax.set_xlim(this_x[0], this_x[-1])
                 ax.set_ylim(1e-4, 1e2)
 
         j = 0
@@ -17,9 +17,11 @@ setup(
     url="https://github.com/CIDARLAB/pycello-v2",
     packages=find_packages(),
     install_requires=[
-        "sympy>=1.5",
         "numpy>=1.17"
     ],
+    extras_require={
+        "sympy": ["sympy>=1.5"]
+    },
     long_description=read('README.org'),
     classifiers=[
         "Development Status :: 3 - Alpha",
@@ -0,0 +1,68 @@
+from .context import pycello
+import pycello.activity
+import pycello.netlist
+import pycello.rnaseq
+import pycello.table
+import pycello.ucf
+import numpy as np
+import json
+import unittest
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class TestActivity(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestActivity, self).__init__(*args, **kwargs)
+
+        self.ucf = pycello.ucf.UCF.from_path('examples/Eco1C1G1T1-synbiohub.UCF.json')
+        with open('examples/and_outputNetlist.json') as netlist_file:
+            self.netlist = pycello.netlist.Netlist(json.load(netlist_file), self.ucf)
+
+    def test_truth_table(self):
+        table = pycello.activity.truth_table(3)
+        self.assertEqual(table.shape, (3, 8), "Incorrect truth table shape.")
+        np.testing.assert_array_equal(table[0], [0, 0, 0, 0, 1, 1, 1, 1])
+        np.testing.assert_array_equal(table[2], [0, 1, 0, 1, 0, 1, 0, 1])
+
+    def test_activity_table(self):
+        # the Cello activity table has b as the most significant input
+        table = pycello.activity.activity_table(self.netlist, inputs=['b', 'a'])
+        ref = pycello.table.read_csv('examples/and_activity.csv')
+
+        self.assertEqual(table.names, [node.name for node in self.netlist.nodes], "Incorrect node order.")
+        # $48 and out differ from the reference, see test_reference_differences
+        for name in ('a', 'b', '$49'):
+            np.testing.assert_allclose(table[name], ref[name], rtol=1e-5, err_msg=name)
+        np.testing.assert_array_equal(table['out'], table['$50'])
+        gate = self.netlist.node('$50').gate
+        np.testing.assert_allclose(table['$50'], gate.response(table['$48'] + table['$49']))
+
+        # the table drives a simulation directly
+        flux, parts = pycello.rnaseq.simulate(self.netlist, self.netlist.placements[0], table)
+        self.assertEqual(flux.shape, (4, len(parts)), "Incorrect result shape.")
+
+        with self.assertRaises(ValueError):
+            pycello.activity.activity_table(self.netlist, inputs=['a', '$48'])
+
+    def test_reference_differences(self):
+        ref = pycello.table.read_csv('examples/and_activity.csv')
+
+        # the reference $48 is the response of S4_SrpR, not of the bound S3_SrpR
+        self.assertEqual(self.netlist.node('$48').gate.name, 'S3_SrpR', "Incorrect bound gate.")
+        np.testing.assert_allclose(ref['$48'], self.ucf.gate('S4_SrpR').response(ref['a']), rtol=1e-5)
+        # and the reference out is 0.4 times its $50
+        np.testing.assert_allclose(ref['out'], 0.4 * ref['$50'], rtol=1e-5)
+
+        # with S4_SrpR bound, every other node matches the reference
+        self.netlist.node('$48').gate = self.ucf.gate('S4_SrpR')
+        table = pycello.activity.activity_table(self.netlist, inputs=['b', 'a'])
+        for name in ('a', 'b', '$48', '$49', '$50'):
+            np.testing.assert_allclose(table[name], ref[name], rtol=1e-3, err_msg=name)
+        np.testing.assert_array_equal(table['out'], table['$50'])
+
+
+if __name__ == '__main__':
+    unittest.main()
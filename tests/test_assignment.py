@@ -0,0 +1,73 @@
+from .context import pycello
+import pycello.activity
+import pycello.assignment
+import pycello.netlist
+import pycello.ucf
+import numpy as np
+import concurrent.futures
+import json
+import unittest
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class TestAssignment(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestAssignment, self).__init__(*args, **kwargs)
+
+        self.ucf = pycello.ucf.UCF.from_path('examples/Eco1C1G1T1-synbiohub.UCF.json')
+        self.library = pycello.assignment.Library.from_ucf(self.ucf)
+        with open('examples/0x78_Netlist.json') as netlist_file:
+            self.netlist = pycello.netlist.Netlist(json.load(netlist_file), self.ucf)
+
+    def test_library(self):
+        self.assertEqual(len(self.library), 20)
+        self.assertEqual(len(self.library.groups), 12)
+        x = np.logspace(-3, 1, 5)
+        gates = np.arange(len(self.library))
+        y = self.library.response(gates, np.tile(x, (len(gates), 1)))
+        for i, gate in enumerate(self.library.gates):
+            np.testing.assert_allclose(y[i], gate.response(x), err_msg=gate.name)
+
+    def test_score(self):
+        assigner = pycello.assignment.Assigner(self.netlist, self.library)
+        assignment = assigner.assignment()
+        self.assertEqual(assigner.gates(assignment)['A1_AmtR'], 'A1_AmtR')
+
+        activity = pycello.activity.activity_table(self.netlist)
+        y = assigner.evaluate(assignment)[0, 0]
+        np.testing.assert_allclose(y, activity['output_YFP'])
+        on = assigner.on[0]
+        self.assertAlmostEqual(assigner.score(assignment)[0], y[on].min() / y[~on].max())
+
+        assignments = assigner.random(1000, 0)
+        self.assertTrue(assigner.valid(assignments).all(), "Invalid random assignments.")
+        moved = assigner.neighbors(assignments, np.random.default_rng(0))
+        self.assertTrue(assigner.valid(moved).all(), "Invalid moves.")
+        self.assertFalse(assigner.valid([[0, 1, 1, 2, 3]])[0], "Repeated gate is valid.")
+
+    def test_anneal(self):
+        assigner = pycello.assignment.Assigner(self.netlist, self.library)
+        best, scores = pycello.assignment.anneal(assigner, chains=16, steps=100, seed=0)
+        self.assertTrue(assigner.valid(best).all())
+        np.testing.assert_allclose(scores, assigner.score(best))
+        self.assertGreater(scores[0], assigner.score(assigner.assignment())[0])
+
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            _, parallel = pycello.assignment.anneal(assigner, chains=16, steps=100, seed=0,
+                                                    executor=executor, tasks=2)
+        self.assertEqual(len(parallel), 16)
+
+        # the assigner and its library are pickled to worker processes, and
+        # the chains give the same results there
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:
+            best, processes = pycello.assignment.anneal(assigner, chains=16, steps=100, seed=0,
+                                                        executor=executor, tasks=2)
+        np.testing.assert_allclose(processes, parallel)
+        np.testing.assert_allclose(processes, assigner.score(best))
+
+
+if __name__ == '__main__':
+    unittest.main()
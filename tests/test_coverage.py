@@ -0,0 +1,108 @@
+from .context import pycello
+import pycello.coverage
+import pycello.netlist
+import pycello.rnaseq
+import pycello.ucf
+import numpy as np
+import io
+import json
+import os
+import tempfile
+import unittest
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class TestCoverage(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestCoverage, self).__init__(*args, **kwargs)
+
+        ucf = pycello.ucf.UCF.from_path('examples/Eco1C1G1T1-synbiohub.UCF.json')
+        with open('examples/and_outputNetlist.json') as netlist_file:
+            self.netlist = pycello.netlist.Netlist(json.load(netlist_file), ucf)
+        self.activity = {'a': np.array([0.0034, 0.0034, 2.8, 2.8]),
+                         'b': np.array([0.0013, 4.4, 0.0013, 4.4])}
+        self.placement = self.netlist.placements[0]
+        self.flux, self.parts = pycello.rnaseq.simulate(self.netlist, self.placement, self.activity)
+
+    def test_coverage(self):
+        group = self.placement.groups[0]
+        bases = pycello.coverage.coverage(group, self.flux, self.parts)
+        column = {p: i for i, p in enumerate(self.parts)}
+
+        self.assertEqual(bases.shape, (4, len(group.sequence)), "Incorrect coverage shape.")
+        position = 0
+        previous = np.full(4, pycello.rnaseq.BASAL_TRANSCRIPTION)
+        for component in group.components:
+            for part_instance in component.parts:
+                length = len(part_instance.part.sequence)
+                flux = self.flux[:, column[part_instance]]
+                if part_instance.part.type == 'promoter':
+                    np.testing.assert_array_equal(bases[:, position + length - 1], previous)
+                elif part_instance.part.type == 'terminator':
+                    np.testing.assert_array_equal(bases[:, position + length // 2 - 1], previous)
+                    np.testing.assert_array_equal(bases[:, position + length // 2], flux)
+                elif part_instance.part.type == 'ribozyme':
+                    np.testing.assert_array_equal(bases[:, position + 6], previous)
+                    np.testing.assert_array_equal(bases[:, position + 7], flux)
+                else:
+                    np.testing.assert_array_equal(bases[:, position], flux)
+                previous = flux
+                position += length
+
+        binned = pycello.coverage.coverage(group, self.flux, self.parts, binsize=100)
+        self.assertEqual(binned.shape[1], -(-len(group.sequence) // 100), "Incorrect number of bins.")
+        np.testing.assert_allclose(binned[:, 0], bases[:, :100].mean(axis=1))
+        np.testing.assert_allclose(binned[:, -1], bases[:, (binned.shape[1] - 1) * 100:].mean(axis=1))
+
+    def test_tracks(self):
+        out = io.StringIO()
+        pycello.coverage.write_bedgraph(out, self.placement, self.flux, self.parts, 1)
+        records = [line.split('\t') for line in out.getvalue().splitlines()]
+        for group in self.placement.groups:
+            bases = pycello.coverage.coverage(group, self.flux, self.parts)[1]
+            rows = [row for row in records if row[0] == group.name]
+            self.assertEqual(int(rows[-1][2]), len(bases), "Track does not cover the group.")
+            for _, start, end, value in rows:
+                np.testing.assert_allclose(bases[int(start):int(end)], float(value), rtol=1e-5)
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = pycello.coverage.export(self.netlist, self.activity, os.path.join(directory, 'and'),
+                                            format='wig', binsize=10)
+            self.assertEqual(len(paths), 4 * len(self.netlist.placements), "Incorrect number of tracks.")
+            with open(paths[0]) as wig:
+                lines = wig.read().splitlines()
+            self.assertTrue(lines[1].startswith('fixedStep chrom=plasmid'), "Missing WIG header.")
+
+    def test_score(self):
+        predicted = {group.name: pycello.coverage.coverage(group, self.flux, self.parts)
+                     for group in self.placement.groups}
+        out = io.StringIO()
+        pycello.coverage.write_bedgraph(out, self.placement, self.flux, self.parts, 2)
+        out.seek(0)
+        read = pycello.coverage.read_bedgraph(out, self.placement)
+        for name, bases in read.items():
+            np.testing.assert_allclose(bases, predicted[name][2], rtol=1e-5)
+
+        # two samples: the prediction itself, and twice the prediction
+        measured = {name: np.stack([bases, 2 * bases]) for name, bases in predicted.items()}
+        fit = pycello.coverage.score(self.placement, self.flux, self.parts, measured, pseudocount=0.0)
+
+        self.assertEqual(fit.part_error.shape, (2, 4, len(fit.parts)), "Incorrect error shape.")
+        np.testing.assert_allclose(fit.part_error[0], 0.0, atol=1e-12)
+        np.testing.assert_allclose(fit.part_error[1], 1.0)
+        np.testing.assert_allclose(fit.component_error[1], 1.0)
+        self.assertEqual(len(fit.components), sum(len(g.components) for g in self.placement.groups))
+        strength = fit.terminator_strength[1]
+        np.testing.assert_allclose(strength[~np.isnan(strength)], fit.predicted_strength[~np.isnan(strength)])
+        np.testing.assert_allclose(fit.promoter_activity[1], 2 * fit.predicted_activity)
+        # in the AND gate, the readthrough of each terminator is its strength
+        index = fit.terminators.index(self.placement.groups[0].components[0].parts[-1])
+        terminator = fit.terminators[index]
+        self.assertAlmostEqual(fit.predicted_strength[0, index], terminator.part.strength, places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+from .context import pycello
+import pycello.activity
+import pycello.cytometry
+import pycello.netlist
+import pycello.ucf
+import numpy as np
+import json
+import unittest
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class TestCytometry(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestCytometry, self).__init__(*args, **kwargs)
+
+        self.ucf = pycello.ucf.UCF.from_path('examples/Eco1C1G1T1-synbiohub.UCF.json')
+        self.cytometry = pycello.cytometry.load(self.ucf)
+
+    def test_histogram(self):
+        gate = self.cytometry['S3_SrpR']
+        np.testing.assert_allclose(gate.histogram(gate.inputs), gate.counts)
+        np.testing.assert_allclose(gate.histogram(np.array([0.0, 1e6])), gate.counts[[0, -1]])
+        middle = gate.histogram(np.sqrt(gate.inputs[:2].prod()))
+        np.testing.assert_allclose(middle, gate.counts[:2].mean(axis=0))
+
+    def test_calibrate(self):
+        gate = self.ucf.gate('S3_SrpR')
+        calibrated = self.cytometry['S3_SrpR'].calibrate(gate.response)
+        np.testing.assert_allclose(calibrated.counts.sum(axis=1), 1.0)
+        mean = calibrated.counts @ np.log(calibrated.bins)
+        step = np.log(calibrated.bins[1] / calibrated.bins[0])
+        np.testing.assert_array_less(np.abs(mean - np.log(gate.response(calibrated.inputs))), 2 * step)
+
+    def test_simulate(self):
+        with open('examples/and_outputNetlist.json') as netlist_file:
+            netlist = pycello.netlist.Netlist(json.load(netlist_file), self.ucf)
+        result = pycello.cytometry.simulate(netlist, self.cytometry, inputs=['b', 'a'])
+        np.testing.assert_allclose(result.distributions.sum(axis=-1), 1.0)
+
+        # the calibrated distributions follow the response functions
+        activity = pycello.activity.activity_table(netlist, inputs=['b', 'a'])
+        mean = result['out'] @ np.log10(result.grid.bins)
+        np.testing.assert_allclose(mean, np.log10(activity['out']), atol=0.2)
+
+        overlap = result.overlap('out')
+        self.assertEqual(overlap.shape, (1, 3))
+        self.assertLess(overlap.max(), 0.1, "ON and OFF states of AND are not separated.")
+
+
+if __name__ == '__main__':
+    unittest.main()
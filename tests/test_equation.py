@@ -0,0 +1,91 @@
+from .context import pycello
+import pycello.equation
+import numpy as np
+import subprocess
+import sys
+import unittest
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class TestEquation(unittest.TestCase):
+
+    def test_compile_equation(self):
+        parameters = {'ymax': 3.8, 'ymin': 0.06, 'K': 0.07, 'n': 1.6}
+        f = pycello.equation.compile_equation('ymin+(ymax-ymin)/(1.0+(x/K)^n)', parameters, ['x'])
+
+        x = np.array([0.001, 0.07, 2.0])
+        ref = 0.06 + (3.8 - 0.06) / (1.0 + (x / 0.07)**1.6)
+
+        self.assertIsInstance(f(0.07), float, "Scalar input should give a float.")
+        self.assertAlmostEqual(f(x=0.07), ref[1], msg="Incorrect keyword evaluation.")
+        np.testing.assert_allclose(f(x), ref)
+
+    def test_grammar(self):
+        parameters = {'a': 2.0, 'b': 3.0}
+        cases = {
+            '-x^2': lambda x: -x**2,
+            'a^b^x': lambda x: 2.0**(3.0**x),
+            'x**-a': lambda x: x**-2.0,
+            '1e-1*exp(x)/sqrt(a)+ln(b)': lambda x: 0.1*np.exp(x)/np.sqrt(2.0)+np.log(3.0),
+            'max(x, a) - -b': lambda x: np.maximum(x, 2.0) + 3.0,
+        }
+        x = np.linspace(0.5, 2.5, 5)
+        for equation, ref in cases.items():
+            f = pycello.equation.compile_equation(equation, parameters, ['x'])
+            np.testing.assert_allclose(f(x), ref(x), err_msg=equation)
+
+    def test_derivative(self):
+        parameters = {'a': 2.0, 'b': 3.0}
+        cases = ['ymin+(ymax-ymin)/(1.0+(x/K)^n)', '-x^2', 'a^b^x', 'x**-a', 'x^x',
+                 '1e-1*exp(x)/sqrt(a)+ln(b)', 'max(x, a) - -b', 'pow(a, x)*log10(x)']
+        x = np.linspace(0.55, 2.55, 5)
+        h = 1e-6
+        hill = {'ymin': 0.06, 'ymax': 3.8, 'K': 0.07, 'n': 1.6}
+        for equation in cases:
+            values = dict(parameters, **hill)
+            f = pycello.equation.compile_equation(equation, values, ['x'])
+            df = pycello.equation.compile_derivative(equation, values, ['x'], 'x')
+            np.testing.assert_allclose(df(x), (f(x + h) - f(x - h)) / (2 * h), rtol=1e-6, err_msg=equation)
+
+        dn = pycello.equation.compile_derivative(cases[0], hill, ['x', 'n'], 'n')
+        f = pycello.equation.compile_equation(cases[0], hill, ['x', 'n'])
+        np.testing.assert_allclose(dn(x, 1.6), (f(x, 1.6 + h) - f(x, 1.6 - h)) / (2 * h), rtol=1e-6)
+
+    def test_constants(self):
+        # negative constants keep their sign under a power
+        self.assertEqual(pycello.equation.compile_equation('(-a)^x', {'a': 2.0}, ['x'])(2.0), 4.0)
+        self.assertEqual(pycello.equation.compile_equation('a^x', {'a': -2.0}, ['x'])(2.0), 4.0)
+        self.assertEqual(pycello.equation.compile_equation('-a^x', {'a': 2.0}, ['x'])(2.0), -4.0)
+
+        # folded constants follow NumPy semantics
+        with np.errstate(all='ignore'):
+            f = pycello.equation.compile_equation('x/(a-a)', {'a': 2.0}, ['x'])
+            self.assertEqual(f(1.0), np.inf)
+            f = pycello.equation.compile_equation('x+a^1000', {'a': 10.0}, ['x'])
+            self.assertEqual(f(1.0), np.inf)
+            f = pycello.equation.compile_equation('x+(a-a)/(a-a)', {'a': 2.0}, ['x'])
+            self.assertTrue(np.isnan(f(1.0)))
+
+    def test_unsupported(self):
+        with self.assertRaises(pycello.equation.UnsupportedExpression):
+            pycello.equation.tokenize('x > 1')
+        with self.assertRaises(pycello.equation.UnsupportedExpression):
+            pycello.equation._Parser(pycello.equation.tokenize('tanh(x)'), {}, ['x']).parse()
+
+    def test_variable_names(self):
+        # variable names are not pasted into the compiled code unchecked
+        for name in ["y=print('INJECTED')", 'lambda', 'np', '1x']:
+            with self.assertRaises(pycello.equation.UnsupportedExpression):
+                pycello.equation.compile_equation('x', {}, ['x', name])
+
+    def test_no_sympy(self):
+        code = "import sys, pycello.netlist, pycello.utils; print('sympy' in sys.modules)"
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+        self.assertEqual(out.stdout.strip(), 'False', "sympy imported.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+from .context import pycello
+import pycello.activity
+import pycello.logic
+import pycello.netlist
+import pycello.table
+import pycello.ucf
+import numpy as np
+import json
+import unittest
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class TestLogic(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestLogic, self).__init__(*args, **kwargs)
+
+        self.ucf = pycello.ucf.UCF.from_path('examples/Eco1C1G1T1-synbiohub.UCF.json')
+
+    def test_input_words(self):
+        for inputs in (2, 8):
+            words = pycello.logic.input_words(inputs)
+            bits = pycello.logic.LogicResult(range(inputs), words, 2**inputs).table().values
+            np.testing.assert_array_equal(bits, pycello.activity.truth_table(inputs))
+
+    def test_logic_table(self):
+        with open('examples/nand_outputNetlist.json') as netlist_file:
+            netlist = pycello.netlist.Netlist(json.load(netlist_file), self.ucf)
+        logic = pycello.table.read_csv('examples/nand_logic.csv', np.bool_)
+
+        result = pycello.logic.simulate(netlist)
+        np.testing.assert_array_equal(result['out'], [True, True, True, False])
+        self.assertEqual(pycello.logic.verify(netlist, logic), {}, "NAND netlist does not match.")
+
+        # a NOT in place of the output gives the AND function
+        netlist.node('out').type = 'NOT'
+        self.assertIn('out', pycello.logic.verify(netlist, logic), "Mismatch not found.")
+
+    def test_no_fanin(self):
+        with open('examples/and_outputNetlist.json') as netlist_file:
+            data = json.load(netlist_file)
+        data['edges'] = [edge for edge in data['edges'] if edge['dst'] != '$48']
+        netlist = pycello.netlist.Netlist(data, self.ucf)
+
+        # a node without fan-in has an input of zero
+        result = pycello.logic.simulate(netlist)
+        np.testing.assert_array_equal(result['$48'], [True, True, True, True])
+        np.testing.assert_array_equal(result['out'], [False, False, False, False])
+
+    def test_logic_circuit(self):
+        with open('examples/0x78_A000_logic_circuit.txt') as circuit_file:
+            lines = circuit_file.read().splitlines()
+        netlist = pycello.netlist.Netlist.fromLogicCircuit(lines, self.ucf)
+        inputs, truth = pycello.logic.read_logic_circuit(lines)
+
+        self.assertEqual(inputs, ['input_pBAD', 'input_pTac', 'input_pTet'], "Incorrect input order.")
+        self.assertEqual(pycello.logic.verify(netlist, truth, inputs), {}, "0x78 netlist does not match.")
+        np.testing.assert_array_equal(truth['output_YFP'], [0, 1, 1, 1, 1, 0, 0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
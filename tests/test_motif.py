@@ -0,0 +1,75 @@
+from .context import pycello
+import pycello.activity
+import pycello.motif
+import pycello.netlist
+import pycello.ucf
+import numpy as np
+import json
+import unittest
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class TestMotif(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestMotif, self).__init__(*args, **kwargs)
+
+        self.ucf = pycello.ucf.UCF.from_path('examples/Eco1C1G1T1-synbiohub.UCF.json')
+        self.library = pycello.motif.MotifLibrary.from_ucf(self.ucf)
+
+    def test_motif(self):
+        motif = pycello.motif.Motif.from_entry({
+            'inputs': ['a', 'b'], 'outputs': ['y'],
+            'netlist': ['NOR(y,0Wire1,0Wire0)', 'NOT(0Wire0,a)', 'NOT(0Wire1,b)'],
+        })
+        self.assertEqual(motif.size, 3)
+        self.assertEqual([gate[1] for gate in motif.gates], ['0Wire0', '0Wire1', 'y'])
+        self.assertEqual(motif.truth, 0b1000, "Incorrect AND truth table.")
+        np.testing.assert_array_equal(pycello.motif.unpack(motif.truth, 2), [False, False, False, True])
+
+    def test_lookup(self):
+        self.assertEqual(len(self.library), 255)
+        for truth in range(1, 255):
+            match = self.library.lookup(truth, 3)
+            rows = pycello.activity.truth_table(3)
+            states = np.array([4, 2, 1]) @ rows[match.wiring]
+            bits = pycello.motif.unpack(match.motif.truth, 3)[states]
+            self.assertEqual(pycello.motif.pack(bits), truth, "Incorrect wiring.")
+            self.assertEqual(self.library.implementations(truth, 3, match.size - 1), [],
+                             "Smaller implementation of {:#x} found.".format(truth))
+
+        # a two input function leaves a motif input unconnected
+        match = self.library.lookup([False, False, False, True], 2)
+        self.assertEqual(match.size, 3)
+        self.assertEqual(sorted(match.wiring, key=str), [0, 1, None])
+
+    def test_match(self):
+        with open('examples/and_outputNetlist.json') as netlist_file:
+            netlist = pycello.netlist.Netlist(json.load(netlist_file), self.ucf)
+        match = self.library.match(netlist, 'out', inputs=['b', 'a'])
+        self.assertEqual(match.size, 3)
+        self.assertEqual(set(match.connections().values()), {'a', 'b', None})
+
+        # a node deep in a circuit is matched over a cut of its cone
+        with open('examples/0x78_Netlist.json') as netlist_file:
+            netlist = pycello.netlist.Netlist(json.load(netlist_file), self.ucf)
+        match = self.library.match(netlist, 'A1_AmtR', inputs=['input_pBAD', 'H1_HlyIIR'])
+        self.assertEqual(match.size, 1)
+        self.assertEqual(pycello.motif.cut_function(netlist, 'E1_BetI'), (0b1110, ['input_pTac', 'input_pTet']))
+        with self.assertRaises(ValueError):
+            pycello.motif.cut_function(netlist, 'A1_AmtR', ['H1_HlyIIR'])
+
+    def test_truth_types(self):
+        # numpy integers are packed truth tables, not booleans
+        self.assertEqual(self.library.lookup(np.int64(8), 2).size, self.library.lookup(8, 2).size)
+        self.assertEqual(self.library.lookup(np.int64(8), 2).size, 3)
+        with self.assertRaises(ValueError):
+            self.library.lookup(True, 2)
+        with self.assertRaises(ValueError):
+            self.library.lookup(0x100, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
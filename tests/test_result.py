@@ -0,0 +1,65 @@
+from .context import pycello
+import pycello.netlist
+import pycello.result
+import pycello.rnaseq
+import pycello.ucf
+import numpy as np
+import io
+import json
+import os
+import tempfile
+import unittest
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class TestResult(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestResult, self).__init__(*args, **kwargs)
+
+        ucf = pycello.ucf.UCF.from_path('examples/Eco1C1G1T1-synbiohub.UCF.json')
+        with open('examples/and_outputNetlist.json') as netlist_file:
+            self.netlist = pycello.netlist.Netlist(json.load(netlist_file), ucf)
+        activity = {'a': np.array([0.0034, 0.0034, 2.8, 2.8]),
+                    'b': np.array([0.0013, 4.4, 0.0013, 4.4])}
+        self.results = pycello.rnaseq.simulate_netlist(self.netlist, activity)
+        self.result = pycello.result.Result.from_simulation(self.netlist, self.results)
+
+    def test_views(self):
+        placement = self.netlist.placements[0]
+        flux, parts = self.results[placement]
+
+        self.assertEqual(self.result.shape, (len(self.netlist.placements), 4, len(parts)))
+        self.assertTrue(np.shares_memory(self.result.placement(0), self.result.flux), "Not a view.")
+        np.testing.assert_array_equal(self.result.state(0, 2), flux[2])
+        self.assertEqual(list(self.result.part_names(0)), [p.part.name for p in parts])
+        self.assertEqual(list(self.result.part_types(0)), [p.part.type for p in parts])
+        self.assertLess(len(self.result.names), len(parts) * len(self.netlist.placements),
+                        "Part names are not shared.")
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for path, mmap_mode in (('result.npz', None), ('result', 'r')):
+                path = os.path.join(directory, path)
+                self.result.save(path)
+                loaded = pycello.result.Result.load(path, mmap_mode=mmap_mode)
+                np.testing.assert_array_equal(loaded.flux, self.result.flux)
+                np.testing.assert_array_equal(loaded.part_names(0), self.result.part_names(0))
+            self.assertIsInstance(loaded.flux, np.memmap, "Flux not memory-mapped.")
+            del loaded
+
+    def test_json(self):
+        out = io.StringIO()
+        self.result.write_json(out)
+        data = json.loads(out.getvalue())
+        ref = pycello.rnaseq.get_json({
+            placement: [dict(zip(parts, state)) for state in flux.tolist()]
+            for placement, (flux, parts) in self.results.items()
+        })
+        self.assertEqual(data, ref, "JSON differs from get_json.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+from .context import pycello
+import pycello.netlist
+import pycello.rnaseq
+import pycello.ucf
+import numpy as np
+import concurrent.futures
+import csv
+import json
+import unittest
+import unittest.mock
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class TestRNAseq(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestRNAseq, self).__init__(*args, **kwargs)
+
+        self.ucf = pycello.ucf.UCF.from_path('examples/Eco1C1G1T1-synbiohub.UCF.json')
+
+        with open('examples/and_outputNetlist.json') as netlist_file:
+            self.netlist_json = json.load(netlist_file)
+        self.netlist = pycello.netlist.Netlist(self.netlist_json, self.ucf)
+
+        with open('examples/and_activity.csv') as activity_file:
+            rows = list(csv.reader(activity_file))
+        dt = np.dtype([(row[0], np.float64) for row in rows])
+        values = np.array([[float(k) for k in row[1:]] for row in rows]).T
+        self.activity = np.array([tuple(row) for row in values], dtype=dt)
+
+    def test_forward(self):
+        placement = self.netlist.placements[0]
+        profile, info = pycello.rnaseq.placement_rnaseq(
+            self.netlist, placement, self.activity[3:4], full_output=True
+        )
+        flux = {(c.name, p.part.name): profile[p] for g in placement.groups for c in g.components for p in c.parts}
+
+        self.assertEqual(info.method, 'forward', "Acyclic placement not solved forward.")
+        self.assertEqual(info.iterations, 1, "Forward solve should take a single pass.")
+        # pTet is driven by input b
+        self.assertAlmostEqual(flux[('A1_AmtR_1', 'pTet')], 0.95 * 4.4, msg="Incorrect promoter flux.")
+        self.assertAlmostEqual(flux[('A1_AmtR_1', 'L3S2P55')], flux[('A1_AmtR_1', 'AmtR')] / 255.66,
+                               msg="Incorrect terminator flux.")
+
+    def test_feedback(self):
+        # placing PhlF upstream of AmtR makes the readthrough of the PhlF
+        # terminator feed the gate that drives it
+        groups = self.netlist_json['placements'][0]
+        groups[0]['components'] = groups[0]['components'][1::-1] + groups[0]['components'][2:]
+        netlist = pycello.netlist.Netlist(self.netlist_json, self.ucf)
+        placement = netlist.placements[0]
+
+        with self.assertRaises(pycello.netlist.FeedbackError):
+            pycello.rnaseq.placement_rnaseq(netlist, placement, self.activity[0:1], method='forward')
+
+        profile, info = pycello.rnaseq.placement_rnaseq(netlist, placement, self.activity[0:1], full_output=True)
+        model = pycello.rnaseq.Program(netlist, placement)
+        inputs = np.array([[self.activity[0][name] for name in model.inputs]])
+        responses = [gate.response for gate in model.gates]
+        flux = np.full((1, len(model.parts)), 100.0)
+        for i in range(200):
+            flux = model.sweep(flux, inputs, responses)
+
+        self.assertEqual(info.method, 'anderson', "Feedback not detected.")
+        self.assertLessEqual(info.residual, pycello.rnaseq.TOLERANCE, "Solve did not converge.")
+        np.testing.assert_allclose([profile[p] for p in model.parts], flux[0], rtol=1e-4)
+
+    def finite_difference(self, netlist, placement, obj, name, step=1e-5):
+        """Central difference of the flux with respect to a parameter of a UCF object."""
+        flux = []
+        for sign in (1, -1):
+            if isinstance(obj, pycello.ucf.Gate):
+                value = obj.parameters[name]
+                obj.parameters = dict(obj.parameters, **{name: value * (1 + sign * step)})
+            else:
+                value = getattr(obj, name)
+                setattr(obj, name, value * (1 + sign * step))
+            flux.append(pycello.rnaseq.Program(netlist, placement).run(self.activity))
+            if isinstance(obj, pycello.ucf.Gate):
+                obj.parameters = dict(obj.parameters, **{name: value})
+            else:
+                setattr(obj, name, value)
+        return (flux[0] - flux[1]) / (2 * step * value)
+
+    def test_jacobian(self):
+        feedback = json.loads(json.dumps(self.netlist_json))
+        groups = feedback['placements'][0]
+        groups[0]['components'] = groups[0]['components'][1::-1] + groups[0]['components'][2:]
+        for netlist in (self.netlist, pycello.netlist.Netlist(feedback, self.ucf)):
+            placement = netlist.placements[0]
+            jacobian, parts, parameters = pycello.rnaseq.sensitivities(netlist, placement, self.activity)
+            program = pycello.rnaseq.Program(netlist, placement)
+            objects = {gate.name: gate for gate in program.gates}
+            objects.update({part.name: part for part in program.ribozymes + program.terminators})
+
+            self.assertEqual(jacobian.shape, (4, len(parts), len(parameters)), "Incorrect Jacobian shape.")
+            self.assertIn((program.gates[0].name, 'ymax'), parameters, "Missing gate parameter.")
+            for k, (name, parameter) in enumerate(parameters):
+                # converge tightly, so that differences in flux are not solver noise
+                with unittest.mock.patch.object(pycello.rnaseq, 'TOLERANCE', 1e-13):
+                    ref = self.finite_difference(netlist, placement, objects[name], parameter)
+                np.testing.assert_allclose(jacobian[:, :, k], ref, rtol=1e-4, atol=1e-7,
+                                           err_msg=str((name, parameter)))
+
+    def test_simulate(self):
+        for placement in self.netlist.placements:
+            flux, parts = pycello.rnaseq.simulate(self.netlist, placement, self.activity)
+
+            self.assertEqual(flux.shape, (4, len(parts)), "Incorrect result shape.")
+            for i in range(4):
+                profile = pycello.rnaseq.placement_rnaseq(self.netlist, placement, self.activity[i:i+1])
+                np.testing.assert_allclose(flux[i], [profile[p] for p in parts])
+
+    def test_executor(self):
+        ref = pycello.rnaseq.simulate_netlist(self.netlist, self.activity)
+        for pool in (concurrent.futures.ThreadPoolExecutor, concurrent.futures.ProcessPoolExecutor):
+            with pool(max_workers=2) as executor:
+                result = pycello.rnaseq.simulate_netlist(self.netlist, self.activity,
+                                                         executor=executor, chunksize=3)
+            for placement in self.netlist.placements:
+                np.testing.assert_allclose(result[placement][0], ref[placement][0])
+                self.assertEqual(result[placement][1], ref[placement][1], "Incorrect part mapping.")
+        for placement in self.netlist.placements:
+            for group in placement.groups:
+                for component in group.components:
+                    for part in component.parts:
+                        self.assertEqual(part.flux, 0.0, "Simulation state stored on the netlist.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+from .context import pycello
+import pycello.equation
+import pycello.netlist
+import pycello.rnaseq
+import pycello.sweep
+import pycello.ucf
+import numpy as np
+import json
+import unittest
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class TestSweep(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestSweep, self).__init__(*args, **kwargs)
+
+        self.ucf = pycello.ucf.UCF.from_path('examples/Eco1C1G1T1-synbiohub.UCF.json')
+        with open('examples/and_outputNetlist.json') as netlist_file:
+            self.netlist = pycello.netlist.Netlist(json.load(netlist_file), self.ucf)
+        self.program = pycello.rnaseq.Program(self.netlist, self.netlist.placements[0])
+        self.activity = {'a': np.array([0.0034, 0.0034, 2.8, 2.8]),
+                         'b': np.array([0.0013, 4.4, 0.0013, 4.4])}
+
+    def run_with(self, gate, **parameters):
+        responses = [g.response for g in self.program.gates]
+        i = self.program.gates.index(gate)
+        responses[i] = pycello.equation.compile_equation(
+            gate.equation, {**gate.parameters, **parameters}, gate.variables
+        )
+        return self.program.run(self.activity, responses=responses)
+
+    def test_grid(self):
+        gate = self.program.gates[0]
+        ymax = np.array([0.5, 1.0, 2.0]) * gate.parameters['ymax']
+        result = pycello.sweep.parameter_sweep(
+            self.program, self.activity, {gate.name: {'ymax': ymax}, 'unplaced': {'ymax': 1.0}},
+            percentiles=(0, 50, 100), chunksize=2
+        )
+        runs = np.array([self.run_with(gate, ymax=value) for value in ymax])
+
+        self.assertEqual(result.samples, 3, "Incorrect number of samples.")
+        self.assertEqual(result.bands.shape, (3, 4, len(self.program.parts)), "Incorrect band shape.")
+        np.testing.assert_allclose(result.mean, runs.mean(axis=0), rtol=1e-12)
+        np.testing.assert_allclose(result.std, runs.std(axis=0), rtol=1e-6, atol=1e-12)
+        np.testing.assert_allclose(result.bands[1], runs[1], rtol=0.025)
+        with self.assertRaises(ValueError):
+            pycello.sweep.parameter_sweep(self.program, self.activity, {gate.name: {'ymx': ymax}})
+
+    def test_random(self):
+        gate = self.program.gates[0]
+        nominal = gate.parameters['K']
+        result = pycello.sweep.parameter_sweep(
+            self.program, self.activity,
+            {gate.name: {'K': lambda rng, size: nominal * rng.lognormal(0.0, 0.2, size)}},
+            samples=5000, seed=1
+        )
+        flux = self.program.run(self.activity)
+
+        self.assertEqual(result.samples, 5000, "Incorrect number of samples.")
+        self.assertTrue(np.all(result.bands[0] <= result.bands[2]), "Bands out of order.")
+        np.testing.assert_allclose(result.bands[1], flux, rtol=0.05)
+        with self.assertRaises(ValueError):
+            pycello.sweep.parameter_sweep(self.program, self.activity,
+                                          {gate.name: {'K': lambda rng, size: rng.random(size)}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+from .context import pycello
+import pycello.netlist
+import pycello.rnaseq
+import pycello.table
+import pycello.ucf
+import numpy as np
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class TestTable(unittest.TestCase):
+
+    def test_read_csv(self):
+        activity, logic = pycello.table.read_tables('examples/and_activity.csv', 'examples/and_logic.csv')
+        with open('examples/and_activity.csv') as activity_file:
+            rows = list(csv.reader(activity_file))
+
+        self.assertEqual(activity.names, [row[0] for row in rows], "Incorrect node names.")
+        self.assertEqual(activity.values.shape, (len(rows), 4), "Incorrect table shape.")
+        self.assertTrue(activity.values.flags.c_contiguous, "Table not contiguous.")
+        np.testing.assert_array_equal(activity[rows[-1][0]], [float(k) for k in rows[-1][1:]])
+        np.testing.assert_array_equal(logic['$49'], [True, True, False, False])
+        self.assertEqual(logic.values.dtype, np.bool_, "Logic not read as booleans.")
+        np.testing.assert_array_equal(pycello.table.Table.from_rows(rows).values, activity.values)
+
+        with self.assertRaises(ValueError):
+            activity.check(pycello.table.read_csv(io.StringIO("a,true,false\nb,false,true\n"), np.bool_))
+        with self.assertRaises(ValueError):
+            pycello.table.read_csv(io.StringIO("a,1,2\nb,3\n"))
+        with self.assertRaises(ValueError):
+            # ragged rows with the right total number of values
+            pycello.table.read_csv(io.StringIO("a,1,2\nb,3\nc,4,5,6\n"))
+
+    def test_binary(self):
+        activity = pycello.table.read_csv('examples/and_activity.csv')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'activity')
+            activity.save(path)
+            loaded = pycello.table.read(path)
+            self.assertIsInstance(loaded.values, np.memmap, "Table not memory-mapped.")
+            self.assertEqual(loaded.names, activity.names, "Incorrect node names.")
+            np.testing.assert_array_equal(loaded.values, activity.values)
+            del loaded
+
+    def test_rnaseq(self):
+        ucf = pycello.ucf.UCF.from_path('examples/Eco1C1G1T1-synbiohub.UCF.json')
+        with open('examples/and_outputNetlist.json') as netlist_file:
+            netlist = pycello.netlist.Netlist(json.load(netlist_file), ucf)
+        activity, logic = pycello.table.read_tables('examples/and_activity.csv', 'examples/and_logic.csv')
+
+        result = pycello.rnaseq.rnaseq(ucf, netlist, activity, logic)
+        with open('examples/and_activity.csv') as activity_file, open('examples/and_logic.csv') as logic_file:
+            rows = pycello.rnaseq.rnaseq(ucf, netlist, list(csv.reader(activity_file)),
+                                         list(csv.reader(logic_file)))
+        for placement in netlist.placements:
+            flux, parts = pycello.rnaseq.simulate(netlist, placement, activity)
+            self.assertEqual(result[placement], rows[placement], "Rows and tables differ.")
+            for state, profile in enumerate(result[placement]):
+                np.testing.assert_allclose([profile[p] for p in parts], flux[state])
+
+
+if __name__ == '__main__':
+    unittest.main()
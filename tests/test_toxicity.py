@@ -0,0 +1,64 @@
+from .context import pycello
+import pycello.activity
+import pycello.netlist
+import pycello.toxicity
+import pycello.ucf
+import numpy as np
+import json
+import unittest
+
+__author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
+__license__ = 'GPL3'
+
+
+class TestToxicity(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestToxicity, self).__init__(*args, **kwargs)
+
+        self.ucf = pycello.ucf.UCF.from_path('examples/Eco1C1G1T1-synbiohub.UCF.json')
+        self.toxicity = pycello.toxicity.Toxicity.from_ucf(self.ucf)
+
+    def test_interpolate(self):
+        x = np.logspace(-3, 1.5, 20)
+        rows = self.toxicity.rows(self.toxicity.names)
+        growth = self.toxicity.interpolate(rows[:, None], x[None, :])
+        for i, entry in enumerate(self.ucf.collection('gate_toxicity')):
+            order = np.argsort(entry['input'])
+            ref = np.interp(np.log(x), np.log(entry['input'])[order], np.array(entry['growth'])[order])
+            np.testing.assert_allclose(growth[i], np.minimum(ref, 1.0), err_msg=entry['gate_name'])
+
+        # tables of different lengths share the padded array
+        toxicity = pycello.toxicity.Toxicity(['a', 'b'], [[1, 10], [1, 10, 100]], [[1, 0.5], [1, 0.8, 0.2]])
+        np.testing.assert_allclose(toxicity.interpolate([[0], [1]], [[100], [1000]]), [[0.5], [0.2]])
+        np.testing.assert_allclose(toxicity.interpolate(1, np.sqrt(10)), 0.9)
+
+    def test_predict(self):
+        with open('examples/and_outputNetlist.json') as netlist_file:
+            netlist = pycello.netlist.Netlist(json.load(netlist_file), self.ucf)
+        activity = pycello.activity.activity_table(netlist, inputs=['b', 'a'])
+        growth = pycello.toxicity.predict(netlist, self.toxicity, activity)
+
+        self.assertEqual(growth.gates.names, ['$48', '$49', '$50'])
+        np.testing.assert_allclose(growth.states(), growth.gates.values.prod(axis=0))
+        self.assertEqual(growth.circuit_growth(), growth.states().min())
+        self.assertTrue(np.all(growth.gates.values <= 1.0), "Growth above that of the control.")
+
+        # S3_SrpR at a = 2.8, between its table points (1.995, 0.97) and
+        # (4.142, 0.91), interpolated in log input
+        weight = np.log(2.8 / 1.995271867612293) / np.log(4.141843971631205 / 1.995271867612293)
+        self.assertEqual(netlist.node('$48').gate.name, 'S3_SrpR')
+        self.assertAlmostEqual(growth.gates['$48'][1], 0.97 + weight * (0.91 - 0.97))
+        self.assertAlmostEqual(growth.gates['$48'][1], 0.94216, places=5)
+        # its input is below the table in state 0, and its growth capped
+        self.assertEqual(growth.gates['$48'][0], 1.0)
+
+        with self.assertRaises(ValueError):
+            pycello.toxicity.predict(netlist, pycello.toxicity.Toxicity([], [], []), activity)
+        netlist.node('$49').gate = None
+        with self.assertRaises(ValueError):
+            pycello.toxicity.predict(netlist, self.toxicity, activity)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,12 @@
 from .context import pycello
 import pycello.netlist
 import pycello.ucf
+import numpy as np
 import json
+import os
 import unittest
 import pickle
+import tempfile
 
 __author__ = 'Timothy S. Jones <jonests@bu.edu>, Densmore Lab, BU'
 __license__ = 'GPL3'
@@ -32,6 +35,48 @@ class TestNetlist(unittest.TestCase):
 
         self.assertEqual(nodes, nodes_ref, "Incorrect node list.")
 
+    def test_netlist_graph(self):
+        with open('examples/and_outputNetlist.json') as netlist_file:
+            netlist_json = json.load(netlist_file)
+
+        netlist = pycello.netlist.Netlist(netlist_json, self.ucf)
+        node = netlist.node('$50')
+        fanin = set([n.name for n in netlist.graph.fanin[node]])
+
+        self.assertEqual(fanin, set(['$48', '$49']), "Incorrect fan-in.")
+        self.assertEqual([n.name for n in netlist.graph.fanout[node]], ['out'], "Incorrect fan-out.")
+        self.assertIs(netlist.graph.upstream_node(self.ucf.part('pAmtR'), node), netlist.node('$49'),
+                      "Incorrect upstream node.")
+        self.assertEqual(len(netlist.placements[0].node_components(node)), 2, "Incorrect components.")
+
+        # an edge from a node missing from the netlist is ignored
+        netlist_json['edges'].append(dict(netlist_json['edges'][0], src='missing', dst='$50'))
+        netlist = pycello.netlist.Netlist(netlist_json, self.ucf)
+        fanin = set([n.name for n in netlist.graph.fanin[netlist.node('$50')]])
+        self.assertEqual(fanin, set(['$48', '$49']), "Dangling edge in fan-in.")
+
+    def test_netlist_schedule(self):
+        with open('examples/and_outputNetlist.json') as netlist_file:
+            netlist_json = json.load(netlist_file)
+
+        netlist = pycello.netlist.Netlist(netlist_json, self.ucf)
+        schedule = netlist.schedule(strict=True)
+        levels = [set([schedule.nodes[i].name for i in level]) for level in schedule.levels]
+
+        self.assertEqual(levels, [set(['a', 'b']), set(['$48', '$49']), set(['$50']), set(['out'])],
+                         "Incorrect levels.")
+        inputs = set([schedule.nodes[i].name for i in schedule.inputs[2][0]])
+        self.assertEqual(inputs, set(['$48', '$49']), "Incorrect inputs.")
+
+        netlist_json['edges'].append({'name': 'loop', 'src': '$50', 'dst': '$49'})
+        netlist = pycello.netlist.Netlist(netlist_json, self.ucf)
+        schedule = netlist.schedule()
+
+        self.assertEqual([set([n.name for n in loop]) for loop in schedule.feedback], [set(['$49', '$50'])],
+                         "Incorrect feedback loops.")
+        with self.assertRaises(pycello.netlist.FeedbackError):
+            netlist.schedule(strict=True)
+
     def test_ucf_logiccircuit(self):
         with open('examples/0x78_A000_logic_circuit.txt') as lc_file:
             lc_text = lc_file.readlines()
@@ -42,6 +87,90 @@ class TestNetlist(unittest.TestCase):
 
         self.assertTrue("E1_BetI" in nodes, "Incorrect nodes.")
 
+    def test_ucf_index(self):
+        gate = self.ucf.gate('A1_AmtR')
+
+        self.assertEqual(self.ucf.promoter_gates('pAmtR'), [gate], "Incorrect promoter index.")
+        self.assertEqual([gate.name for gate in self.ucf.promoter_gates('pSrpR')],
+                         ['S1_SrpR', 'S2_SrpR', 'S3_SrpR', 'S4_SrpR'], "Incorrect shared promoter index.")
+        self.assertIn(gate, self.ucf.group('AmtR'), "Incorrect group index.")
+        self.assertTrue(all(part.type == 'terminator' for part in self.ucf.parts_of_type('terminator')),
+                        "Incorrect type index.")
+
+    def test_ucf_from_path(self):
+        path = 'examples/Eco1C1G1T1-synbiohub.UCF.json'
+        ucf = pycello.ucf.UCF.from_path(path, collections=['parts'])
+
+        self.assertEqual(len(ucf.parts), len(self.ucf.parts), "Incorrect part list.")
+        self.assertEqual(ucf.gates, [], "Undecoded collections were loaded.")
+
+        with open(path) as ucf_file:
+            ref = [coll for coll in json.load(ucf_file) if coll['collection'] == 'motif_library']
+
+        self.assertEqual(ucf.collection('motif_library'), ref, "Incorrect lazy collection.")
+
+    def test_ucf_cytometry(self):
+        path = 'examples/Eco1C1G1T1-synbiohub.UCF.json'
+        ucf = pycello.ucf.UCF.from_path(path)
+        with open(path) as ucf_file:
+            ref = {coll['gate_name']: coll for coll in json.load(ucf_file)
+                   if coll['collection'] == 'gate_cytometry'}
+
+        self.assertEqual(sorted(ucf.cytometry_gates()), sorted(ref), "Incorrect cytometry gates.")
+        self.assertIsNone(ucf.cytometry('missing'), "Missing gate has cytometry.")
+
+        data = ucf.cytometry('A1_AmtR')
+        levels = ref['A1_AmtR']['cytometry_data']
+        self.assertEqual(data.counts.dtype, np.float32, "Counts are not float32.")
+        np.testing.assert_allclose(data.inputs, [level['input'] for level in levels])
+        np.testing.assert_allclose(data.counts, [level['output_counts'] for level in levels], rtol=1e-6)
+        self.assertIs(ucf.cytometry('A1_AmtR'), data, "Cytometry decoded twice.")
+        self.assertIs(ucf.cytometry('S3_SrpR').bins, data.bins, "Bins are not shared.")
+
+        entry = json.loads(json.dumps(ref['A1_AmtR']))
+        entry['cytometry_data'][1]['output_bins'] = entry['cytometry_data'][1]['output_bins'][::-1]
+        with self.assertRaises(ValueError):
+            pycello.ucf.UCF([entry]).cytometry('A1_AmtR')
+
+    def test_ucf_cache(self):
+        path = 'examples/Eco1C1G1T1-synbiohub.UCF.json'
+        with tempfile.TemporaryDirectory() as cache:
+            pycello.ucf.UCF.from_path(path, cache=cache)
+            ucf = pycello.ucf.UCF.from_path(path, cache=cache)
+
+            self.assertEqual(len(os.listdir(cache)), 1, "Cache not written.")
+
+        gate = ucf.gate('A1_AmtR')
+        ref = self.ucf.gate('A1_AmtR')
+
+        self.assertEqual(gate.parameters, ref.parameters, "Incorrect cached parameters.")
+        self.assertEqual([part.name for part in gate.parts], [part.name for part in ref.parts],
+                         "Incorrect cached parts.")
+        self.assertEqual(ucf.promoter_gates('pAmtR'), [gate], "Incorrect cached promoter index.")
+        self.assertEqual(len(ucf.promoter_gates('pSrpR')), 4, "Incorrect cached shared promoter index.")
+        self.assertEqual(ucf.part('L3S2P55').strength, self.ucf.part('L3S2P55').strength,
+                         "Incorrect cached terminator strength.")
+        self.assertEqual(len(ucf.collection('gate_cytometry')), 20, "Incorrect cached collection.")
+
+    def test_ucf_cache_damaged(self):
+        path = 'examples/Eco1C1G1T1-synbiohub.UCF.json'
+        with tempfile.TemporaryDirectory() as cache:
+            pycello.ucf.UCF.from_path(path, cache=cache)
+            cached = os.path.join(cache, os.listdir(cache)[0])
+            with open(cached, 'rb') as fp:
+                data = fp.read()
+
+            # a truncated cache, and one with a garbled section table
+            for damaged in [data[:len(data) // 2], data[:64] + b'\xff' * 256 + data[320:]]:
+                with open(cached, 'wb') as fp:
+                    fp.write(damaged)
+                ucf = pycello.ucf.UCF.from_path(path, cache=cache)
+
+                self.assertEqual(ucf.gate('A1_AmtR').parameters, self.ucf.gate('A1_AmtR').parameters,
+                                 "Incorrect parameters from damaged cache.")
+                self.assertEqual(len(ucf.collection('gate_cytometry')), 20,
+                                 "Incorrect collection from damaged cache.")
+
     def test_json(self):
         with open('examples/0x78_Netlist.pickle', 'rb') as pickle_file:
             netlist = pickle.load(pickle_file)